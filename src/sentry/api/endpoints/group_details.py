@@ -122,22 +122,24 @@ class GroupDetailsEndpoint(GroupEndpoint, EnvironmentMixin):
 
     @staticmethod
     def __group_hourly_daily_stats(group: Group, environment_ids: Sequence[int]):
-        get_range = functools.partial(tsdb.get_range, environment_ids=environment_ids)
+        get_range_table = functools.partial(tsdb.get_range_table, environment_ids=environment_ids)
         model = get_issue_tsdb_group_model(group.issue_category)
         now = timezone.now()
-        hourly_stats = tsdb.rollup(
-            get_range(model=model, keys=[group.id], end=now, start=now - timedelta(days=1)),
-            3600,
-        )[group.id]
-        daily_stats = tsdb.rollup(
-            get_range(
+        hourly_stats = (
+            get_range_table(model=model, keys=[group.id], end=now, start=now - timedelta(days=1))
+            .rollup(3600)
+            .to_rollup()[group.id]
+        )
+        daily_stats = (
+            get_range_table(
                 model=model,
                 keys=[group.id],
                 end=now,
                 start=now - timedelta(days=30),
-            ),
-            3600 * 24,
-        )[group.id]
+            )
+            .rollup(3600 * 24)
+            .to_rollup()[group.id]
+        )
 
         return hourly_stats, daily_stats
 
@@ -2,6 +2,7 @@ import re
 from collections import namedtuple
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
 
 from django.utils.functional import cached_property
@@ -31,6 +32,7 @@ from sentry.search.utils import (
     parse_percentage,
     parse_size,
 )
+from sentry.utils.lru import LRUCache
 from sentry.utils.snuba import (
     Dataset,
     is_duration_measurement,
@@ -44,6 +46,15 @@ from sentry.utils.validators import is_event_id, is_span_id
 # before the asterisk is actually escaping the asterisk.
 WILDCARD_CHARS = re.compile(r"(?<!\\)(\\\\)*\*")
 
+# Number of distinct query strings whose parse trees are kept per process.
+PARSE_TREE_CACHE_SIZE = 1024
+
+# Number of distinct (query string, config) pairs whose parsed search filters
+# are kept per process.
+SEARCH_FILTER_CACHE_SIZE = 1024
+
+_search_filter_cache: LRUCache[Tuple[str, str], Sequence[Any]] = LRUCache(SEARCH_FILTER_CACHE_SIZE)
+
 event_search_grammar = Grammar(
     r"""
 search = spaces term*
@@ -1135,6 +1146,49 @@ default_config = SearchConfig(
 )
 
 
+@lru_cache(maxsize=PARSE_TREE_CACHE_SIZE)
+def _parse_tree(query: str) -> Node:
+    """
+    Parses a query with the search grammar. Parse trees do not depend on the
+    search config and are never mutated while visiting them, so they are
+    shared between all parses of the same query string.
+    """
+    return event_search_grammar.parse(query)
+
+
+def _get_config_cache_key(config: SearchConfig) -> str:
+    # `allow_boolean` and `free_text_key` are class attributes, not fields,
+    # and are therefore not part of the dataclass' repr.
+    return f"{config!r}|{config.allow_boolean!r}|{config.free_text_key!r}"
+
+
+def _has_datetime_value(terms: Sequence[Any]) -> bool:
+    for term in terms:
+        if isinstance(term, ParenExpression):
+            if _has_datetime_value(term.children):
+                return True
+        elif isinstance(term, (SearchFilter, AggregateFilter)):
+            if isinstance(term.value.raw_value, datetime):
+                return True
+    return False
+
+
+def _visit_cached(tree: Node, query: str, config: SearchConfig) -> Sequence[SearchFilter]:
+    key = (query, _get_config_cache_key(config))
+    search_filters = _search_filter_cache.get(key)
+    if search_filters is not None:
+        return list(search_filters)
+
+    search_filters = SearchVisitor(config).visit(tree)
+
+    # Relative dates are resolved against the current time while visiting,
+    # so results containing dates can not be reused.
+    if not _has_datetime_value(search_filters):
+        _search_filter_cache.set(key, list(search_filters))
+
+    return search_filters
+
+
 def parse_search_query(
     query, config=None, params=None, builder=None, config_overrides=None
 ) -> Sequence[SearchFilter]:
@@ -1142,7 +1196,7 @@ def parse_search_query(
         config = default_config
 
     try:
-        tree = event_search_grammar.parse(query)
+        tree = _parse_tree(query)
     except IncompleteParseError as e:
         idx = e.column()
         prefix = query[max(0, idx - 5) : idx]
@@ -1156,4 +1210,10 @@ def parse_search_query(
 
     if config_overrides:
         config = SearchConfig.create_from(config, **config_overrides)
+
+    # Filters only depend on the query and the config, unless field types are
+    # resolved through a query builder or the params of a request.
+    if builder is None and not params:
+        return _visit_cached(tree, query, config)
+
     return SearchVisitor(config, params=params, builder=builder).visit(tree)
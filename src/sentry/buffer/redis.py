@@ -51,10 +51,17 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(self, pending_partitions=1, incr_batch_size=2, batch_flush=False, **options):
+        """
+        ``batch_flush`` enables flushing each batch of ``incr_batch_size`` keys
+        with one pipelined round trip per Redis host and coalesced database
+        updates (see ``Buffer.process_batch``). It is meant to be combined
+        with a much larger ``incr_batch_size``.
+        """
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.batch_flush = batch_flush
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
@@ -233,13 +240,18 @@ class RedisBuffer(Buffer):
 
         try:
             keycount = 0
+            oldest = None
             with self.cluster.all() as conn:
-                results = conn.zrange(pending_key, 0, -1)
+                results = conn.zrange(pending_key, 0, -1, withscores=True)
 
             with self.cluster.all() as conn:
-                for host_id, keys in results.value.items():
-                    if not keys:
+                for host_id, items in results.value.items():
+                    if not items:
                         continue
+                    keys = [key for key, _ in items]
+                    host_oldest = min(score for _, score in items)
+                    if oldest is None or host_oldest < oldest:
+                        oldest = host_oldest
                     keycount += len(keys)
                     for key in keys:
                         pending_buffer.append(key.decode("utf-8"))
@@ -252,6 +264,10 @@ class RedisBuffer(Buffer):
                 process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
 
             metrics.timing("buffer.pending-size", keycount)
+            if oldest is not None:
+                # Pending keys are scored by the time of their last increment,
+                # so this is how far behind the flush is at worst.
+                metrics.timing("buffer.flush-lag", time() - oldest)
         finally:
             client.delete(lock_key)
 
@@ -262,12 +278,103 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.batch_flush:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
     def _process(self, model, columns, filters, extra=None, signal_only=None):
         return super().process(model, columns, filters, extra, signal_only)
 
+    def _process_batch(self, items):
+        return super().process_batch(items)
+
+    def _load_buffered_values(self, values):
+        """
+        Turns the raw contents of a buffer hash into the arguments for ``process``.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))
+
+        if values["f"].startswith(b"{"):
+            filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"["):
+                    extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
+    def _process_batch_incr(self, keys):
+        # Same stampede protection as ``_process_single_incr``, but all locks
+        # are taken with a single round trip per host.
+        with self.cluster.map() as conn:
+            lock_results = {
+                key: conn.set(self._make_lock_key(key), "1", nx=True, ex=10) for key in keys
+            }
+        locked_keys = [key for key, result in lock_results.items() if result.value]
+
+        if len(locked_keys) < len(keys):
+            metrics.incr(
+                "buffer.revoked",
+                amount=len(keys) - len(locked_keys),
+                tags={"reason": "locked"},
+                skip_internal=False,
+            )
+            self.logger.debug(
+                "buffer.revoked.locked", extra={"redis_keys": sorted(set(keys) - set(locked_keys))}
+            )
+
+        if not locked_keys:
+            return
+
+        try:
+            with self.cluster.map() as conn:
+                hashes = {}
+                for key in locked_keys:
+                    hashes[key] = conn.hgetall(key)
+                    conn.zrem(self._make_pending_key_from_key(key), key)
+                    conn.delete(key)
+
+            items = []
+            for key, result in hashes.items():
+                if not result.value:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+                items.append(self._load_buffered_values(result.value))
+
+            metrics.timing("buffer.batch-size", len(items))
+            if items:
+                self._process_batch(items)
+        finally:
+            with self.cluster.map() as conn:
+                for key in locked_keys:
+                    conn.delete(self._make_lock_key(key))
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -288,42 +395,11 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+            self._process(*self._load_buffered_values(values))
         finally:
             client.delete(lock_key)
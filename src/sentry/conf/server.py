@@ -1485,11 +1485,39 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 # Snuba configuration
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
+# Number of connections to Snuba each process keeps open.
+SENTRY_SNUBA_MAX_CONNECTIONS = 10
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Seconds for which a worker running a cached Snuba query keeps other workers
+# from running the same query. They wait for its result instead, for at most
+# this long. Disabled when set to 0.
+SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS = 0
+# Seconds for which expired Snuba query cache entries are still served while
+# they are refreshed in the background. Disabled when set to 0.
+SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS = 0
+
+# Number of processed stack frames kept in the in-process LRU cache in front
+# of the shared frame cache. Disabled when set to 0.
+SENTRY_FRAME_CACHE_LOCAL_SIZE = 0
+
+# Size in bytes of the in-process LRU cache of parsed sourcemaps and artifact
+# indexes used when processing JavaScript events. Disabled when set to 0.
+SENTRY_JS_LOCAL_ARTIFACT_CACHE_MAX_BYTES = 0
+SENTRY_JS_LOCAL_ARTIFACT_CACHE_TTL = 60
+
+# Directory in which release archives are stored on local disk, so that
+# entries can be read from memory mapped archives. Disabled when not set.
+SENTRY_RELEASE_ARCHIVE_SPOOL_DIR = None
+# Size in bytes up to which the release archive spool may grow.
+SENTRY_RELEASE_ARCHIVE_SPOOL_MAX_BYTES = 2 * 1024 * 1024 * 1024
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS = {}
+# Size in bytes of the in-process LRU cache in front of nodestore (and the
+# `nodedata` cache). Disabled when set to 0.
+SENTRY_NODESTORE_LOCAL_CACHE_MAX_BYTES = 0
+SENTRY_NODESTORE_LOCAL_CACHE_TTL = 60
 
 # Tag storage backend
 SENTRY_TAGSTORE = os.environ.get("SENTRY_TAGSTORE", "sentry.tagstore.snuba.SnubaTagStorage")
@@ -1534,6 +1562,13 @@ SENTRY_METRICS_SKIP_INTERNAL_PREFIXES = []  # Order this by most frequent prefix
 SENTRY_METRICS_INDEXER = "sentry.sentry_metrics.indexer.postgres.postgres_v2.PostgresIndexer"
 SENTRY_METRICS_INDEXER_OPTIONS = {}
 SENTRY_METRICS_INDEXER_CACHE_TTL = 3600 * 2
+# Maximum number of string/id mappings each indexer process keeps in memory,
+# in front of the shared indexer cache. 0 disables the in-process cache.
+SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE = 0
+# Number of string/id mappings shared by all processes of the parallel indexer
+# on a host, through shared memory. Each entry takes 32 bytes. 0 disables the
+# shared table.
+SENTRY_METRICS_INDEXER_SHARED_TABLE_SIZE = 0
 
 SENTRY_METRICS_INDEXER_SPANNER_OPTIONS = {}
 
@@ -2663,6 +2698,10 @@ SYMBOLICATOR_POLL_TIMEOUT = 5
 # max number of second to wait between subsequent attempts.
 SYMBOLICATOR_MAX_RETRY_AFTER = 2
 
+# The maximum number of concurrent requests to symbolicator when symbolicating
+# events through `SymbolicatorBatch`.
+SYMBOLICATOR_BATCH_CONCURRENCY = 10
+
 SENTRY_REQUEST_METRIC_ALLOWED_PATHS = (
     "sentry.web.api",
     "sentry.web.frontend",
@@ -9,6 +9,7 @@ from typing import (
     Any,
     Callable,
     Dict,
+    FrozenSet,
     Generator,
     Generic,
     Iterable,
@@ -38,6 +39,7 @@ logger = logging.getLogger("sentry")
 _local_cache = threading.local()
 _local_cache_generation = 0
 _local_cache_enabled = False
+_local_cache_excluded_models: FrozenSet[Type[Model]] = frozenset()
 
 
 class ModelManagerTriggerCondition(IntEnum):
@@ -74,20 +76,26 @@ class BaseManager(DjangoBaseManager.from_queryset(BaseQuerySet), Generic[M]):  #
 
     @staticmethod
     @contextmanager
-    def local_cache() -> Generator[None, None, None]:
-        """Enables local caching for the entire process."""
-        global _local_cache_enabled, _local_cache_generation
+    def local_cache(exclude: Iterable[Type[Model]] = ()) -> Generator[None, None, None]:
+        """Enables local caching for the entire process.
+
+        Instances of the models in ``exclude`` are not cached locally, and are
+        still fetched from the shared cache on every lookup.
+        """
+        global _local_cache_enabled, _local_cache_generation, _local_cache_excluded_models
         if _local_cache_enabled:
             raise RuntimeError("nested use of process global local cache")
         _local_cache_enabled = True
+        _local_cache_excluded_models = frozenset(exclude)
         try:
             yield
         finally:
             _local_cache_enabled = False
+            _local_cache_excluded_models = frozenset()
             _local_cache_generation += 1
 
     def _get_local_cache(self) -> Optional[MutableMapping[str, M]]:
-        if not _local_cache_enabled:
+        if not _local_cache_enabled or self.model in _local_cache_excluded_models:
             return None
 
         gen = _local_cache_generation
@@ -2,7 +2,7 @@ import logging
 import time
 from collections import deque
 from concurrent.futures import Future, ThreadPoolExecutor
-from typing import Any, Deque, Mapping, Optional, Tuple
+from typing import Any, Deque, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from arroyo.backends.kafka.consumer import KafkaPayload
 from arroyo.processing.strategies import ProcessingStrategy, ProcessingStrategyFactory
@@ -15,6 +15,7 @@ from sentry.eventstream.kafka.postprocessworker import _record_metrics, _sampled
 from sentry.eventstream.kafka.postprocessworker import (
     dispatch_post_process_group_task as _dispatch_post_process_group_task,
 )
+from sentry.eventstream.kafka.postprocessworker import dispatch_post_process_group_tasks_by_group
 from sentry.eventstream.kafka.protocol import (
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
@@ -79,6 +80,21 @@ def _get_task_kwargs_and_dispatch(message: Message[KafkaPayload]) -> None:
     dispatch_post_process_group_task(**task_kwargs)
 
 
+def _get_task_kwargs_and_dispatch_by_group(messages: Sequence[Message[KafkaPayload]]) -> None:
+    task_kwargs_list = []
+    for message in messages:
+        task_kwargs = _get_task_kwargs(message)
+        if not task_kwargs:
+            continue
+
+        for partition in message.committable:
+            _record_metrics(partition.index, task_kwargs)
+        task_kwargs_list.append(task_kwargs)
+
+    if task_kwargs_list:
+        dispatch_post_process_group_tasks_by_group(task_kwargs_list)
+
+
 class DispatchTask(ProcessingStrategy[KafkaPayload]):
     def __init__(
         self,
@@ -87,31 +103,76 @@ class DispatchTask(ProcessingStrategy[KafkaPayload]):
         commit: Commit,
     ) -> None:
         self.__executor = ThreadPoolExecutor(max_workers=concurrency)
-        self.__futures: Deque[Tuple[Message[KafkaPayload], Future[None]]] = deque()
+        self.__futures: Deque[Tuple[Mapping[Partition, int], Future[None]]] = deque()
         self.__max_pending_futures = max_pending_futures
         self.__commit = commit
         self.__closed = False
 
+        # Messages held back to dispatch events of the same group together,
+        # see `post-process-forwarder:group-batch-window-ms`.
+        self.__batch: List[Message[KafkaPayload]] = []
+        self.__batch_deadline: Optional[float] = None
+
     def submit(self, message: Message[KafkaPayload]) -> None:
         assert not self.__closed
         # The list of pending futures is too long, tell the stream processor to slow down
         if len(self.__futures) > self.__max_pending_futures:
             raise MessageRejected
 
+        batch_window_ms = options.get("post-process-forwarder:group-batch-window-ms")
+        if not batch_window_ms:
+            self.__flush_batch()
+            self.__futures.append(
+                (
+                    message.committable,
+                    self.__executor.submit(_get_task_kwargs_and_dispatch, message),
+                )
+            )
+            return
+
+        if not self.__batch:
+            self.__batch_deadline = time.time() + batch_window_ms / 1000.0
+        self.__batch.append(message)
+
+        if len(self.__batch) >= self.__max_pending_futures:
+            self.__flush_batch()
+
+    def __flush_batch(self) -> None:
+        if not self.__batch:
+            return
+
+        messages = self.__batch
+        self.__batch = []
+        self.__batch_deadline = None
+
+        committable: MutableMapping[Partition, int] = {}
+        for message in messages:
+            committable.update(message.committable)
+
+        metrics.timing("eventstream.post_process_batch.size", len(messages))
         self.__futures.append(
-            (message, self.__executor.submit(_get_task_kwargs_and_dispatch, message))
+            (
+                committable,
+                self.__executor.submit(_get_task_kwargs_and_dispatch_by_group, messages),
+            )
         )
 
     def poll(self) -> None:
+        if self.__batch_deadline is not None and time.time() >= self.__batch_deadline:
+            self.__flush_batch()
+
         # Remove completed futures in order
         while self.__futures and self.__futures[0][1].done():
-            message, _ = self.__futures.popleft()
+            committable, _ = self.__futures.popleft()
 
-            self.__commit(message.committable)
+            self.__commit(committable)
 
     def join(self, timeout: Optional[float] = None) -> None:
         start = time.time()
 
+        # Dispatch messages still waiting for their batch window to end
+        self.__flush_batch()
+
         # Commit all pending offsets
         self.__commit({}, force=True)
 
@@ -121,11 +182,11 @@ class DispatchTask(ProcessingStrategy[KafkaPayload]):
                 logger.warning(f"Timed out with {len(self.__futures)} futures in queue")
                 break
 
-            message, future = self.__futures.popleft()
+            committable, future = self.__futures.popleft()
 
             future.result(remaining)
 
-            self.__commit(message.committable, force=True)
+            self.__commit(committable, force=True)
 
         self.__executor.shutdown()
 
@@ -8,7 +8,7 @@ from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from enum import Enum
 from threading import Lock
-from typing import Any, Generator, Mapping, MutableMapping, Optional, Sequence, Tuple
+from typing import Any, Generator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
 from sentry import options
 from sentry.eventstream.base import GroupStates
@@ -16,7 +16,11 @@ from sentry.eventstream.kafka.protocol import (
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
 )
-from sentry.tasks.post_process import post_process_group
+from sentry.tasks.post_process import (
+    get_post_process_group_batch_time_limits,
+    post_process_group,
+    post_process_group_batch,
+)
 from sentry.utils import metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -91,6 +95,29 @@ def _record_metrics(partition: int, task_kwargs: Mapping[str, Any]) -> None:
             )
 
 
+def _get_post_process_group_kwargs(
+    event_id: str,
+    project_id: int,
+    group_id: Optional[int],
+    is_new: bool,
+    is_regression: Optional[bool],
+    is_new_group_environment: bool,
+    primary_hash: Optional[str],
+    group_states: Optional[GroupStates] = None,
+    **kwargs: Any,
+) -> Mapping[str, Any]:
+    cache_key = cache_key_for_event({"project": project_id, "event_id": event_id})
+    return {
+        "is_new": is_new,
+        "is_regression": is_regression,
+        "is_new_group_environment": is_new_group_environment,
+        "primary_hash": primary_hash,
+        "cache_key": cache_key,
+        "group_id": group_id,
+        "group_states": group_states,
+    }
+
+
 def dispatch_post_process_group_task(
     event_id: str,
     project_id: int,
@@ -106,22 +133,57 @@ def dispatch_post_process_group_task(
     if skip_consume:
         logger.info("post_process.skip.raw_event", extra={"event_id": event_id})
     else:
-        cache_key = cache_key_for_event({"project": project_id, "event_id": event_id})
-
         post_process_group.apply_async(
-            kwargs={
-                "is_new": is_new,
-                "is_regression": is_regression,
-                "is_new_group_environment": is_new_group_environment,
-                "primary_hash": primary_hash,
-                "cache_key": cache_key,
-                "group_id": group_id,
-                "group_states": group_states,
-            },
+            kwargs=_get_post_process_group_kwargs(
+                event_id,
+                project_id,
+                group_id,
+                is_new,
+                is_regression,
+                is_new_group_environment,
+                primary_hash,
+                group_states,
+            ),
             queue=queue,
         )
 
 
+def dispatch_post_process_group_tasks_by_group(
+    task_kwargs_list: Sequence[Mapping[str, Any]]
+) -> None:
+    """
+    Dispatches post processing for many events, with a single
+    ``post_process_group_batch`` task for all events of the same project and
+    group (up to ``post-process-forwarder:group-batch-max-size`` events per
+    task). Events are processed in the order they were received.
+    """
+    max_batch_size = max(options.get("post-process-forwarder:group-batch-max-size"), 1)
+
+    batches: MutableMapping[Tuple[int, Optional[int], str], List[Mapping[str, Any]]] = {}
+    for task_kwargs in task_kwargs_list:
+        if task_kwargs.get("skip_consume"):
+            dispatch_post_process_group_task(**task_kwargs)
+            continue
+        key = (task_kwargs["project_id"], task_kwargs["group_id"], task_kwargs["queue"])
+        batches.setdefault(key, []).append(task_kwargs)
+
+    for (_, _, queue), batch in batches.items():
+        for i in range(0, len(batch), max_batch_size):
+            chunk = batch[i : i + max_batch_size]
+            if len(chunk) == 1:
+                dispatch_post_process_group_task(**chunk[0])
+                continue
+
+            metrics.incr("eventstream.post_process_batch.dispatched", sample_rate=1)
+            time_limit, soft_time_limit = get_post_process_group_batch_time_limits(len(chunk))
+            post_process_group_batch.apply_async(
+                kwargs={"jobs": [_get_post_process_group_kwargs(**kwargs) for kwargs in chunk]},
+                queue=queue,
+                time_limit=time_limit,
+                soft_time_limit=soft_time_limit,
+            )
+
+
 def _get_task_kwargs_and_dispatch(message: Message) -> None:
     task_kwargs = _get_task_kwargs(message)
     if not task_kwargs:
@@ -131,6 +193,13 @@ def _get_task_kwargs_and_dispatch(message: Message) -> None:
     dispatch_post_process_group_task(**task_kwargs)
 
 
+def _get_task_kwargs_and_record_metrics(message: Message) -> Optional[Mapping[str, Any]]:
+    task_kwargs = _get_task_kwargs(message)
+    if task_kwargs:
+        _record_metrics(message.partition(), task_kwargs)
+    return task_kwargs
+
+
 class PostProcessForwarderWorker(AbstractBatchWorker):  # type: ignore
     """
     Implementation of the AbstractBatchWorker which would be used for post process forwarder.
@@ -144,15 +213,22 @@ class PostProcessForwarderWorker(AbstractBatchWorker):  # type: ignore
         logger.info(f"Starting post process forwarder with {concurrency} threads")
         self.__executor = ThreadPoolExecutor(max_workers=concurrency)
 
-    def process_message(self, message: Message) -> Optional[Future[None]]:
+    def process_message(self, message: Message) -> Optional[Future[Any]]:
         """
         Process the message received by the consumer and return the Future associated with the message. The future
         is stored in the batch of batching_kafka_consumer and provided as an argument to flush_batch. If None is
         returned, the batching_kafka_consumer will not add the return value to the batch.
+
+        If batching by group is enabled through `post-process-forwarder:group-batch-window-ms`, the future
+        resolves to the task kwargs of the message, which are dispatched by group in flush_batch. This
+        worker only uses the option to turn batching on: the batches are the batches of the consumer,
+        which are bounded by its own max batch size and time, not by the configured window.
         """
+        if options.get("post-process-forwarder:group-batch-window-ms"):
+            return self.__executor.submit(_get_task_kwargs_and_record_metrics, message)
         return self.__executor.submit(_get_task_kwargs_and_dispatch, message)
 
-    def flush_batch(self, batch: Optional[Sequence[Future[None]]]) -> None:
+    def flush_batch(self, batch: Optional[Sequence[Future[Any]]]) -> None:
         """
         For all work which was submitted to the thread pool executor, we need to ensure that if an exception was
         raised, then we raise it in the main thread. This is needed so that processing can be stopped in such
@@ -164,5 +240,10 @@ class PostProcessForwarderWorker(AbstractBatchWorker):  # type: ignore
                 if exc is not None:
                     raise exc
 
+            task_kwargs_list = [future.result() for future in batch]
+            task_kwargs_list = [task_kwargs for task_kwargs in task_kwargs_list if task_kwargs]
+            if task_kwargs_list:
+                dispatch_post_process_group_tasks_by_group(task_kwargs_list)
+
     def shutdown(self) -> None:
         self.__executor.shutdown()
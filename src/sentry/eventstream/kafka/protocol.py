@@ -141,8 +141,8 @@ def decode_optional_int(value: Optional[bytes]) -> Optional[int]:
     return decode_int(value)
 
 
-def decode_bool(value: bytes) -> bool:
-    return bool(int(decode_str(value)))
+def decode_bool(value: Optional[bytes]) -> bool:
+    return bool(decode_int(value))
 
 
 def decode_optional_list_str(value: Optional[str]) -> Optional[Sequence[Any]]:
@@ -153,7 +153,20 @@ def decode_optional_list_str(value: Optional[str]) -> Optional[Sequence[Any]]:
     if not isinstance(parsed, list):
         raise ValueError(f"'{value}' could not be parsed into an instance of list.")
 
-    return cast(Sequence[Any], json.loads(value))
+    return cast(Sequence[Any], parsed)
+
+
+def _decode_group_states(value: Optional[bytes]) -> Optional[Sequence[Any]]:
+    group_states_str = decode_optional_str(value)
+    try:
+        return decode_optional_list_str(group_states_str)
+    except ValueError:
+        logger.error(f"Received event with malformed group_states: '{group_states_str}'")
+    except Exception:
+        logger.error(
+            f"Uncaught exception thrown when trying to parse group_states: '{group_states_str}'"
+        )
+    return None
 
 
 def get_task_kwargs_for_message_from_headers(
@@ -161,67 +174,42 @@ def get_task_kwargs_for_message_from_headers(
 ) -> Optional[Mapping[str, Any]]:
     """
     Same as get_task_kwargs_for_message but gets the required information from
-    the kafka message headers.
+    the kafka message headers, so the message body never has to be decoded.
+
+    ``KafkaEventStream._get_headers_for_insert`` writes every field required
+    to dispatch the post-processing task to the headers. Numeric and boolean
+    values are parsed straight from the header bytes, and ``group_states``,
+    the only JSON encoded header, is only parsed when a task is dispatched.
     """
     try:
-        header_data = {k: v for k, v in headers}
+        header_data = dict(headers)
         version = decode_int(header_data["version"])
         operation = decode_str(header_data["operation"])
 
-        if operation == "insert":
-            if "group_id" not in header_data:
-                header_data["group_id"] = None
-            if "primary_hash" not in header_data:
-                header_data["primary_hash"] = None
+        event_data: Mapping[str, Any] = {}
+        task_state: MutableMapping[str, Any] = {}
 
-            primary_hash = decode_optional_str(header_data["primary_hash"])
-            event_id = decode_str(header_data["event_id"])
-            group_id = decode_optional_int(header_data["group_id"])
-            project_id = decode_int(header_data["project_id"])
+        if operation == "insert":
+            task_state["skip_consume"] = decode_bool(header_data["skip_consume"])
 
+        if operation == "insert" and not task_state["skip_consume"]:
             event_data = {
-                "event_id": event_id,
-                "group_id": group_id,
-                "project_id": project_id,
-                "primary_hash": primary_hash,
+                "event_id": decode_str(header_data["event_id"]),
+                "group_id": decode_optional_int(header_data.get("group_id")),
+                "project_id": decode_int(header_data["project_id"]),
+                "primary_hash": decode_optional_str(header_data.get("primary_hash")),
             }
 
-            skip_consume = decode_bool(cast(bytes, header_data["skip_consume"]))
-            is_new = decode_bool(cast(bytes, header_data["is_new"]))
-            is_regression = decode_bool(cast(bytes, header_data["is_regression"]))
-            is_new_group_environment = decode_bool(
-                cast(bytes, header_data["is_new_group_environment"])
+            task_state["is_new"] = decode_bool(header_data["is_new"])
+            task_state["is_regression"] = decode_bool(header_data["is_regression"])
+            task_state["is_new_group_environment"] = decode_bool(
+                header_data["is_new_group_environment"]
             )
-
-            task_state: MutableMapping[str, Any] = {
-                "skip_consume": skip_consume,
-                "is_new": is_new,
-                "is_regression": is_regression,
-                "is_new_group_environment": is_new_group_environment,
-            }
-
-            group_states_str = decode_optional_str(header_data.get("group_states"))
-            group_states = None
-            try:
-                group_states = decode_optional_list_str(group_states_str)
-            except ValueError:
-                logger.error(f"Received event with malformed group_states: '{group_states_str}'")
-            except Exception:
-                logger.error(
-                    f"Uncaught exception thrown when trying to parse group_states: '{group_states_str}'"
-                )
-            task_state["group_states"] = group_states
+            task_state["group_states"] = _decode_group_states(header_data.get("group_states"))
 
             # default in case queue is not sent
-            task_state["queue"] = (
-                decode_str(header_data["queue"])
-                if "queue" in header_data
-                else "post_process_errors"
-            )
-
-        else:
-            event_data = {}
-            task_state = {}
+            queue = header_data.get("queue")
+            task_state["queue"] = decode_str(queue) if queue is not None else "post_process_errors"
 
     except Exception:
         raise InvalidPayload("Received event payload with unexpected structure")
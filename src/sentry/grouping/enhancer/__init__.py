@@ -8,9 +8,11 @@ from parsimonious.grammar import Grammar, NodeVisitor
 
 from sentry import projectoptions
 from sentry.grouping.component import GroupingComponent
+from sentry.utils.hashlib import md5_text
 from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
+from .compiled import get_compiled_rules
 from .exceptions import InvalidEnhancerConfig
 from .matchers import (
     CalleeMatch,
@@ -103,7 +105,7 @@ class Enhancements:
     # from cache.
     # See ``_get_project_enhancements_config`` in src/sentry/grouping/api.py.
 
-    def __init__(self, rules, version=None, bases=None, id=None):
+    def __init__(self, rules, version=None, bases=None, id=None, config_hash=None):
         self.id = id
         self.rules = rules
         if version is None:
@@ -115,6 +117,20 @@ class Enhancements:
 
         self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
         self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
+        self._config_hash = config_hash
+
+    @property
+    def config_hash(self):
+        """A hash of the serialized config, identifying its rules (including
+        those of its bases) within this process.
+        """
+        if self._config_hash is None:
+            self._config_hash = md5_text(self.dumps()).hexdigest()
+        return self._config_hash
+
+    def _get_compiled_rules(self, kind):
+        rules = self._modifier_rules if kind == "modifier" else self._updater_rules
+        return get_compiled_rules(self.config_hash, kind, rules)
 
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
@@ -125,11 +141,10 @@ class Enhancements:
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
-        for rule in self._modifier_rules:
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+        for rule, idx, action in self._get_compiled_rules("modifier").iter_matching_frame_actions(
+            match_frames, platform, exception_data, cache
+        ):
+            action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
 
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
 
@@ -139,13 +154,11 @@ class Enhancements:
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
-
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.update_frame_components_contributions(components, frames, idx, rule=rule)
-                action.modify_stacktrace_state(stacktrace_state, rule)
+        for rule, idx, action in self._get_compiled_rules("updater").iter_matching_frame_actions(
+            match_frames, platform, exception_data, cache
+        ):
+            action.update_frame_components_contributions(components, frames, idx, rule=rule)
+            action.modify_stacktrace_state(stacktrace_state, rule)
 
         # Use the stack state to update frame contributions again to trim
         # down to max-frames.  min-frames is handled on the other hand for
@@ -237,7 +250,7 @@ class Enhancements:
         yield from self.rules
 
     @classmethod
-    def _from_config_structure(cls, data):
+    def _from_config_structure(cls, data, config_hash=None):
         version, bases, rules = data
         if version not in VERSIONS:
             raise ValueError("Unknown version")
@@ -245,6 +258,7 @@ class Enhancements:
             rules=[Rule._from_config_structure(x, version=version) for x in rules],
             version=version,
             bases=bases,
+            config_hash=config_hash,
         )
 
     @classmethod
@@ -254,7 +268,8 @@ class Enhancements:
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
             return cls._from_config_structure(
-                msgpack.loads(zlib.decompress(base64.urlsafe_b64decode(padded)), raw=False)
+                msgpack.loads(zlib.decompress(base64.urlsafe_b64decode(padded)), raw=False),
+                config_hash=md5_text(data).hexdigest(),
             )
         except (LookupError, AttributeError, TypeError, ValueError) as e:
             raise ValueError("invalid stack trace rule config: %s" % e)
@@ -312,9 +327,14 @@ class Rule:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, indices=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        If ``indices`` is given, only the frames at these (ascending) indices
+        are tested against the rule.
         """
         if not self.matchers:
             return []
@@ -326,8 +346,11 @@ class Rule:
 
         rv = []
 
+        if indices is None:
+            indices = range(len(frames))
+
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
+        for idx in indices:
             if all(
                 m.matches_frame(frames, idx, platform, exception_data, cache)
                 for m in self._other_matchers
@@ -0,0 +1,143 @@
+from collections import defaultdict
+
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
+
+from .matchers import FunctionMatch, ModuleMatch, PackageMatch
+
+# Matchers that can be used to pre-select rules, and the match frame field
+# they are applied to.
+INDEXED_MATCHERS = {
+    FunctionMatch: "function",
+    ModuleMatch: "module",
+    PackageMatch: "package",
+}
+
+# Characters with a special meaning in glob patterns. A pattern's literal
+# prefix ends at the first of them.
+GLOB_SPECIAL_CHARS = frozenset(b"*?[{\\")
+
+COMPILED_RULES_CACHE_SIZE = 500
+
+_compiled_rules_cache = LRUCache(COMPILED_RULES_CACHE_SIZE)
+
+
+def get_literal_prefix(pattern):
+    """Returns the part of a glob pattern that every matching value starts
+    with, as bytes.
+    """
+    for idx, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:idx]
+    return pattern
+
+
+def _normalize_path(value):
+    # `path_like_match` normalizes backslashes and also matches values with
+    # a leading slash added, so leading slashes cannot be part of a prefix.
+    return value.replace(b"\\", b"/").lstrip(b"/")
+
+
+def _get_index_key(matcher):
+    field = INDEXED_MATCHERS.get(type(matcher))
+    if field is None or matcher.negated:
+        return None
+
+    prefix = get_literal_prefix(matcher._encoded_pattern)
+    if field == "package":
+        prefix = _normalize_path(prefix)
+
+    if not prefix:
+        return None
+
+    return field, prefix
+
+
+class CompiledRules:
+    """A list of enhancement rules, indexed by the literal prefixes of their
+    function, module and package matchers.
+
+    For every rule with at least one such (non-negated) matcher, only the
+    frames whose field starts with the prefix of the rule's most selective
+    matcher are tested against the rule. All other rules are tested against
+    every frame. Rules are still applied in order.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._unindexed_rules = set()
+        # field -> prefix -> positions of rules in ``self.rules``
+        self._index = defaultdict(lambda: defaultdict(list))
+
+        for pos, rule in enumerate(rules):
+            index_keys = [_get_index_key(matcher) for matcher in rule._other_matchers]
+            index_keys = [key for key in index_keys if key is not None]
+            if not index_keys:
+                self._unindexed_rules.add(pos)
+                continue
+
+            field, prefix = max(index_keys, key=lambda key: len(key[1]))
+            self._index[field][prefix].append(pos)
+
+        # field -> (ascending prefix lengths, prefix -> rule positions)
+        self._prefixes_by_field = {
+            field: (sorted({len(prefix) for prefix in prefixes}), dict(prefixes))
+            for field, prefixes in self._index.items()
+        }
+
+    def _get_candidate_rules(self, match_frame):
+        rv = set()
+        for field, (lengths, prefixes) in self._prefixes_by_field.items():
+            value = match_frame[field]
+            if value is None:
+                continue
+            if field == "package":
+                value = _normalize_path(value)
+
+            for length in lengths:
+                if length > len(value):
+                    break
+                rule_positions = prefixes.get(value[:length])
+                if rule_positions:
+                    rv.update(rule_positions)
+
+        return rv
+
+    def iter_matching_frame_actions(self, match_frames, platform, exception_data, cache):
+        """Yields ``(rule, idx, action)`` for all actions of matching rules,
+        in the same order as applying every rule to every frame would.
+        """
+        frames_by_rule = defaultdict(list)
+        for idx, match_frame in enumerate(match_frames):
+            for pos in self._get_candidate_rules(match_frame):
+                frames_by_rule[pos].append(idx)
+
+        all_frames = range(len(match_frames))
+        for pos, rule in enumerate(self.rules):
+            if pos in self._unindexed_rules:
+                indices = all_frames
+            else:
+                indices = frames_by_rule.get(pos)
+                if not indices:
+                    continue
+
+            for idx, action in rule.get_matching_frame_actions(
+                match_frames, platform, exception_data, cache, indices=indices
+            ):
+                yield rule, idx, action
+
+
+def get_compiled_rules(config_hash, kind, rules):
+    """Returns the ``CompiledRules`` for the ``kind`` rules of the
+    enhancements config with the given hash, compiling them on a cache miss.
+    """
+    key = (config_hash, kind)
+    rv = _compiled_rules_cache.get(key)
+    if rv is not None:
+        return rv
+
+    metrics.incr("grouping.enhancer.compiled_rules.miss", tags={"kind": kind})
+    rv = CompiledRules(rules)
+
+    _compiled_rules_cache.set(key, rv)
+    return rv
@@ -32,6 +32,7 @@ from sentry.killswitches import killswitch_matches_context
 from sentry.models import Project
 from sentry.signals import event_accepted
 from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.tasks.symbolication import batch_symbolicate_submissions
 from sentry.utils import json, metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -72,7 +73,7 @@ class IngestConsumerWorker(AbstractBatchWorker):
 
     def flush_batch(self, batch):
         mark_scope_as_unsafe()
-        with metrics.timer("ingest_consumer.flush_batch"):
+        with metrics.timer("ingest_consumer.flush_batch"), batch_symbolicate_submissions():
             return self._flush_batch(batch)
 
     def _flush_batch(self, batch: Sequence[Message]):
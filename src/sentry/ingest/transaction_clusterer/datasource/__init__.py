@@ -1 +1,2 @@
 TRANSACTION_SOURCE_URL = "url"
+TRANSACTION_SOURCE_SANITIZED = "sanitized"
@@ -1,11 +1,15 @@
 """ Write transactions into redis sets """
+import random
 from typing import Any, Iterator, Mapping
 
 import sentry_sdk
 from django.conf import settings
 
-from sentry import features
-from sentry.ingest.transaction_clusterer.datasource import TRANSACTION_SOURCE_URL
+from sentry import features, options
+from sentry.ingest.transaction_clusterer.datasource import (
+    TRANSACTION_SOURCE_SANITIZED,
+    TRANSACTION_SOURCE_URL,
+)
 from sentry.models import Project
 from sentry.utils import redis
 from sentry.utils.safe import safe_execute
@@ -55,6 +59,18 @@ def _store_transaction_name(project: Project, transaction_name: str) -> None:
         add_to_set(client, [redis_key], [transaction_name, MAX_SET_SIZE, SET_TTL])
 
 
+def _bump_rule_lifetime(project: Project, transaction_name: str) -> None:
+    # The applied rule is not part of the event payload, but a sanitized
+    # transaction name still matches the rule that was applied to it.
+    from sentry.ingest.transaction_clusterer.matcher import get_rule_matcher
+    from sentry.ingest.transaction_clusterer.rules import bump_last_seen
+
+    with sentry_sdk.start_span(op="txcluster.bump_rule_lifetime"):
+        rule = get_rule_matcher(project).find(transaction_name)
+        if rule is not None:
+            bump_last_seen(project, rule)
+
+
 def get_transaction_names(project: Project) -> Iterator[str]:
     """Return all transaction names stored for the given project"""
     client = get_redis_client()
@@ -75,8 +91,7 @@ def record_transaction_name(project: Project, event_data: Mapping[str, Any], **k
             safe_execute(
                 _store_transaction_name, project, transaction_name, _with_transaction=False
             )
-        # TODO: For every transaction that had a rule applied to it, we should
-        # bump the rule's lifetime here such that it stays alive while it is
-        # being used.
-        # For that purpose, we need to add the applied rule to the transaction
-        # payload so we can check it here.
+        elif source == TRANSACTION_SOURCE_SANITIZED and random.random() < options.get(
+            "txnames.bump-lifetime-sample-rate"
+        ):
+            safe_execute(_bump_rule_lifetime, project, transaction_name, _with_transaction=False)
@@ -0,0 +1,171 @@
+""" Find the replacement rule that applies to a transaction name.
+
+Rules are tried in order, and the first matching rule is applied. Within a
+rule, ``*`` matches a single segment of the transaction name, and a trailing
+``/**`` matches any (possibly empty) remainder of the name. For example,
+``/users/*/**`` matches both ``/users/foo`` and ``/users/foo/posts/bar``.
+
+Instead of testing every rule against a transaction name, ``RuleMatcher``
+compiles the rules into a trie of segments with wildcard edges, which is walked
+once per transaction name.
+"""
+
+import re
+from typing import Dict, List, Optional, Pattern, Sequence, Set, Tuple
+
+from sentry.models import Project
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
+
+from .base import ReplacementRule
+from .rules import get_rules_version, get_sorted_rules
+
+__all__ = ["RuleMatcher", "get_rule_matcher", "match_rule"]
+
+#: Separator of the segments of transaction names and rules
+SEP = "/"
+
+#: Maximum number of compiled matchers kept per process
+RULE_MATCHER_CACHE_SIZE = 1000
+
+#: Map from project id to the version of the rules of the project and their
+#: matcher
+_rule_matcher_cache: "LRUCache[int, Tuple[Optional[str], RuleMatcher]]" = LRUCache(
+    RULE_MATCHER_CACHE_SIZE
+)
+
+
+def _compile_rule(rule: ReplacementRule) -> Pattern[str]:
+    pattern = rule
+    suffix = ""
+    if pattern.endswith(SEP + "**"):
+        pattern = pattern[:-3]
+        suffix = "(?:/.*)?"
+
+    regex = "".join(
+        "[^/]*" if part == "*" else ".*" if part == "**" else re.escape(part)
+        for part in re.split(r"(\*\*|\*)", pattern)
+    )
+    return re.compile(f"{regex}{suffix}", re.DOTALL)
+
+
+def match_rule(rule: ReplacementRule, transaction_name: str) -> bool:
+    """Tests a single rule against a transaction name."""
+    return _compile_rule(rule).fullmatch(transaction_name) is not None
+
+
+class _Node:
+    __slots__ = ("children", "wildcard", "rest", "end")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        #: Child for ``*`` segments
+        self.wildcard: Optional[_Node] = None
+        #: Position of the first rule ending in ``/**`` at this node
+        self.rest: Optional[int] = None
+        #: Position of the first rule ending at this node
+        self.end: Optional[int] = None
+
+
+def _min_position(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+class RuleMatcher:
+    """A compiled list of replacement rules.
+
+    Rules consisting of literal segments, ``*`` segments and a trailing
+    ``/**`` are stored in a trie. At every node, the first rule (by position)
+    ending there is recorded, so walking the trie along the segments of a
+    transaction name finds the first matching rule. All other rules are
+    tested one by one.
+    """
+
+    def __init__(self, rules: Sequence[ReplacementRule]) -> None:
+        self.rules = rules
+        self._root = _Node()
+        self._unindexed: List[Tuple[int, Pattern[str]]] = []
+
+        for position, rule in enumerate(rules):
+            if not self._index_rule(rule, position):
+                self._unindexed.append((position, _compile_rule(rule)))
+
+    def _index_rule(self, rule: ReplacementRule, position: int) -> bool:
+        segments = rule.split(SEP)
+        rest = segments[-1] == "**" and len(segments) > 1
+        if rest:
+            segments.pop()
+
+        if any("*" in segment and segment != "*" for segment in segments):
+            return False
+
+        node = self._root
+        for segment in segments:
+            if segment == "*":
+                if node.wildcard is None:
+                    node.wildcard = _Node()
+                node = node.wildcard
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        if rest:
+            node.rest = _min_position(node.rest, position)
+        else:
+            node.end = _min_position(node.end, position)
+        return True
+
+    def _find_position(self, transaction_name: str) -> Optional[int]:
+        position = None
+        nodes: Set[_Node] = {self._root}
+        for segment in transaction_name.split(SEP):
+            next_nodes = set()
+            for node in nodes:
+                position = _min_position(position, node.rest)
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.add(child)
+                if node.wildcard is not None:
+                    next_nodes.add(node.wildcard)
+
+            nodes = next_nodes
+            if not nodes:
+                break
+
+        for node in nodes:
+            position = _min_position(position, node.rest)
+            position = _min_position(position, node.end)
+
+        for unindexed_position, pattern in self._unindexed:
+            if position is not None and unindexed_position > position:
+                break
+            if pattern.fullmatch(transaction_name):
+                return unindexed_position
+
+        return position
+
+    def find(self, transaction_name: str) -> Optional[ReplacementRule]:
+        """Returns the first rule matching the transaction name, if any."""
+        position = self._find_position(transaction_name)
+        return None if position is None else self.rules[position]
+
+
+def get_rule_matcher(project: Project) -> RuleMatcher:
+    """Returns the ``RuleMatcher`` for the current rules of a project.
+
+    Matchers are cached per process by the version of the rules, and compiled
+    again once the rules of the project change.
+    """
+    version = get_rules_version(project)
+    cached = _rule_matcher_cache.get(project.id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    metrics.incr("txcluster.rule_matcher.cache_miss")
+    matcher = RuleMatcher([rule for rule, _ in get_sorted_rules(project)])
+
+    _rule_matcher_cache.set(project.id, (version, matcher))
+    return matcher
@@ -1,8 +1,9 @@
 from datetime import datetime, timezone
-from typing import Dict, List, Mapping, Protocol, Sequence, Tuple
+from typing import Dict, List, Mapping, Optional, Protocol, Sequence, Tuple
 
 from sentry.ingest.transaction_clusterer.datasource.redis import get_redis_client
 from sentry.models import Project
+from sentry.utils.hashlib import hash_values
 
 from .base import ReplacementRule
 
@@ -49,13 +50,22 @@ class RedisRuleStore:
             p.delete(key)
             p.hmset(key, rules)
 
+    def touch(self, project: Project, rule: ReplacementRule, last_seen: int) -> None:
+        """Sets the last_seen timestamp of a single rule."""
+        client = get_redis_client()
+        client.hset(self._get_rules_key(project), rule, last_seen)
+
 
 class ProjectOptionRuleStore:
     _option_name = "sentry:transaction_name_cluster_rules"
+    _version_option_name = "sentry:transaction_name_cluster_rules_version"
 
     def read_sorted(self, project: Project) -> List[Tuple[ReplacementRule, int]]:
         return project.get_option(self._option_name, default=[])  # type: ignore
 
+    def read_version(self, project: Project) -> Optional[str]:
+        return project.get_option(self._version_option_name)  # type: ignore
+
     def read(self, project: Project) -> RuleSet:
         return {rule: last_seen for rule, last_seen in self.read_sorted(project)}
 
@@ -66,6 +76,11 @@ class ProjectOptionRuleStore:
     def write(self, project: Project, rules: RuleSet) -> None:
         sorted_rules = self._sort(rules)
         project.update_option(self._option_name, sorted_rules)
+        # The version is written after the rules, so that readers never see
+        # a new version along with the old rules.
+        project.update_option(
+            self._version_option_name, hash_values([rule for rule, _ in sorted_rules])
+        )
 
 
 class CompositeRuleStore:
@@ -123,6 +138,20 @@ def get_sorted_rules(project: Project) -> List[Tuple[ReplacementRule, int]]:
     return ProjectOptionRuleStore().read_sorted(project)
 
 
+def get_rules_version(project: Project) -> Optional[str]:
+    """Returns a version of the rules of a project, which changes along with
+    the rules or their order.
+
+    ``None`` for projects whose rules were last written without a version.
+    """
+    return ProjectOptionRuleStore().read_version(project)
+
+
+def bump_last_seen(project: Project, rule: ReplacementRule) -> None:
+    """Extends the lifetime of a rule which was applied to a transaction."""
+    RedisRuleStore().touch(project, rule, _now())
+
+
 def update_rules(project: Project, new_rules: Sequence[ReplacementRule]) -> None:
     if not new_rules:
         return
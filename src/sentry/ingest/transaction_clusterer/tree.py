@@ -43,11 +43,18 @@ Resulting in the following replacement rules:
 
 The replacement rules are interpreted by Relay to match and replace `*`, and to match but ignore `**`.
 
+Nodes are merged as soon as they reach the threshold while transaction names
+are added, rather than after the whole tree has been built. Once merged, a node
+only keeps a single child, so the tree stays small even for projects with a
+huge number of distinct transaction names, and names can be streamed into the
+clusterer in batches. Since a node's set of children only ever grows, the
+resulting tree is the same as when merging the complete tree.
+
 """
 
 import logging
-from collections import UserDict, defaultdict
-from typing import Iterable, List, Optional, Union
+import sys
+from typing import Dict, Iterable, List, Optional, Union
 
 import sentry_sdk
 from typing_extensions import TypeAlias
@@ -79,11 +86,15 @@ class TreeClusterer(Clusterer):
         self._rules: Optional[List[ReplacementRule]] = None
 
     def add_input(self, transaction_names: Iterable[str]) -> None:
-        for tx_name in transaction_names:
-            parts = tx_name.split(SEP)
-            node = self._tree
-            for part in parts:
-                node = node.setdefault(part, Node())
+        """Adds transaction names to the tree.
+
+        Can be called repeatedly to stream names into the clusterer in batches.
+        """
+        with sentry_sdk.start_span(op="txcluster_merge"):
+            for tx_name in transaction_names:
+                node = self._tree
+                for part in tx_name.split(SEP):
+                    node = node.add_child(sys.intern(part), self._merge_threshold)
 
     def get_rules(self) -> List[ReplacementRule]:
         """Computes the rules for the current tree."""
@@ -95,10 +106,7 @@ class TreeClusterer(Clusterer):
         return self._rules
 
     def _extract_rules(self) -> None:
-        """Merge high-cardinality nodes in the graph and extract rules"""
-        with sentry_sdk.start_span(op="txcluster_merge"):
-            self._tree.merge(self._merge_threshold)
-
+        """Extract rules from the merged nodes in the graph"""
         # Generate exactly 1 rule for every merge
         rule_paths = [path for path in self._tree.paths() if path[-1] is MERGED]
         self._rules = [self._build_rule(path) for path in rule_paths]
@@ -123,39 +131,80 @@ class TreeClusterer(Clusterer):
 
 
 #: Represents the edges between graph nodes. These edges serve as keys in the
-#: node dictionary.
+#: node's children.
 Edge: TypeAlias = Union[str, Merged]
 
 
-class Node(UserDict):  # type: ignore
-    """Keys in this dict are names of the children"""
+class Node:
+    """A node of the tree.
+
+    ``children`` maps the names of the children to their nodes, and is ``None``
+    for leaves. Merged nodes have a single child, keyed by ``MERGED``.
+    """
+
+    __slots__ = ("children",)
+
+    def __init__(self) -> None:
+        self.children: Optional[Dict[Edge, Node]] = None
 
     def paths(self, ancestors: Optional[List[Edge]] = None) -> Iterable[List[Edge]]:
         """Collect all paths and subpaths through the graph"""
         if ancestors is None:
             ancestors = []
-        for name, child in self.items():
+        for name, child in (self.children or {}).items():
             path = ancestors + [name]
             yield path
             yield from child.paths(ancestors=path)
 
-    def merge(self, merge_threshold: int) -> None:
-        """Recursively merge children of high-cardinality nodes"""
-        if len(self) >= merge_threshold:
-            merged_children = self._merge_nodes(self.values())
-            self.clear()
-            self[MERGED] = merged_children
-
-        for child in self.values():
-            child.merge(merge_threshold)
-
-    @classmethod
-    def _merge_nodes(cls, nodes: Iterable["Node"]) -> "Node":
-        children_by_name = defaultdict(list)
-        for node in nodes:
-            for name, child in node.items():
-                children_by_name[name].append(child)
-
-        return Node(
-            {name: cls._merge_nodes(children) for name, children in children_by_name.items()}
-        )
+    def add_child(
+        self, name: Edge, merge_threshold: int, subtree: Optional["Node"] = None
+    ) -> "Node":
+        """Adds a child, or the nodes of ``subtree`` to an existing child, and
+        returns the child.
+
+        If this node is merged, the merged child is returned instead, and a
+        merge is triggered if the number of children reaches the threshold.
+        """
+        if self.children is None:
+            self.children = {}
+
+        child = self.children.get(MERGED) or self.children.get(name)
+        if child is not None:
+            if subtree is not None:
+                child.absorb(subtree, merge_threshold)
+            return child
+
+        child = self.children[name] = subtree or Node()
+        if len(self.children) >= merge_threshold:
+            return self.merge(merge_threshold)
+        return child
+
+    def merge(self, merge_threshold: int) -> "Node":
+        """Replaces all children by a single merged child, and returns it."""
+        if self.children is not None:
+            merged = self.children.get(MERGED)
+            if merged is not None:
+                return merged
+
+        children = (self.children or {}).values()
+        merged = Node()
+        self.children = {MERGED: merged}
+        for child in children:
+            merged.absorb(child, merge_threshold)
+        return merged
+
+    def absorb(self, other: "Node", merge_threshold: int) -> None:
+        """Adds all paths of ``other`` to this node. ``other`` must not be
+        used afterwards, as its nodes are reused."""
+        if not other.children:
+            return
+
+        other_merged = other.children.get(MERGED)
+        if other_merged is not None:
+            # `other` has reached the threshold, so the union of both nodes
+            # has reached it as well.
+            self.merge(merge_threshold).absorb(other_merged, merge_threshold)
+            return
+
+        for name, child in other.children.items():
+            self.add_child(name, merge_threshold, child)
@@ -1,8 +1,16 @@
+import threading
+
+from django.conf import settings
 from symbolic import SourceView
 
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "LocalArtifactCache", "get_local_artifact_cache"]
+
+_local_artifact_cache = None
+_local_artifact_cache_lock = threading.Lock()
 
 
 def is_utf8(codec):
@@ -90,3 +98,59 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class LocalArtifactCache(LRUCache):
+    """
+    A bounded, process-wide LRU cache of parsed release artifacts (sourcemaps
+    and artifact indexes), so that they are parsed once per worker rather than
+    once per event.
+
+    Entries are keyed by tuples starting with the kind of artifact, and are
+    bounded by the size in bytes of the data they were parsed from. They
+    expire after ``ttl`` seconds, so that re-uploaded artifacts are picked up.
+
+    Cached values are handed to every event that uses them without being
+    copied. ``SmCache`` objects are immutable, and artifact indexes are only
+    read; callers must not modify either.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        super().__init__(max_bytes, ttl=ttl)
+
+    def get(self, key):
+        value = super().get(key)
+        if value is None:
+            metrics.incr("sourcemaps.local_cache.miss", tags={"kind": key[0]})
+        else:
+            metrics.incr("sourcemaps.local_cache.hit", tags={"kind": key[0]})
+        return value
+
+    def set(self, key, value, size):
+        # Keep a single artifact from flushing the entire cache.
+        if value is None or size > self.max_size // 4:
+            return []
+
+        evicted = super().set(key, value, size)
+        if evicted:
+            metrics.incr("sourcemaps.local_cache.eviction", amount=len(evicted))
+        return evicted
+
+
+def get_local_artifact_cache():
+    """
+    Returns the process-wide ``LocalArtifactCache``, or ``None`` if it is
+    disabled through ``SENTRY_JS_LOCAL_ARTIFACT_CACHE_MAX_BYTES``.
+    """
+    global _local_artifact_cache
+
+    max_bytes = settings.SENTRY_JS_LOCAL_ARTIFACT_CACHE_MAX_BYTES
+    if not max_bytes:
+        return None
+
+    with _local_artifact_cache_lock:
+        if _local_artifact_cache is None:
+            _local_artifact_cache = LocalArtifactCache(
+                max_bytes=max_bytes, ttl=settings.SENTRY_JS_LOCAL_ARTIFACT_CACHE_TTL
+            )
+        return _local_artifact_cache
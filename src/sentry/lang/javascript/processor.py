@@ -5,6 +5,7 @@ import re
 import sys
 import time
 import zlib
+from collections import namedtuple
 from datetime import datetime
 from io import BytesIO
 from itertools import groupby
@@ -22,7 +23,12 @@ from symbolic import SourceMapCache as SmCache
 from sentry import features, http, options
 from sentry.event_manager import set_tag
 from sentry.models import EventError, Organization, ReleaseFile
-from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, ReleaseArchive, read_artifact_index
+from sentry.models.releasefile import (
+    ARTIFACT_INDEX_FILENAME,
+    ReleaseArchive,
+    get_artifacts_version,
+    read_artifact_index,
+)
 from sentry.stacktraces.processing import StacktraceProcessor
 from sentry.utils import json, metrics
 
@@ -37,7 +43,8 @@ from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .cache import SourceCache, SourceMapCache, get_local_artifact_cache
+from .spool import get_release_archive_spool
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -79,6 +86,14 @@ MAX_RESOURCE_FETCHES = 100
 
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
+# Bump this whenever the output of processing a frame changes, to invalidate
+# the frame cache.
+FRAME_CACHE_VERSION = 1
+
+# Stands in for the sourcemap token of a frame restored from the frame cache.
+# Only its name is needed, when resolving function names by call site.
+CachedToken = namedtuple("CachedToken", ["name"])
+
 logger = logging.getLogger(__name__)
 
 
@@ -418,6 +433,15 @@ def get_artifact_index(release, dist):
     dist_name = dist and dist.name or None
 
     ident = ReleaseFile.get_ident(ARTIFACT_INDEX_FILENAME, dist_name)
+
+    local_cache = get_local_artifact_cache()
+    local_cache_key = ("artifact-index", release.id, ident)
+    if local_cache is not None:
+        # The index is shared with other events and must not be modified.
+        index = local_cache.get(local_cache_key)
+        if index is not None:
+            return index
+
     cache_key = f"artifact-index:v1:{release.id}:{ident}"
     result = cache.get(cache_key)
     if result == -1:
@@ -426,9 +450,12 @@ def get_artifact_index(release, dist):
         index = json.loads(result)
     else:
         index = read_artifact_index(release, dist, use_cache=True)
-        cache_value = -1 if index is None else json.dumps(index)
+        result = -1 if index is None else json.dumps(index)
         # Only cache for a short time to keep the manifest up-to-date
-        cache.set(cache_key, cache_value, timeout=60)
+        cache.set(cache_key, result, timeout=60)
+
+    if local_cache is not None and index is not None:
+        local_cache.set(local_cache_key, index, len(result))
 
     return index
 
@@ -470,6 +497,35 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
     # TODO(jjbayer): Could already extract filename from info and return
     # it later
 
+    spool = get_release_archive_spool()
+    if spool is None:
+        return fetch_release_archive(release, dist, archive_ident)
+
+    spool_key = f"{release.id}:{dist.id if dist else None}:{archive_ident}"
+    archive_file = spool.open(spool_key)
+    if archive_file is not None:
+        return archive_file
+
+    file_ = fetch_release_archive(release, dist, archive_ident)
+    if file_ is None:
+        return None
+
+    with sentry_sdk.start_span(op="fetch_release_archive_for_url.write_to_spool"):
+        archive_file = spool.add(spool_key, file_)
+
+    if archive_file is None:
+        file_.seek(0)
+        return file_
+
+    file_.close()
+    return archive_file
+
+
+def fetch_release_archive(release, dist, archive_ident) -> Optional[IO]:
+    """Fetch a release archive by its ident, from cache if possible.
+
+    If return value is not empty, the caller is responsible for closing the stream.
+    """
     cache_key = get_release_file_cache_key(release_id=release.id, releasefile_ident=archive_ident)
 
     result = cache.get(cache_key)
@@ -751,7 +807,37 @@ def get_max_age(headers):
     return min(max_age, CACHE_CONTROL_MAX)
 
 
+def get_sourcemap_cache_key(url, source, release, dist):
+    """
+    Returns the key of a parsed sourcemap in the local artifact cache, or
+    ``None`` if it must not be cached.
+    """
+    if is_data_uri(url):
+        # Inline sourcemaps are part of the source.
+        url = md5_text(url).hexdigest()
+    elif release is None:
+        # Scraped sourcemaps may change at any time.
+        return None
+
+    return (
+        "sourcemap",
+        release and release.id,
+        dist and dist.name,
+        url,
+        md5_text(source).hexdigest(),
+    )
+
+
 def fetch_sourcemap(url, source=b"", project=None, release=None, dist=None, allow_scraping=True):
+    local_cache = get_local_artifact_cache()
+    local_cache_key = None
+    if local_cache is not None:
+        local_cache_key = get_sourcemap_cache_key(url, source, release, dist)
+        if local_cache_key is not None:
+            sourcemap_view = local_cache.get(local_cache_key)
+            if sourcemap_view is not None:
+                return sourcemap_view
+
     if is_data_uri(url):
         try:
             body = base64.b64decode(
@@ -778,13 +864,18 @@ def fetch_sourcemap(url, source=b"", project=None, release=None, dist=None, allo
         with sentry_sdk.start_span(
             op="JavaScriptStacktraceProcessor.fetch_sourcemap.SmCache.from_bytes"
         ):
-            return SmCache.from_bytes(source, body)
+            sourcemap_view = SmCache.from_bytes(source, body)
 
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(str(exc), exc_info=True)
         raise UnparseableSourcemap({"url": http.expose_url(url)})
 
+    if local_cache_key is not None:
+        local_cache.set(local_cache_key, sourcemap_view, len(source) + len(body))
+
+    return sourcemap_view
+
 
 def is_data_uri(url):
     return url[:BASE64_PREAMBLE_LENGTH] == BASE64_SOURCEMAP_PREAMBLE
@@ -926,6 +1017,9 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         self.release = None
         self.dist = None
 
+        self.use_frame_cache = options.get("processing.javascript-frame-cache")
+        self._artifacts_version = None
+
     def get_valid_frames(self):
         # build list of frames that we can actually grab source for
         frames = []
@@ -949,6 +1043,16 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 date = timestamp and datetime.fromtimestamp(timestamp).replace(tzinfo=timezone.utc)
                 self.dist = self.release.add_dist(self.data["dist"], date)
 
+        # Sources of frames restored from the frame cache are only fetched
+        # lazily, if another frame still needs them.
+        cached_frames = {
+            id(processable_frame.frame)
+            for processable_frame in processing_task.iter_processable_frames(self)
+            if processable_frame.cache_value is not None
+        }
+        if cached_frames:
+            frames = [frame for frame in frames if id(frame) not in cached_frames]
+
         with sentry_sdk.start_span(
             op="JavaScriptStacktraceProcessor.preprocess_step.populate_source_cache"
         ):
@@ -960,26 +1064,86 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         platform = frame.get("platform") or self.data.get("platform")
         return platform in ("javascript", "node")
 
+    def get_artifacts_version(self):
+        if self._artifacts_version is None:
+            release = self.get_release()
+            self._artifacts_version = get_artifacts_version(release.id) if release else ""
+        return self._artifacts_version
+
     def preprocess_frame(self, processable_frame):
         # Stores the resolved token.  This is used to cross refer to other
         # frames for function name resolution by call site.
-        processable_frame.data = {"token": None}
+        processable_frame.data = {"token": None, "sourcemap_url": None}
+
+        # Artifacts are looked up by release, so frames can only be cached
+        # for events that have one.
+        if self.use_frame_cache and self.data.get("release"):
+            previous_frame = processable_frame.previous_frame
+            processable_frame.set_cache_key_from_values(
+                (
+                    FRAME_CACHE_VERSION,
+                    self.project.id,
+                    self.data["release"],
+                    # Changes whenever artifacts of the release are uploaded
+                    # or removed.
+                    self.get_artifacts_version(),
+                    self.data.get("dist"),
+                    self.data.get("platform"),
+                    bool(self.allow_scraping),
+                    processable_frame.frame,
+                    # The name of a frame's function may be resolved from the
+                    # token of the frame calling it.
+                    previous_frame.frame if previous_frame is not None else None,
+                )
+            )
 
     def process_frame(self, processable_frame, processing_task):
         """
-        Attempt to demangle the given frame.
+        Attempt to demangle the given frame, or restore it from the frame
+        cache.
         """
-        frame = processable_frame.frame
-        token = None
+        if processable_frame.cache_value is not None:
+            rv = self.restore_cached_frame(processable_frame)
+        else:
+            rv = self.demangle_frame(processable_frame)
+            # Errors are often caused by transient fetch failures, which must
+            # not stick to the frame. Frames are left unchanged for other
+            # reasons than those checked by `can_demangle_frame` too, such as
+            # sources that could not be found.
+            if (rv is None and not self.can_demangle_frame(processable_frame.frame)) or (
+                rv is not None and not rv[2]
+            ):
+                token = processable_frame.data.get("token")
+                processable_frame.set_cache_value(
+                    {
+                        "result": rv,
+                        "token_name": token.name if token is not None else None,
+                        "sourcemap_url": processable_frame.data.get("sourcemap_url"),
+                    }
+                )
 
-        cache = self.cache
-        sourcemaps = self.sourcemaps
-        all_errors = []
-        sourcemap_applied = False
+        if rv is not None:
+            try:
+                if features.has(
+                    "organizations:javascript-console-error-tag", self.organization, actor=None
+                ):
+                    self.tag_suspected_console_errors(rv[0])
+            except Exception as exc:
+                logger.exception("Failed to tag suspected console errors", exc_info=exc)
+        return rv
 
+    def restore_cached_frame(self, processable_frame):
+        cache_value = processable_frame.cache_value
+        if cache_value["token_name"] is not None:
+            processable_frame.data["token"] = CachedToken(cache_value["token_name"])
+        if cache_value["sourcemap_url"] is not None:
+            self.sourcemaps_touched.add(cache_value["sourcemap_url"])
+        return cache_value["result"]
+
+    def can_demangle_frame(self, frame):
         # can't demangle if there's no filename or line number present
         if not frame.get("abs_path") or not frame.get("lineno"):
-            return
+            return False
 
         # also can't demangle node's internal modules
         # therefore we only process user-land frames (starting with /)
@@ -987,6 +1151,20 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         if self.data.get("platform") == "node" and not frame.get("abs_path").startswith(
             ("/", "app:", "webpack:")
         ):
+            return False
+
+        return True
+
+    def demangle_frame(self, processable_frame):
+        frame = processable_frame.frame
+        token = None
+
+        cache = self.cache
+        sourcemaps = self.sourcemaps
+        all_errors = []
+        sourcemap_applied = False
+
+        if not self.can_demangle_frame(frame):
             return
 
         errors = cache.get_errors(frame["abs_path"])
@@ -1005,6 +1183,7 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
 
         sourcemap_url, sourcemap_cache = sourcemaps.get_link(frame["abs_path"])
         self.sourcemaps_touched.add(sourcemap_url)
+        processable_frame.data["sourcemap_url"] = sourcemap_url
 
         if sourcemap_cache and frame.get("colno") is None:
             all_errors.append(
@@ -1162,14 +1341,6 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
 
             new_frames = [new_frame]
             raw_frames = [raw_frame] if changed_raw else None
-
-            try:
-                if features.has(
-                    "organizations:javascript-console-error-tag", self.organization, actor=None
-                ):
-                    self.tag_suspected_console_errors(new_frames)
-            except Exception as exc:
-                logger.exception("Failed to tag suspected console errors", exc_info=exc)
             return new_frames, raw_frames, all_errors
 
     def tag_suspected_console_errors(self, new_frames):
@@ -0,0 +1,218 @@
+import io
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import IO, Optional
+
+from django.conf import settings
+
+from sentry.utils import metrics
+from sentry.utils.hashlib import md5_text
+
+__all__ = ["MappedFile", "ReleaseArchiveSpool", "get_release_archive_spool"]
+
+logger = logging.getLogger(__name__)
+
+#: Seconds after which temporary files in the spool are considered abandoned
+#: by the process writing them.
+TMP_FILE_GRACE_SECONDS = 3600
+
+#: Seconds between scans of the spool for eviction, while the size of the
+#: archives this process added fits into the spool. Other processes add
+#: archives too.
+EVICT_INTERVAL_SECONDS = 60
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+class MappedFile(io.RawIOBase):
+    """
+    A read-only, seekable file object over a memory mapped file.
+
+    Reads only touch the pages they need, so ``zipfile`` can read individual
+    entries through the central directory without loading the entire file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # Empty files can't be mapped.
+            if os.fstat(f.fileno()).st_size == 0:
+                self._mmap = b""
+            else:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._mmap)
+        self.name = path
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        end = min(self._pos + len(buffer), self.size)
+        n = max(end - self._pos, 0)
+        buffer[:n] = self._mmap[self._pos : end]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed and isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        super().close()
+
+
+class ReleaseArchiveSpool:
+    """
+    A local on-disk cache of release archives.
+
+    Archives are written to the spool directory once and then opened as
+    ``MappedFile``, so that workers on the same host share a single copy
+    through the page cache. Archives are immutable once uploaded (their
+    idents are unique), so entries never need to be invalidated. Once the
+    spool grows beyond ``max_bytes``, the least recently opened archives are
+    removed. Archives which are still open stay readable until they are
+    closed.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        assert max_bytes > 0
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+        self._evict_lock = threading.Lock()
+        # Size of the spool as of the last scan, plus what was added since.
+        self._size_estimate = 0
+        self._next_scan = 0.0
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.path, md5_text(key).hexdigest() + ".zip")
+
+    def open(self, key: str) -> Optional[MappedFile]:
+        path = self._get_path(key)
+        try:
+            file_ = MappedFile(path)
+            # Track recency of use for eviction.
+            os.utime(path)
+        except OSError:
+            metrics.incr("sourcemaps.archive_spool.miss")
+            return None
+
+        metrics.incr("sourcemaps.archive_spool.hit")
+        return file_
+
+    def add(self, key: str, fileobj: IO) -> Optional[MappedFile]:
+        """
+        Writes an archive to the spool and returns it as ``MappedFile``, or
+        ``None`` if it could not be written.
+        """
+        path = self._get_path(key)
+        tmp_path = None
+        try:
+            # Write to a temporary file first, so that other processes never
+            # see partially written archives.
+            with tempfile.NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                shutil.copyfileobj(fileobj, f)
+            os.replace(tmp_path, path)
+            file_ = MappedFile(path)
+        except OSError:
+            logger.exception("sourcemaps.archive_spool.write_failed")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+            return None
+
+        metrics.timing("sourcemaps.archive_spool.size", file_.size)
+        self._maybe_evict(file_.size)
+        return file_
+
+    def _maybe_evict(self, added_bytes: int) -> None:
+        with self._evict_lock:
+            self._size_estimate += added_bytes
+            now = time.time()
+            if self._size_estimate <= self.max_bytes and now < self._next_scan:
+                return
+            self._next_scan = now + EVICT_INTERVAL_SECONDS
+
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        tmp_cutoff = time.time() - TMP_FILE_GRACE_SECONDS
+        with os.scandir(self.path) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                total += stat.st_size
+                # Other processes may still be writing to temporary files.
+                if entry.name.endswith(".tmp") and stat.st_mtime > tmp_cutoff:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        if total <= self.max_bytes:
+            with self._evict_lock:
+                self._size_estimate = total
+            return
+
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._evict_lock:
+            self._size_estimate = total
+        metrics.incr("sourcemaps.archive_spool.eviction", amount=evicted)
+
+
+def get_release_archive_spool() -> Optional[ReleaseArchiveSpool]:
+    """
+    Returns the ``ReleaseArchiveSpool``, or ``None`` if it is disabled through
+    ``SENTRY_RELEASE_ARCHIVE_SPOOL_DIR``.
+    """
+    global _spool
+
+    path = settings.SENTRY_RELEASE_ARCHIVE_SPOOL_DIR
+    if not path:
+        return None
+
+    with _spool_lock:
+        if _spool is None or _spool.path != path:
+            _spool = ReleaseArchiveSpool(path, settings.SENTRY_RELEASE_ARCHIVE_SPOOL_MAX_BYTES)
+        return _spool
@@ -1,3 +1,4 @@
+import functools
 import logging
 import posixpath
 from typing import Set
@@ -254,7 +255,40 @@ def _merge_full_response(data, response):
             data_stacktrace["frames"].append(new_frame)
 
 
-def process_minidump(data):
+class SymbolicationRequest:
+    """
+    The call to symbolicator needed to symbolicate an event.
+
+    ``method`` names the method of ``Symbolicator`` and ``SymbolicatorBatch``
+    that is called with ``kwargs``. ``merge`` merges its response into the
+    event and returns the event data.
+    """
+
+    def __init__(self, symbolicator, method, kwargs, merge):
+        self.symbolicator = symbolicator
+        self.method = method
+        self.kwargs = kwargs
+        self.merge = merge
+
+    def run(self):
+        return self.merge(getattr(self.symbolicator, self.method)(**self.kwargs))
+
+    def add_to_batch(self, batch, callback):
+        """
+        Adds the call to a ``SymbolicatorBatch``. ``callback`` is invoked with
+        the response once the batch has run, and may pass it to ``merge``.
+        """
+        getattr(batch, self.method)(self.symbolicator, callback=callback, **self.kwargs)
+
+
+def _merge_full_response_with_status(data, response):
+    if _handle_response_status(data, response):
+        _merge_full_response(data, response)
+
+    return data
+
+
+def _get_minidump_request(data):
     project = Project.objects.get_from_cache(id=data["project"])
 
     minidump = get_event_attachment(data, MINIDUMP_ATTACHMENT_TYPE)
@@ -264,15 +298,21 @@ def process_minidump(data):
 
     symbolicator = Symbolicator(project=project, event_id=data["event_id"])
 
-    response = symbolicator.process_minidump(minidump.data)
+    return SymbolicationRequest(
+        symbolicator,
+        "process_minidump",
+        {"minidump": minidump.data},
+        functools.partial(_merge_full_response_with_status, data),
+    )
 
-    if _handle_response_status(data, response):
-        _merge_full_response(data, response)
 
-    return data
+def process_minidump(data):
+    request = _get_minidump_request(data)
+    if request is not None:
+        return request.run()
 
 
-def process_applecrashreport(data):
+def _get_applecrashreport_request(data):
     project = Project.objects.get_from_cache(id=data["project"])
 
     report = get_event_attachment(data, APPLECRASHREPORT_ATTACHMENT_TYPE)
@@ -282,12 +322,18 @@ def process_applecrashreport(data):
 
     symbolicator = Symbolicator(project=project, event_id=data["event_id"])
 
-    response = symbolicator.process_applecrashreport(report.data)
+    return SymbolicationRequest(
+        symbolicator,
+        "process_applecrashreport",
+        {"report": report.data},
+        functools.partial(_merge_full_response_with_status, data),
+    )
 
-    if _handle_response_status(data, response):
-        _merge_full_response(data, response)
 
-    return data
+def process_applecrashreport(data):
+    request = _get_applecrashreport_request(data)
+    if request is not None:
+        return request.run()
 
 
 def _handles_frame(data, frame):
@@ -345,7 +391,7 @@ def get_frames_for_symbolication(frames, data, modules):
     return rv
 
 
-def process_payload(data):
+def _get_payload_request(data):
     project = Project.objects.get_from_cache(id=data["project"])
 
     symbolicator = Symbolicator(project=project, event_id=data["event_id"])
@@ -373,8 +419,15 @@ def process_payload(data):
 
     signal = signal_from_data(data)
 
-    response = symbolicator.process_payload(stacktraces=stacktraces, modules=modules, signal=signal)
+    return SymbolicationRequest(
+        symbolicator,
+        "process_payload",
+        {"stacktraces": stacktraces, "modules": modules, "signal": signal},
+        functools.partial(_merge_payload_response, data, stacktrace_infos, modules, stacktraces),
+    )
+
 
+def _merge_payload_response(data, stacktrace_infos, modules, stacktraces, response):
     if not _handle_response_status(data, response):
         return data
 
@@ -424,6 +477,12 @@ def process_payload(data):
     return data
 
 
+def process_payload(data):
+    request = _get_payload_request(data)
+    if request is not None:
+        return request.run()
+
+
 def get_symbolication_function(data):
     if is_minidump_event(data):
         return process_minidump
@@ -433,6 +492,24 @@ def get_symbolication_function(data):
         return process_payload
 
 
+_REQUEST_FUNCTIONS = {
+    process_minidump: _get_minidump_request,
+    process_applecrashreport: _get_applecrashreport_request,
+    process_payload: _get_payload_request,
+}
+
+
+def get_symbolication_request(data):
+    """
+    Returns the ``SymbolicationRequest`` made by the function returned by
+    ``get_symbolication_function``, or ``None`` if there is nothing to
+    symbolicate.
+    """
+    request_function = _REQUEST_FUNCTIONS.get(get_symbolication_function(data))
+    if request_function is not None:
+        return request_function(data)
+
+
 def should_process_with_symbolicator(data):
     return bool(get_symbolication_function(data))
 
@@ -1,8 +1,10 @@
 import base64
 import logging
 import sys
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 from urllib.parse import urljoin
 
@@ -131,7 +133,7 @@ def _task_id_cache_key_for_event(project_id, event_id):
 
 
 class Symbolicator:
-    def __init__(self, project, event_id):
+    def __init__(self, project, event_id, timeout=None):
         symbolicator_options = options.get("symbolicator.options")
         base_url = symbolicator_options["url"].rstrip("/")
         assert base_url
@@ -146,7 +148,7 @@ class Symbolicator:
             url=base_url,
             project_id=str(project.id),
             event_id=str(event_id),
-            timeout=settings.SYMBOLICATOR_POLL_TIMEOUT,
+            timeout=settings.SYMBOLICATOR_POLL_TIMEOUT if timeout is None else timeout,
             sources=get_sources_for_project(project),
             options={
                 "dif_candidates": True,
@@ -219,6 +221,181 @@ class Symbolicator:
         )
 
 
+class _BatchJob:
+    def __init__(self, symbolicator, create_task, task_name, callback):
+        self.symbolicator = symbolicator
+        self.create_task = create_task
+        self.task_name = task_name
+        self.callback = callback
+        # Resume tasks that were started by a previous attempt.
+        self.task_id = default_cache.get(symbolicator.task_id_cache_key)
+        self.next_poll = 0.0
+
+    def poll(self, session):
+        sess = self.symbolicator.sess
+        sess.open(session=session)
+        try:
+            json_response = None
+            if self.task_id:
+                json_response = sess.query_task(self.task_id)
+            if json_response is None:
+                json_response = self.create_task()
+            return json_response
+        finally:
+            sess.close()
+
+
+class SymbolicatorBatch:
+    """
+    Keeps the symbolication tasks of many events in flight at once.
+
+    Instead of blocking on one event at a time, tasks for all added events are
+    submitted concurrently from a pool of threads, each with its own HTTP
+    session. Tasks are created with ``timeout=0``, so submissions return
+    right away and all responses are picked up by a single poll loop, which
+    honors the ``retry_after`` hints of Symbolicator. Every event's callback
+    is invoked with its response as soon as it arrives, always on the thread
+    calling ``run``.
+
+    Events that fail or do not complete within the timeout are passed a
+    ``None`` response, which processing treats as an internal failure. Task ids
+    of pending events are kept in the cache, so that retrying them with
+    ``Symbolicator`` resumes their tasks rather than starting over.
+    """
+
+    def __init__(self, concurrency=None):
+        self.concurrency = concurrency or settings.SYMBOLICATOR_BATCH_CONCURRENCY
+        self._jobs = []
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def add(self, symbolicator, create_task, task_name, callback):
+        symbolicator.sess.timeout = 0
+        self._jobs.append(_BatchJob(symbolicator, create_task, task_name, callback))
+
+    def process_minidump(self, symbolicator, minidump, callback):
+        self.add(
+            symbolicator,
+            lambda: symbolicator.sess.upload_minidump(minidump),
+            "process_minidump",
+            callback,
+        )
+
+    def process_applecrashreport(self, symbolicator, report, callback):
+        self.add(
+            symbolicator,
+            lambda: symbolicator.sess.upload_applecrashreport(report),
+            "process_applecrashreport",
+            callback,
+        )
+
+    def process_payload(self, symbolicator, stacktraces, modules, callback, signal=None):
+        self.add(
+            symbolicator,
+            lambda: symbolicator.sess.symbolicate_stacktraces(
+                stacktraces=stacktraces, modules=modules, signal=signal
+            ),
+            "symbolicate_stacktraces",
+            callback,
+        )
+
+    def run(self, timeout=None):
+        """
+        Processes all added events, and returns once every callback has been
+        invoked or the timeout (``SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT`` by
+        default) has passed.
+        """
+        jobs, self._jobs = self._jobs, []
+        if not jobs:
+            return
+
+        if timeout is None:
+            timeout = settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT
+        deadline = time.monotonic() + timeout
+
+        metrics.timing("events.symbolicator.batch.size", len(jobs))
+
+        # `requests` sessions are not thread safe, so every thread of the pool
+        # polls with its own session.
+        sessions = []
+        local = threading.local()
+
+        def poll(job):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = Session()
+                sessions.append(session)
+            return job.poll(session)
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(jobs)),
+                thread_name_prefix=__name__,
+            ) as pool:
+                while jobs:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        break
+
+                    due = [job for job in jobs if job.next_poll <= now]
+                    if not due:
+                        time.sleep(min(min(job.next_poll for job in jobs), deadline) - now)
+                        continue
+
+                    futures = {pool.submit(poll, job): job for job in due}
+                    for future in as_completed(futures):
+                        job = futures[future]
+                        if not self._handle_response(job, future):
+                            jobs.remove(job)
+        finally:
+            for session in sessions:
+                session.close()
+
+        # Jobs left at this point have timed out.
+        for job in jobs:
+            metrics.incr("events.symbolicator.batch.timeout", tags={"task_name": job.task_name})
+            if job.task_id:
+                default_cache.set(
+                    job.symbolicator.task_id_cache_key, job.task_id, REQUEST_CACHE_TIMEOUT
+                )
+            job.callback(None)
+
+    def _handle_response(self, job, future):
+        """
+        Invokes the job's callback once it has completed. Returns ``True`` if
+        the job needs to be polled again.
+        """
+        try:
+            json_response = future.result()
+        except ServiceUnavailable:
+            # Symbolicator may be restarting, see `Symbolicator._process`.
+            job.next_poll = time.monotonic() + settings.SYMBOLICATOR_MAX_RETRY_AFTER
+            return True
+        except Exception:
+            logger.exception("Failed to symbolicate event in batch")
+            json_response = None
+        else:
+            metrics.incr(
+                "events.symbolicator.response",
+                tags={
+                    "response": json_response.get("status") or "null",
+                    "task_name": job.task_name,
+                },
+            )
+            if json_response["status"] == "pending":
+                job.task_id = json_response["request_id"]
+                retry_after = min(
+                    json_response.get("retry_after") or 0, settings.SYMBOLICATOR_MAX_RETRY_AFTER
+                )
+                job.next_poll = time.monotonic() + retry_after
+                return True
+
+        default_cache.delete(job.symbolicator.task_id_cache_key)
+        job.callback(json_response)
+        return False
+
+
 class TaskIdNotFound(Exception):
     pass
 
@@ -482,6 +659,7 @@ class SymbolicatorSession:
         self.options = options or None
         self.timeout = timeout
         self.session = None
+        self._owns_session = False
 
         # Build some maps for use in ._process_response()
         self.reverse_source_aliases = reverse_aliases_map(settings.SENTRY_BUILTIN_SOURCES)
@@ -507,13 +685,19 @@ class SymbolicatorSession:
     def __exit__(self, *args):
         self.close()
 
-    def open(self):
+    def open(self, session=None):
+        """
+        Opens the session. An existing HTTP ``session`` can be passed to share
+        its connection pool, it is not closed along with this session.
+        """
         if self.session is None:
-            self.session = Session()
+            self._owns_session = session is None
+            self.session = Session() if session is None else session
 
     def close(self):
         if self.session is not None:
-            self.session.close()
+            if self._owns_session:
+                self.session.close()
             self.session = None
 
     def _ensure_open(self):
@@ -10,7 +10,8 @@ from sentry.db.models.fields import FlexibleForeignKey, JSONField
 from sentry.models import ActorTuple
 from sentry.models.groupowner import OwnerRuleType
 from sentry.models.project import Project
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
+from sentry.ownership.grammar import Rule, resolve_actors
+from sentry.ownership.index import get_ownership_index
 from sentry.utils import metrics
 from sentry.utils.cache import cache
 
@@ -295,13 +296,11 @@ class ProjectOwnership(Model):
     def _matching_ownership_rules(
         cls, ownership: "ProjectOwnership", project_id: int, data: Mapping[str, Any]
     ) -> Sequence["Rule"]:
-        rules = []
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
+        index = get_ownership_index(ownership.schema)
+        if index is None:
+            return []
 
-        return rules
+        return index.get_matching_rules(data)
 
 
 def process_resource_change(instance, change, **kwargs):
@@ -8,9 +8,11 @@ from io import BytesIO
 from tempfile import TemporaryDirectory
 from typing import IO, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
+from uuid import uuid4
 
 from django.core.files.base import File as FileObj
-from django.db import models, router
+from django.db import models, router, transaction
+from django.db.models.signals import post_delete, post_save
 
 from sentry import options
 from sentry.db.models import (
@@ -27,6 +29,7 @@ from sentry.models.distribution import Distribution
 from sentry.models.file import File
 from sentry.models.release import Release
 from sentry.utils import json, metrics
+from sentry.utils.cache import cache
 from sentry.utils.db import atomic_transaction
 from sentry.utils.hashlib import sha1_text
 from sentry.utils.zip import safe_extract_zip
@@ -37,6 +40,10 @@ logger = logging.getLogger(__name__)
 ARTIFACT_INDEX_FILENAME = "artifact-index.json"
 ARTIFACT_INDEX_TYPE = "release.artifact-index"
 
+# Seconds for which the artifacts version of a release is kept. A new version is
+# assigned once it expires.
+ARTIFACTS_VERSION_TTL = 24 * 3600
+
 
 class PublicReleaseFileManager(models.Manager):
     """Manager for all release files that are not internal.
@@ -144,6 +151,38 @@ class ReleaseFile(Model):
         return urls
 
 
+def _get_artifacts_version_cache_key(release_id: int) -> str:
+    return f"releasefile:artifacts-version:{release_id}"
+
+
+def get_artifacts_version(release_id: int) -> str:
+    """Returns a token that changes whenever release files of the release are
+    created, changed or deleted.
+
+    Caches of results derived from the artifacts of a release include it in
+    their keys.
+    """
+    cache_key = _get_artifacts_version_cache_key(release_id)
+    version = cache.get(cache_key)
+    if version is None:
+        version = uuid4().hex
+        cache.add(cache_key, version, ARTIFACTS_VERSION_TTL)
+        # Another process may have assigned a version first. If the cache is
+        # unavailable, the new version is never seen again.
+        version = cache.get(cache_key) or version
+    return version
+
+
+def _invalidate_artifacts_version(instance, **kwargs):
+    cache_key = _get_artifacts_version_cache_key(instance.release_id)
+    # Readers must not see the new version before they can see the changes.
+    transaction.on_commit(lambda: cache.delete(cache_key), using=router.db_for_write(ReleaseFile))
+
+
+post_save.connect(_invalidate_artifacts_version, sender=ReleaseFile, weak=False)
+post_delete.connect(_invalidate_artifacts_version, sender=ReleaseFile, weak=False)
+
+
 class ReleaseFileCache:
     @property
     def cache_path(self):
@@ -1,8 +1,12 @@
+import struct
 from threading import local
 
 import sentry_sdk
+import zstandard
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
+from sentry.nodestore.local_cache import get_local_cache
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -22,6 +26,77 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json._default_decoder.decode
 
+# Indexed format: magic, followed by the number of subkeys and one index entry
+# per subkey (name length, name, offset, length), followed by the individually
+# zstd-compressed JSON payloads. The magic can never start a legacy payload,
+# which is either JSON (``{``) or a pickle.
+INDEXED_MAGIC = b"\x00nsi1"
+_index_count = struct.Struct("<H")
+_index_name_length = struct.Struct("<H")
+_index_location = struct.Struct("<II")
+# Stands in for the name length of the default (``None``) subkey.
+_DEFAULT_SUBKEY = 0xFFFF
+
+
+def encode_indexed(data):
+    """
+    Encode a data dict (see ``NodeStorage._encode``) into the indexed format,
+    where every subkey can be located and decompressed on its own.
+    """
+    compressor = zstandard.ZstdCompressor()
+    index = []
+    chunks = []
+    offset = 0
+    for key, value in data.items():
+        chunk = compressor.compress(json_dumps(value).encode("utf8"))
+        index.append((key, offset, len(chunk)))
+        chunks.append(chunk)
+        offset += len(chunk)
+
+    header = [INDEXED_MAGIC, _index_count.pack(len(index))]
+    for key, offset, length in index:
+        if key is None:
+            header.append(_index_name_length.pack(_DEFAULT_SUBKEY))
+        else:
+            name = key.encode("ascii")
+            header.append(_index_name_length.pack(len(name)))
+            header.append(name)
+        header.append(_index_location.pack(offset, length))
+
+    return b"".join(header + chunks)
+
+
+def decode_indexed(value, subkey):
+    """
+    Decode a single subkey from a payload in the indexed format, without
+    touching any of the other subkeys.
+    """
+    view = memoryview(value)
+    pos = len(INDEXED_MAGIC)
+    (count,) = _index_count.unpack_from(view, pos)
+    pos += _index_count.size
+
+    name = subkey.encode("ascii") if subkey is not None else None
+    location = None
+    for _ in range(count):
+        (name_length,) = _index_name_length.unpack_from(view, pos)
+        pos += _index_name_length.size
+        if name_length == _DEFAULT_SUBKEY:
+            entry_name = None
+        else:
+            entry_name = bytes(view[pos : pos + name_length])
+            pos += name_length
+        if entry_name == name:
+            location = _index_location.unpack_from(view, pos)
+        pos += _index_location.size
+
+    if location is None:
+        return None
+
+    offset, length = location
+    start = pos + offset
+    return json_loads(zstandard.ZstdDecompressor().decompress(view[start : start + length]))
+
 
 class NodeStorage(local, Service):
     """
@@ -56,6 +131,11 @@ class NodeStorage(local, Service):
 
     This is used in reprocessing to store a snapshot of the event from multiple
     stages of the pipeline.
+
+    Reads are served from up to two cache tiers before hitting the backend: a
+    bounded in-process LRU (see ``LocalNodeCache``) which also caches subkeys,
+    and the shared ``nodedata`` Django cache which only caches the default
+    subkey.
     """
 
     __all__ = (
@@ -92,6 +172,9 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
+        if value.startswith(INDEXED_MAGIC):
+            return decode_indexed(value, subkey)
+
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -128,17 +211,22 @@ class NodeStorage(local, Service):
             span.set_tag("node_id", id)
             if subkey is None:
                 item_from_cache = self._get_cache_item(id)
-                if item_from_cache:
-                    span.set_tag("origin", "from_cache")
-                    span.set_tag("found", bool(item_from_cache))
-                    return item_from_cache
+            else:
+                item_from_cache = self._get_local_cache_item(id, subkey)
+
+            if item_from_cache:
+                span.set_tag("origin", "from_cache")
+                span.set_tag("found", bool(item_from_cache))
+                return item_from_cache
 
             span.set_tag("subkey", str(subkey))
             bytes_data = self._get_bytes(id)
             rv = self._decode(bytes_data, subkey=subkey)
+            # set cache item only after we know decoding did not fail
             if subkey is None:
-                # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
+            else:
+                self._set_local_cache_item(id, subkey, rv)
 
             span.set_tag("result", "from_service")
             if bytes_data:
@@ -171,13 +259,14 @@ class NodeStorage(local, Service):
 
             if subkey is None:
                 cache_items = self._get_cache_items(id_list)
-                if len(cache_items) == len(id_list):
-                    span.set_tag("result", "from_cache")
-                    return cache_items
-
-                uncached_ids = [id for id in id_list if id not in cache_items]
             else:
-                uncached_ids = id_list
+                cache_items = self._get_local_cache_items(id_list, subkey)
+
+            if len(cache_items) == len(id_list):
+                span.set_tag("result", "from_cache")
+                return cache_items
+
+            uncached_ids = [id for id in id_list if id not in cache_items]
 
             items = {
                 id: self._decode(value, subkey=subkey)
@@ -185,7 +274,9 @@ class NodeStorage(local, Service):
             }
             if subkey is None:
                 self._set_cache_items(items)
-                items.update(cache_items)
+            else:
+                self._set_local_cache_items(items, subkey)
+            items.update(cache_items)
 
             span.set_tag("result", "from_service")
             span.set_tag("found", len(items))
@@ -200,7 +291,13 @@ class NodeStorage(local, Service):
 
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
+
+        With the ``nodestore.write-indexed-format`` option enabled, the
+        indexed format is written instead (see ``encode_indexed``).
         """
+        if options.get("nodestore.write-indexed-format"):
+            return encode_indexed(data)
+
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
@@ -243,6 +340,8 @@ class NodeStorage(local, Service):
             cache_item = data.get(None)
             bytes_data = self._encode(data)
             self._set_bytes(id, bytes_data, ttl=ttl)
+            # previously cached subkeys may no longer exist
+            self._delete_local_cache_item(id)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
 
@@ -253,30 +352,67 @@ class NodeStorage(local, Service):
         raise NotImplementedError
 
     def _get_cache_item(self, id):
-        if self.cache:
-            return self.cache.get(id)
+        item = self._get_local_cache_item(id, None)
+        if item is None and self.cache:
+            item = self.cache.get(id)
+            self._set_local_cache_item(id, None, item)
+        return item
 
     def _get_cache_items(self, id_list):
-        if self.cache:
-            return self.cache.get_many(id_list)
-        return {}
+        items = self._get_local_cache_items(id_list, None)
+        if self.cache and len(items) < len(id_list):
+            remote_items = self.cache.get_many([id for id in id_list if id not in items])
+            self._set_local_cache_items(remote_items, None)
+            items.update(remote_items)
+        return items
 
     def _set_cache_item(self, id, data):
+        if data:
+            self._set_local_cache_item(id, None, data)
         if self.cache and data:
             self.cache.set(id, data)
 
     def _set_cache_items(self, items):
+        self._set_local_cache_items(items, None)
         if self.cache:
             self.cache.set_many(items)
 
     def _delete_cache_item(self, id):
+        self._delete_local_cache_item(id)
         if self.cache:
             self.cache.delete(id)
 
     def _delete_cache_items(self, id_list):
+        if self.local_cache:
+            self.local_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many([id for id in id_list])
 
+    def _get_local_cache_item(self, id, subkey):
+        if self.local_cache:
+            return self.local_cache.get(id, subkey)
+
+    def _get_local_cache_items(self, id_list, subkey):
+        if self.local_cache:
+            return self.local_cache.get_many(id_list, subkey)
+        return {}
+
+    def _set_local_cache_item(self, id, subkey, data):
+        if self.local_cache and data:
+            self.local_cache.set(id, subkey, data)
+
+    def _set_local_cache_items(self, items, subkey):
+        if self.local_cache:
+            self.local_cache.set_many(items, subkey)
+
+    def _delete_local_cache_item(self, id):
+        if self.local_cache:
+            self.local_cache.delete(id)
+
+    @memoize
+    def local_cache(self):
+        return get_local_cache()
+
     @memoize
     def cache(self):
         try:
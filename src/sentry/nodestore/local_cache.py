@@ -0,0 +1,120 @@
+import pickle
+import threading
+
+from django.conf import settings
+
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+
+
+class LocalNodeCache:
+    """
+    A bounded, process-wide LRU cache for nodestore payloads which sits in
+    front of the shared ``nodedata`` cache.
+
+    Entries are keyed by ``(id, subkey)`` and are bounded by their size in
+    bytes rather than by their count. Payloads are kept pickled, which gives
+    exact size accounting, makes sure callers never share (and mutate) the
+    same object, and still skips decompression and JSON parsing entirely.
+
+    >>> cache = LocalNodeCache(max_bytes=64 * 1024 * 1024, ttl=60)
+    >>> cache.set("key1", None, {"foo": "bar"})
+    >>> cache.get("key1", None)
+    {'foo': 'bar'}
+    """
+
+    def __init__(self, max_bytes, ttl, max_item_bytes=None):
+        self.max_item_bytes = max_item_bytes or max_bytes // 8
+        # (id, subkey) -> pickled payload
+        self._items = LRUCache(max_bytes, ttl=ttl)
+        # id -> set of cached subkeys, so that deletes can drop all of them
+        self._subkeys = {}
+        self._subkeys_lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._items.size
+
+    def get(self, id, subkey):
+        payload = self._items.get((id, subkey))
+        if payload is None:
+            metrics.incr("nodestore.local_cache.miss")
+            return None
+
+        metrics.incr("nodestore.local_cache.hit")
+        return pickle.loads(payload)
+
+    def get_many(self, id_list, subkey):
+        rv = {}
+        for id in id_list:
+            value = self.get(id, subkey)
+            if value is not None:
+                rv[id] = value
+        return rv
+
+    def set(self, id, subkey, value):
+        if value is None:
+            return
+
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_item_bytes:
+            metrics.incr("nodestore.local_cache.skipped", tags={"reason": "too_large"})
+            return
+
+        with self._subkeys_lock:
+            evicted = self._items.set((id, subkey), payload, size=len(payload))
+            self._subkeys.setdefault(id, set()).add(subkey)
+            for (evicted_id, evicted_subkey), _ in evicted:
+                self._discard_subkey(evicted_id, evicted_subkey)
+
+        if evicted:
+            metrics.incr(
+                "nodestore.local_cache.eviction", amount=len(evicted), tags={"reason": "size"}
+            )
+
+    def set_many(self, items, subkey):
+        for id, value in items.items():
+            self.set(id, subkey, value)
+
+    def delete(self, id):
+        with self._subkeys_lock:
+            for subkey in self._subkeys.pop(id, ()):
+                self._items.delete((id, subkey))
+
+    def delete_many(self, id_list):
+        for id in id_list:
+            self.delete(id)
+
+    def clear(self):
+        with self._subkeys_lock:
+            self._items.clear()
+            self._subkeys.clear()
+
+    def _discard_subkey(self, id, subkey):
+        subkeys = self._subkeys.get(id)
+        if subkeys is not None:
+            subkeys.discard(subkey)
+            if not subkeys:
+                del self._subkeys[id]
+
+
+def get_local_cache():
+    """
+    Returns the process-wide ``LocalNodeCache``, or ``None`` if it is disabled
+    through ``SENTRY_NODESTORE_LOCAL_CACHE_MAX_BYTES``.
+    """
+    global _local_cache
+
+    max_bytes = settings.SENTRY_NODESTORE_LOCAL_CACHE_MAX_BYTES
+    if not max_bytes:
+        return None
+
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LocalNodeCache(
+                max_bytes=max_bytes, ttl=settings.SENTRY_NODESTORE_LOCAL_CACHE_TTL
+            )
+        return _local_cache
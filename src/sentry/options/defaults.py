@@ -263,6 +263,15 @@ register("snuba.search.max-chunk-size", default=2000)
 register("snuba.search.max-total-chunk-time-seconds", default=30.0)
 register("snuba.search.hits-sample-size", default=100)
 register("snuba.track-outcomes-sample-rate", default=0.0)
+# Number of queries of a bulk Snuba query that are run concurrently, capped by
+# SENTRY_SNUBA_MAX_CONNECTIONS. Bulk queries share the default query thread
+# pool when set to 0.
+register("snuba.bulk-query.max-concurrency", default=0, flags=FLAG_PRIORITIZE_DISK)
+# Maps referrers to the number of their queries a process runs concurrently.
+register("snuba.bulk-query.referrer-concurrency", type=Dict, default={}, flags=FLAG_PRIORITIZE_DISK)
+# Whether successful Snuba responses are decoded while they are received, on
+# the thread that ran the query, rather than read in full and decoded later.
+register("snuba.stream-decode-responses", default=False, flags=FLAG_PRIORITIZE_DISK)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register("snuba.tagstore.cache-tagkeys-rate", default=0.0, flags=FLAG_PRIORITIZE_DISK)
@@ -324,6 +333,9 @@ register("outcomes.tsdb-in-consumer-sample-rate", default=0.0)  # unused
 # Node data save rate
 register("nodedata.cache-sample-rate", default=0.0, flags=FLAG_PRIORITIZE_DISK)
 register("nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK)
+# Write nodestore payloads in the indexed, per-subkey compressed format. Readers
+# understand both formats, so this is safe to flip once all readers are deployed.
+register("nodestore.write-indexed-format", default=False, flags=FLAG_PRIORITIZE_DISK)
 
 # Use nodestore for eventstore.get_events
 register("eventstore.use-nodestore", default=False, flags=FLAG_PRIORITIZE_DISK)
@@ -349,6 +361,10 @@ register("processing.can-use-scrubbers", default=True)
 # Set this value of the fraction of projects that you want to use it for.
 register("processing.sourcemapcache-processor", default=0.0)  # unused
 
+# Cache the results of processing JavaScript frames per release, so that
+# identical frames across events are only resolved once.
+register("processing.javascript-frame-cache", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Killswitch for sending internal errors to the internal project or
 # `SENTRY_SDK_CONFIG.relay_dsn`. Set to `0` to only send to
 # `SENTRY_SDK_CONFIG.dsn` (the "upstream transport") and nothing else.
@@ -427,6 +443,11 @@ register("eventstream:kafka-headers", default=True)
 # Post process forwarder options
 # Gets data from Kafka headers
 register("post-process-forwarder:kafka-headers", default=True)
+# Dispatch a single post process task for all events of the same group received within
+# this many milliseconds. Batching is disabled if set to 0.
+register("post-process-forwarder:group-batch-window-ms", default=0)
+# The maximum number of events processed by a single batched post process task.
+register("post-process-forwarder:group-batch-max-size", default=20)
 
 # Subscription queries sampling rate
 register("subscriptions-query.sample-rate", default=0.01)
@@ -437,6 +458,10 @@ register("subscriptions-query.sample-rate", default=0.01)
 # removed once it is fully rolled out.
 register("symbolicate-event.low-priority.metrics.submission-rate", default=0.0)
 
+# The maximum number of events the ingest consumer symbolicates through a single
+# `symbolicate_event_batch` task. Batching is disabled if set to 1 or less.
+register("symbolicate-event.batch-size", default=1)
+
 # Sampling rate for controlled rollout of a change where ignest-consumer spawns
 # special save_event task for transactions avoiding the preprocess.
 register("store.save-transactions-ingest-consumer-rate", default=0.0)
@@ -535,6 +560,10 @@ register("sentry-metrics.writes-limiter.limits.releasehealth.per-org", default=[
 register("sentry-metrics.writes-limiter.limits.performance.global", default=[])
 register("sentry-metrics.writes-limiter.limits.releasehealth.global", default=[])
 
+# Whether the postgres string indexer creates new strings with COPY and a
+# single INSERT ... RETURNING, instead of bulk_create and reading them back.
+register("sentry-metrics.indexer.copy-writes", default=False)
+
 # per-organization limits on the number of timeseries that can be observed in
 # each window.
 #
@@ -596,3 +625,7 @@ register("derive-code-mappings.dry-run.general-availability-rollout", default=0.
 # Allows adjusting the GA percentage
 register("derive-code-mappings.general-availability-rollout", default=0.0)
 register("hybrid_cloud.outbox_rate", default=0.0)
+
+# Rate at which transactions named by a transaction name clusterer rule extend
+# the lifetime of that rule.
+register("txnames.bump-lifetime-sample-rate", default=0.0)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Set
+
+from sentry.ownership.grammar import CODEOWNERS, MODULE, PATH, Matcher, Rule, load_schema
+from sentry.utils import json, metrics
+from sentry.utils.event_frames import find_stack_frames
+from sentry.utils.hashlib import md5_text
+from sentry.utils.lru import LRUCache
+from sentry.utils.safe import PathSearchable
+
+__all__ = ("OwnershipIndex", "get_ownership_index")
+
+OWNERSHIP_INDEX_CACHE_SIZE = 1000
+
+# Characters with a special meaning in glob patterns. A pattern's literal
+# prefix ends at the first of them.
+GLOB_SPECIAL_CHARS = frozenset("*?[{\\")
+
+# Characters with a special meaning in CODEOWNERS patterns, see `_path_to_regex`.
+CODEOWNERS_SPECIAL_CHARS = frozenset("*?")
+
+_ownership_index_cache: LRUCache[str, OwnershipIndex] = LRUCache(OWNERSHIP_INDEX_CACHE_SIZE)
+
+
+def _literal_prefix(pattern: str, special_chars: Iterable[str]) -> str:
+    for idx, char in enumerate(pattern):
+        if char in special_chars:
+            return pattern[:idx]
+    return pattern
+
+
+def _normalize_glob_value(value: str) -> str:
+    # `path` and `module` matchers are case insensitive and normalize path
+    # separators. Leading slashes are dropped on both sides, so that a
+    # pattern's prefix is a prefix of every value it matches.
+    return value.lower().replace("\\", "/").lstrip("/")
+
+
+class PrefixTrie:
+    """
+    A character trie mapping literal prefixes to the positions of the rules
+    they were extracted from.
+    """
+
+    # Strings within the trie are at least one character long, so the empty
+    # string can never clash with a child.
+    _RULES = ""
+
+    def __init__(self) -> None:
+        self.root: MutableMapping[str, Any] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.root)
+
+    def insert(self, prefix: str, position: int) -> None:
+        assert prefix
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(self._RULES, []).append(position)
+
+    def find(self, value: str, start: int, into: Set[int]) -> None:
+        """
+        Adds the positions of all rules whose prefix starts at `value[start]`
+        to `into`.
+        """
+        node = self.root
+        for idx in range(start, len(value)):
+            node = node.get(value[idx])
+            if node is None:
+                return
+            positions = node.get(self._RULES)
+            if positions:
+                into.update(positions)
+
+
+class OwnershipIndex:
+    """
+    A compiled form of an ownership schema that finds the rules matching an
+    event without testing every rule against every frame.
+
+    The literal prefixes of `path`, `module` and `codeowners` patterns are
+    stored in tries, which are walked once per frame value to select candidate
+    rules. Only the candidates, and rules that could not be indexed (`url`,
+    `tags.*` and patterns starting with a wildcard), are then tested against
+    the event. Matching rules are returned in schema order, so that callers
+    relying on the last matching rule winning see the same result as with
+    testing every rule.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = rules
+        self._unindexed: List[int] = []
+        self._path_trie = PrefixTrie()
+        self._module_trie = PrefixTrie()
+        # CODEOWNERS patterns containing a slash match from the start of a
+        # value, all others match from the start of any path segment.
+        self._codeowners_anchored_trie = PrefixTrie()
+        self._codeowners_unanchored_trie = PrefixTrie()
+
+        for position, rule in enumerate(rules):
+            if not self._index_rule(rule.matcher, position):
+                self._unindexed.append(position)
+
+    def _index_rule(self, matcher: Matcher, position: int) -> bool:
+        pattern = matcher.pattern
+        if not pattern:
+            return False
+
+        if matcher.type in (PATH, MODULE):
+            prefix = _normalize_glob_value(_literal_prefix(pattern, GLOB_SPECIAL_CHARS))
+            if not prefix or not prefix.isascii():
+                return False
+            trie = self._path_trie if matcher.type == PATH else self._module_trie
+            trie.insert(prefix, position)
+            return True
+
+        if matcher.type == CODEOWNERS:
+            if pattern[0] == "\\":
+                return False
+            slash_pos = pattern.find("/")
+            anchored = slash_pos > -1 and slash_pos != len(pattern) - 1
+            if anchored:
+                pattern = pattern[1:] if pattern[0] == "/" else pattern
+            prefix = _literal_prefix(pattern.rstrip("/"), CODEOWNERS_SPECIAL_CHARS)
+            if not prefix:
+                return False
+            trie = self._codeowners_anchored_trie if anchored else self._codeowners_unanchored_trie
+            trie.insert(prefix, position)
+            return True
+
+        return False
+
+    def _find_candidates(self, data: PathSearchable) -> Set[int]:
+        candidates = set(self._unindexed)
+
+        if self._path_trie or self._codeowners_anchored_trie or self._codeowners_unanchored_trie:
+            frames, keys = Matcher.munge_if_needed(data)
+            for value in _iter_frame_values(frames, keys):
+                self._path_trie.find(_normalize_glob_value(value), 0, candidates)
+
+                self._codeowners_anchored_trie.find(value, 0, candidates)
+                if value[0] == "/":
+                    self._codeowners_anchored_trie.find(value, 1, candidates)
+
+                if self._codeowners_unanchored_trie:
+                    self._codeowners_unanchored_trie.find(value, 0, candidates)
+                    slash_pos = value.find("/")
+                    while slash_pos > -1:
+                        self._codeowners_unanchored_trie.find(value, slash_pos + 1, candidates)
+                        slash_pos = value.find("/", slash_pos + 1)
+
+        if self._module_trie:
+            for value in _iter_frame_values(find_stack_frames(data), ["module"]):
+                self._module_trie.find(_normalize_glob_value(value), 0, candidates)
+
+        return candidates
+
+    def get_matching_rules(self, data: PathSearchable) -> Sequence[Rule]:
+        candidates = self._find_candidates(data)
+        metrics.timing("ownership.index.candidates", len(candidates))
+        return [
+            self.rules[position]
+            for position in sorted(candidates)
+            if self.rules[position].test(data)
+        ]
+
+
+def _iter_frame_values(frames: Sequence[Mapping[str, Any]], keys: Sequence[str]) -> Iterable[str]:
+    for frame in frames:
+        if not isinstance(frame, Mapping):
+            continue
+        for key in keys:
+            value = frame.get(key)
+            if value and isinstance(value, str):
+                yield value
+
+
+def get_ownership_index(schema: Optional[Mapping[str, Any]]) -> Optional[OwnershipIndex]:
+    """
+    Returns the `OwnershipIndex` for an ownership schema, building it on a
+    cache miss. Indexes are cached per process, keyed by the schema's content.
+    """
+    if schema is None:
+        return None
+
+    key = md5_text(json.dumps(schema)).hexdigest()
+    index = _ownership_index_cache.get(key)
+    if index is not None:
+        return index
+
+    metrics.incr("ownership.index.cache_miss")
+    index = OwnershipIndex(load_schema(schema))
+
+    _ownership_index_cache.set(key, index)
+    return index
@@ -113,3 +113,6 @@ register(key="sentry:performance_issue_creation_enabled_n_plus_one_db", default=
 # Contains a mapping from rule to last seen timestamp,
 # for example `{"/organizations/*/**": 1334318402}`
 register(key="sentry:transaction_name_cluster_rules", default={})
+# Identifies the current transaction name rules, for caches of data derived
+# from them.
+register(key="sentry:transaction_name_cluster_rules_version", default=None)
@@ -73,12 +73,30 @@ When using the quotas, the keys change as follows:
     sliding-window-rate-limit:123:3:902 = 1
     sliding-window-rate-limit:123:30:90 = 2
 
+Leases
+======
+
+`RedisSlidingWindowRateLimiter` can optionally be configured with a
+`lease_size`. In that mode, quota is reserved from Redis in chunks of (at
+least) `lease_size` units per `RequestedQuota.prefix` and set of quotas, and
+then handed out locally until the chunk is used up or `lease_ttl_seconds`
+have passed. This cuts Redis traffic by roughly a factor of `lease_size` for
+callers that request small amounts. Units are taken off a lease as soon as
+`check_within_quotas` grants them; `use_quotas` is a no-op in that mode.
+
+The trade-off is that leased but unused quota counts as used in Redis: every
+process can hold back up to `lease_size` units per prefix (for at most
+`lease_ttl_seconds`, plus the window length for the reservation to slide out
+of the window). Enforcement therefore errs on the side of granting less,
+never more, than the configured limits.
+
 """
 
+import threading
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from time import time
-from typing import Any, Iterator, MutableMapping, Optional, Sequence, Tuple
+from typing import Any, Iterator, List, MutableMapping, Optional, Sequence, Tuple
 
 from sentry.exceptions import InvalidConfiguration
 from sentry.utils import redis
@@ -171,6 +189,15 @@ class GrantedQuota:
 Timestamp = int
 
 
+@dataclass
+class _Lease:
+    # How much quota has been reserved in Redis but not used yet.
+    remaining: int
+
+    # The timestamp after which the remaining quota is discarded.
+    expires_at: Timestamp
+
+
 class SlidingWindowRateLimiter(Service):
     def __init__(self, **options: Any) -> None:
         pass
@@ -277,6 +304,15 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
     def __init__(self, **options: Any) -> None:
         cluster_key = options.get("cluster", "default")
         self.client = redis.redis_clusters.get(cluster_key)
+
+        # See "Leases" in the module docstring. Disabled if `None`.
+        self.lease_size: Optional[int] = options.get("lease_size")
+        self.lease_ttl_seconds: int = options.get("lease_ttl_seconds", 1)
+        self._leases: MutableMapping[Tuple[str, Tuple[Quota, ...]], _Lease] = {}
+        # Limiters are shared by the threads of a consumer. The lock is held
+        # while leases are taken out in Redis, so that threads do not each
+        # reserve a lease for the same prefix.
+        self._leases_lock = threading.Lock()
         super().__init__(**options)
 
     def validate(self) -> None:
@@ -315,6 +351,98 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
         else:
             timestamp = int(timestamp)
 
+        if self.lease_size is not None:
+            return timestamp, self._check_within_leases(requests, timestamp)
+
+        return timestamp, self._check_within_redis_quotas(requests, timestamp)
+
+    def _get_lease_key(self, request: RequestedQuota) -> Tuple[str, Tuple[Quota, ...]]:
+        return request.prefix, tuple(request.quotas)
+
+    def _get_lease(self, request: RequestedQuota, timestamp: Timestamp) -> Optional[_Lease]:
+        lease_key = self._get_lease_key(request)
+        lease = self._leases.get(lease_key)
+        if lease is not None and lease.expires_at <= timestamp:
+            del self._leases[lease_key]
+            return None
+        return lease
+
+    def _check_within_leases(
+        self, requests: Sequence[RequestedQuota], timestamp: Timestamp
+    ) -> Sequence[GrantedQuota]:
+        assert self.lease_size is not None
+
+        results: MutableMapping[int, GrantedQuota] = {}
+
+        # Indices of requests that do not fit into their lease. Once one
+        # request for a lease does not fit, later ones wait for it as well.
+        pending: MutableMapping[Tuple[str, Tuple[Quota, ...]], List[int]] = {}
+
+        # Granted units are taken off the lease right away, while the lock is
+        # held, so that concurrent checks (or several checks before a
+        # `use_quotas`) cannot be granted the same units.
+        with self._leases_lock:
+            for i, request in enumerate(requests):
+                lease_key = self._get_lease_key(request)
+                lease = self._get_lease(request, timestamp)
+
+                if (
+                    lease_key not in pending
+                    and lease is not None
+                    and lease.remaining >= request.requested
+                ):
+                    lease.remaining -= request.requested
+                    results[i] = GrantedQuota(
+                        prefix=request.prefix, granted=request.requested, reached_quotas=[]
+                    )
+                else:
+                    pending.setdefault(lease_key, []).append(i)
+
+            if pending:
+                # Reserve enough for all pending requests of a lease and the
+                # next lease_size units, on top of what is still left of it.
+                lease_requests = []
+                for indices in pending.values():
+                    request = requests[indices[0]]
+                    lease = self._get_lease(request, timestamp)
+                    requested = sum(requests[i].requested for i in indices)
+                    lease_requests.append(
+                        replace(
+                            request,
+                            requested=max(
+                                requested - (lease.remaining if lease is not None else 0),
+                                self.lease_size,
+                            ),
+                        )
+                    )
+
+                lease_grants = self._check_within_redis_quotas(lease_requests, timestamp)
+                self._use_redis_quotas(lease_requests, lease_grants, timestamp)
+
+                for (lease_key, indices), request, grant in zip(
+                    pending.items(), lease_requests, lease_grants
+                ):
+                    lease = self._get_lease(request, timestamp)
+                    lease = self._leases[lease_key] = _Lease(
+                        remaining=grant.granted + (lease.remaining if lease is not None else 0),
+                        expires_at=timestamp + self.lease_ttl_seconds,
+                    )
+
+                    for i in indices:
+                        requested = requests[i].requested
+                        granted = min(requested, lease.remaining)
+                        lease.remaining -= granted
+                        results[i] = GrantedQuota(
+                            prefix=request.prefix,
+                            granted=granted,
+                            reached_quotas=grant.reached_quotas if granted < requested else [],
+                        )
+
+        return [results[i] for i in range(len(requests))]
+
+    def _check_within_redis_quotas(
+        self, requests: Sequence[RequestedQuota], timestamp: Timestamp
+    ) -> Sequence[GrantedQuota]:
         keys_to_fetch = set()
         for request in requests:
             # We could potentially run this check inside of __post__init__ of
@@ -394,7 +522,7 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
                 )
             )
 
-        return timestamp, results
+        return results
 
     def use_quotas(
         self,
@@ -404,6 +532,21 @@ class RedisSlidingWindowRateLimiter(SlidingWindowRateLimiter):
     ) -> None:
         assert len(requests) == len(grants)
 
+        if self.lease_size is not None:
+            # The quota has already been consumed in Redis when the lease was
+            # taken out, and the grants have been taken off the lease in
+            # `check_within_quotas`.
+            return
+
+        self._use_redis_quotas(requests, grants, timestamp)
+
+    def _use_redis_quotas(
+        self,
+        requests: Sequence[RequestedQuota],
+        grants: Sequence[GrantedQuota],
+        timestamp: Timestamp,
+    ) -> None:
+
         keys_to_incr: MutableMapping[str, int] = {}
         keys_ttl: MutableMapping[str, int] = {}
 
@@ -0,0 +1,25 @@
+-- Estimate the cardinality of a HyperLogLog cardinality limiter window and
+-- check which of the given hashes have (probably) not been observed in it yet.
+--
+-- KEYS[1] is a scratch key the granules are merged into, KEYS[2..n] are the
+-- per-granule HyperLogLog keys of the window. ARGV are the unit hashes.
+--
+-- Returns the estimated cardinality of the window, followed by one flag per
+-- hash: 1 if the hash is new to the window, 0 if it has (probably) been seen.
+assert(#KEYS >= 2, "provide a scratch key and at least one granule key")
+
+local scratch_key = KEYS[1]
+
+redis.call("PFMERGE", scratch_key, unpack(KEYS, 2))
+
+local result = {redis.call("PFCOUNT", scratch_key)}
+
+for i = 1, #ARGV do
+    -- PFADD only returns 1 if a register was altered, i.e. the hash has
+    -- not been observed within the window (or earlier in this request).
+    result[i + 1] = redis.call("PFADD", scratch_key, ARGV[i])
+end
+
+redis.call("DEL", scratch_key)
+
+return result
@@ -45,6 +45,9 @@ class MetricsIngestConfiguration:
     cardinality_limiter_namespace: str
     index_tag_values_option_name: Optional[str] = None
     is_output_sliced: Optional[bool] = False
+    # Name of the string table shared by the processes of the parallel
+    # indexer, see `sentry.sentry_metrics.indexer.shared_table`.
+    shared_string_table_name: Optional[str] = None
 
 
 _METRICS_INGEST_CONFIG_BY_USE_CASE: MutableMapping[
@@ -186,3 +189,8 @@ def initialize_global_consumer_state(config: MetricsIngestConfiguration) -> None
 
     metrics_wrapper = MetricsWrapper(backend, name="sentry_metrics.indexer", tags=global_tag_map)
     configure_metrics(metrics_wrapper)
+
+    if config.shared_string_table_name:
+        from sentry.sentry_metrics.indexer.shared_table import attach_shared_string_table
+
+        attach_shared_string_table(config.shared_string_table_name)
@@ -1,8 +1,9 @@
 import logging
 import random
+from array import array
 from collections import defaultdict
 from typing import (
-    Any,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
@@ -10,6 +11,7 @@ from typing import (
     Optional,
     Sequence,
     Set,
+    Tuple,
     TypedDict,
     cast,
 )
@@ -35,6 +37,11 @@ MAX_TAG_VALUE_LENGTH = 200
 ACCEPTED_METRIC_TYPES = {"s", "c", "d"}  # set, counter, distribution
 
 
+# The fields of inbound messages, other than the name and tags, which are not
+# passed through to the output as they are replaced.
+REPLACED_KEYS = frozenset(("metric_id", "retention_days", "mapping_meta", "use_case_id"))
+
+
 class PartitionIdxOffset(NamedTuple):
     partition_idx: int
     offset: int
@@ -54,12 +61,20 @@ def _should_sample_debug_log() -> bool:
     return (rate > 0) and random.random() <= rate
 
 
+def valid_tag_key(key: Optional[str]) -> bool:
+    return key is not None and len(key) <= MAX_TAG_KEY_LENGTH
+
+
+def valid_tag_value(value: Optional[str]) -> bool:
+    return value is not None and len(value) <= MAX_TAG_VALUE_LENGTH
+
+
 def invalid_metric_tags(tags: Mapping[str, str]) -> Sequence[str]:
     invalid_strs: List[str] = []
     for key, value in tags.items():
-        if key is None or len(key) > MAX_TAG_KEY_LENGTH:
+        if not valid_tag_key(key):
             invalid_strs.append(key)
-        if value is None or len(value) > MAX_TAG_VALUE_LENGTH:
+        if not valid_tag_value(value):
             invalid_strs.append(value)
 
     return invalid_strs
@@ -73,6 +88,118 @@ class InboundMessage(TypedDict):
     tags: Mapping[str, str]
 
 
+class StringTable:
+    """
+    Interns the strings of a batch. Every distinct string is assigned an id,
+    its position in ``strings``, so that it is stored, hashed and validated
+    once per batch instead of once per message.
+    """
+
+    def __init__(self) -> None:
+        #: Map from string to id. Ids are assigned in insertion order.
+        self.ids: MutableMapping[Optional[str], int] = {}
+        self.__strings: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def strings(self) -> Sequence[Optional[str]]:
+        if len(self.__strings) != len(self.ids):
+            self.__strings = list(self.ids)
+        return self.__strings
+
+    def intern(self, string: Optional[str]) -> int:
+        return self.ids.setdefault(string, len(self.ids))
+
+
+class MessageColumns:
+    """
+    The org ids, metric names, metric types and tags of the messages of a
+    batch, stored column-wise with names and tags replaced by their ids in
+    ``table``.
+
+    The tags of row ``i`` are stored at positions ``tag_starts[i]`` up to
+    ``tag_starts[i + 1]`` of ``tag_key_ids`` and ``tag_value_ids``.
+    """
+
+    def __init__(self) -> None:
+        self.table = StringTable()
+        self.org_ids = array("q")
+        self.name_ids = array("q")
+        self.types: List[Optional[str]] = []
+        self.tag_starts = array("q", [0])
+        self.tag_key_ids = array("q")
+        self.tag_value_ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self.org_ids)
+
+    def append(
+        self,
+        org_id: int,
+        name: Optional[str],
+        metric_type: Optional[str],
+        tags: Mapping[str, str],
+    ) -> int:
+        """Adds the columns of a message, returning its row."""
+        # Interning is inlined, as this runs for every string of every message.
+        ids = self.table.ids
+        name_id = ids.setdefault(name, len(ids))
+        key_ids = [ids.setdefault(key, len(ids)) for key in tags]
+        value_ids = [ids.setdefault(value, len(ids)) for value in tags.values()]
+
+        self.org_ids.append(org_id)
+        self.name_ids.append(name_id)
+        self.types.append(metric_type)
+        self.tag_key_ids.extend(key_ids)
+        self.tag_value_ids.extend(value_ids)
+        self.tag_starts.append(len(self.tag_key_ids))
+        return len(self.org_ids) - 1
+
+    def tag_ids(self, row: int) -> Tuple[Sequence[int], Sequence[int]]:
+        """Returns the ids of the tag keys and values of a row."""
+        start, end = self.tag_starts[row], self.tag_starts[row + 1]
+        return self.tag_key_ids[start:end], self.tag_value_ids[start:end]
+
+    def tags(self, row: int) -> Mapping[str, str]:
+        strings = self.table.strings
+        return {
+            cast(str, strings[key_id]): cast(str, strings[value_id])
+            for key_id, value_id in zip(*self.tag_ids(row))
+        }
+
+    def inbound_message(self, row: int) -> InboundMessage:
+        return {
+            "org_id": self.org_ids[row],
+            "name": cast(str, self.table.strings[self.name_ids[row]]),
+            "type": cast(str, self.types[row]),
+            "tags": self.tags(row),
+        }
+
+
+class InboundMessages(Mapping[PartitionIdxOffset, InboundMessage]):
+    """
+    The parsed messages of a batch by offset, which are built from the
+    columns of the batch when accessed.
+    """
+
+    def __init__(
+        self, columns: MessageColumns, rows_by_offset: Mapping[PartitionIdxOffset, int]
+    ) -> None:
+        self.__columns = columns
+        self.__rows_by_offset = rows_by_offset
+
+    def __getitem__(self, partition_offset: PartitionIdxOffset) -> InboundMessage:
+        return self.__columns.inbound_message(self.__rows_by_offset[partition_offset])
+
+    def __iter__(self) -> Iterator[PartitionIdxOffset]:
+        return iter(self.__rows_by_offset)
+
+    def __len__(self) -> int:
+        return len(self.__rows_by_offset)
+
+
 class IndexerBatch:
     def __init__(
         self,
@@ -91,14 +218,28 @@ class IndexerBatch:
     @metrics.wraps("process_messages.extract_messages")
     def _extract_messages(self) -> None:
         self.skipped_offsets: Set[PartitionIdxOffset] = set()
-        self.parsed_payloads_by_offset: MutableMapping[PartitionIdxOffset, InboundMessage] = {}
+        # The org ids, names, types and tags of all parsed messages, which are
+        # the parts of the messages the extraction and reconstruction stages
+        # operate on.
+        self.columns = MessageColumns()
+        self.rows_by_offset: MutableMapping[PartitionIdxOffset, int] = {}
+        # The serialized fields of every parsed message which are passed
+        # through to the output as-is, without the enclosing braces. Parsed
+        # payloads are not kept around.
+        self.passthrough_fields_by_offset: MutableMapping[PartitionIdxOffset, str] = {}
+        self.parsed_payloads_by_offset: Mapping[
+            PartitionIdxOffset, InboundMessage
+        ] = InboundMessages(self.columns, self.rows_by_offset)
+
+        replaced_keys = REPLACED_KEYS
+        if not self.__should_index_tag_values:
+            replaced_keys |= {"version"}
 
         for msg in self.outer_message.payload:
             assert isinstance(msg.value, BrokerValue)
             partition_offset = PartitionIdxOffset(msg.value.partition.index, msg.value.offset)
             try:
                 parsed_payload = json.loads(msg.payload.value.decode("utf-8"), use_rapid_json=True)
-                self.parsed_payloads_by_offset[partition_offset] = parsed_payload
             except rapidjson.JSONDecodeError:
                 self.skipped_offsets.add(partition_offset)
                 logger.error(
@@ -108,6 +249,20 @@ class IndexerBatch:
                 )
                 continue
 
+            self.rows_by_offset[partition_offset] = self.columns.append(
+                parsed_payload["org_id"],
+                parsed_payload["name"],
+                parsed_payload.get("type"),
+                parsed_payload.get("tags", {}),
+            )
+            del parsed_payload["name"]
+            parsed_payload.pop("tags", None)
+            if not replaced_keys.isdisjoint(parsed_payload):
+                for key in replaced_keys:
+                    parsed_payload.pop(key, None)
+            passthrough_fields = rapidjson.dumps(parsed_payload)
+            self.passthrough_fields_by_offset[partition_offset] = passthrough_fields[1:-1]
+
     @metrics.wraps("process_messages.filter_messages")
     def filter_messages(self, keys_to_remove: Sequence[PartitionIdxOffset]) -> None:
         metrics.incr(
@@ -121,7 +276,7 @@ class IndexerBatch:
         # XXX: it is useful to be able to get a sample of organization ids that are affected by rate limits, but this is really slow.
         for offset in keys_to_remove:
             sentry_sdk.set_tag(
-                "sentry_metrics.organization_id", self.parsed_payloads_by_offset[offset]["org_id"]
+                "sentry_metrics.organization_id", self.columns.org_ids[self.rows_by_offset[offset]]
             )
             if _should_sample_debug_log():
                 logger.error(
@@ -135,25 +290,32 @@ class IndexerBatch:
 
     @metrics.wraps("process_messages.extract_strings")
     def extract_strings(self) -> Mapping[int, Set[str]]:
-        org_strings = defaultdict(set)
-
-        for partition_offset, message in self.parsed_payloads_by_offset.items():
+        columns = self.columns
+        strings = columns.table.strings
+        org_string_ids: MutableMapping[int, Set[int]] = defaultdict(set)
+
+        # Every distinct name, tag key and tag value is validated only once
+        invalid_name_ids = {i for i in set(columns.name_ids) if not valid_metric_name(strings[i])}
+        invalid_key_ids = {i for i in set(columns.tag_key_ids) if not valid_tag_key(strings[i])}
+        invalid_value_ids = {
+            i for i in set(columns.tag_value_ids) if not valid_tag_value(strings[i])
+        }
+
+        for partition_offset, row in self.rows_by_offset.items():
             if partition_offset in self.skipped_offsets:
                 continue
 
             partition_idx, offset = partition_offset
 
-            metric_name = message["name"]
-            metric_type = message["type"]
-            org_id = message["org_id"]
-            tags = message.get("tags", {})
+            name_id = columns.name_ids[row]
+            org_id = columns.org_ids[row]
 
-            if not valid_metric_name(metric_name):
+            if name_id in invalid_name_ids:
                 logger.error(
                     "process_messages.invalid_metric_name",
                     extra={
                         "org_id": org_id,
-                        "metric_name": metric_name,
+                        "metric_name": strings[name_id],
                         "partition": partition_idx,
                         "offset": offset,
                     },
@@ -161,6 +323,7 @@ class IndexerBatch:
                 self.skipped_offsets.add(partition_offset)
                 continue
 
+            metric_type = columns.types[row]
             if metric_type not in ACCEPTED_METRIC_TYPES:
                 logger.error(
                     "process_messages.invalid_metric_type",
@@ -169,16 +332,20 @@ class IndexerBatch:
                 self.skipped_offsets.add(partition_offset)
                 continue
 
-            invalid_strs = invalid_metric_tags(tags)
+            key_ids, value_ids = columns.tag_ids(row)
 
-            if invalid_strs:
+            if not (
+                invalid_key_ids.isdisjoint(key_ids) and invalid_value_ids.isdisjoint(value_ids)
+            ):
+                tags = columns.tags(row)
+                invalid_strs = invalid_metric_tags(tags)
                 # sentry doesn't seem to actually capture nested logger.error extra args
                 sentry_sdk.set_extra("all_metric_tags", tags)
                 logger.error(
                     "process_messages.invalid_tags",
                     extra={
                         "org_id": org_id,
-                        "metric_name": metric_name,
+                        "metric_name": strings[name_id],
                         "invalid_tags": invalid_strs,
                         "partition": partition_idx,
                         "offset": offset,
@@ -187,15 +354,16 @@ class IndexerBatch:
                 self.skipped_offsets.add(partition_offset)
                 continue
 
-            parsed_strings = {
-                metric_name,
-                *tags.keys(),
-            }
-
+            string_ids = org_string_ids[org_id]
+            string_ids.add(name_id)
+            string_ids.update(key_ids)
             if self.__should_index_tag_values:
-                parsed_strings.update(tags.values())
+                string_ids.update(value_ids)
 
-            org_strings[org_id].update(parsed_strings)
+        org_strings = {
+            org_id: {cast(str, strings[string_id]) for string_id in string_ids}
+            for org_id, string_ids in org_string_ids.items()
+        }
 
         string_count = 0
         for org_set in org_strings:
@@ -211,9 +379,25 @@ class IndexerBatch:
         bulk_record_meta: Mapping[int, Mapping[str, Metadata]],
     ) -> IndexerOutputMessageBatch:
         new_messages: IndexerOutputMessageBatch = []
+        columns = self.columns
+        strings = columns.table.strings
+        # The `mapping_meta` entry of every string as (fetch type, id, string),
+        # or None for strings without metadata. Built once per org and string
+        # instead of once per message.
+        meta_entries: MutableMapping[
+            int, MutableMapping[int, Optional[Tuple[str, str, str]]]
+        ] = defaultdict(dict)
+        # The indexed id of every string by org, looked up in `mapping` once
+        # per org and string instead of once per message.
+        indexed_ids: MutableMapping[int, MutableMapping[int, Optional[int]]] = defaultdict(dict)
+        should_index_tag_values = self.__should_index_tag_values
+        # The fields added to every output message, serialized once.
+        version_field = "" if should_index_tag_values else '"version":2,'
+        batch_fields = ',"retention_days":90,"use_case_id":%s' % rapidjson.dumps(
+            self.use_case_id.value
+        )
 
         for message in self.outer_message.payload:
-            used_tags: Set[str] = set()
             output_message_meta: Mapping[str, MutableMapping[str, str]] = defaultdict(dict)
             assert isinstance(message.value, BrokerValue)
             partition_offset = PartitionIdxOffset(
@@ -228,27 +412,30 @@ class IndexerBatch:
                     },
                 )
                 continue
-            new_payload_value = cast(
-                MutableMapping[Any, Any],
-                self.parsed_payloads_by_offset.pop(partition_offset),
-            )
+            passthrough_fields = self.passthrough_fields_by_offset.pop(partition_offset)
 
-            metric_name = new_payload_value["name"]
-            org_id = new_payload_value["org_id"]
+            row = self.rows_by_offset[partition_offset]
+            name_id = columns.name_ids[row]
+            metric_name = cast(str, strings[name_id])
+            org_id = columns.org_ids[row]
             sentry_sdk.set_tag("sentry_metrics.organization_id", org_id)
-            tags = new_payload_value.get("tags", {})
-            used_tags.add(metric_name)
+            key_ids, value_ids = columns.tag_ids(row)
 
             new_tags: MutableMapping[str, int] = {}
             exceeded_global_quotas = 0
             exceeded_org_quotas = 0
 
+            org_indexed_ids = indexed_ids[org_id]
             try:
-                for k, v in tags.items():
-                    used_tags.update({k, v})
-                    new_k = mapping[org_id][k]
+                for key_id, value_id in zip(key_ids, value_ids):
+                    try:
+                        new_k = org_indexed_ids[key_id]
+                    except KeyError:
+                        new_k = org_indexed_ids[key_id] = mapping[org_id][
+                            cast(str, strings[key_id])
+                        ]
                     if new_k is None:
-                        metadata = bulk_record_meta[org_id].get(k)
+                        metadata = bulk_record_meta[org_id].get(cast(str, strings[key_id]))
                         if (
                             metadata
                             and metadata.fetch_type_ext
@@ -259,9 +446,13 @@ class IndexerBatch:
                             exceeded_org_quotas += 1
                         continue
 
+                    v = cast(str, strings[value_id])
                     value_to_write = v
-                    if self.__should_index_tag_values:
-                        new_v = mapping[org_id][v]
+                    if should_index_tag_values:
+                        try:
+                            new_v = org_indexed_ids[value_id]
+                        except KeyError:
+                            new_v = org_indexed_ids[value_id] = mapping[org_id][v]
                         if new_v is None:
                             metadata = bulk_record_meta[org_id].get(v)
                             if (
@@ -278,7 +469,11 @@ class IndexerBatch:
 
                     new_tags[str(new_k)] = value_to_write
             except KeyError:
-                logger.error("process_messages.key_error", extra={"tags": tags}, exc_info=True)
+                logger.error(
+                    "process_messages.key_error",
+                    extra={"tags": columns.tags(row)},
+                    exc_info=True,
+                )
                 continue
 
             if exceeded_org_quotas or exceeded_global_quotas:
@@ -302,24 +497,26 @@ class IndexerBatch:
                     )
                 continue
 
-            fetch_types_encountered = set()
-            for tag in used_tags:
-                if tag in bulk_record_meta[org_id]:
-                    metadata = bulk_record_meta[org_id][tag]
-                    fetch_types_encountered.add(metadata.fetch_type)
-                    output_message_meta[metadata.fetch_type.value][str(metadata.id)] = tag
+            org_meta_entries = meta_entries[org_id]
+            for string_id in {name_id, *key_ids, *value_ids}:
+                try:
+                    entry = org_meta_entries[string_id]
+                except KeyError:
+                    tag = cast(str, strings[string_id])
+                    metadata = bulk_record_meta[org_id].get(tag)
+                    entry = org_meta_entries[string_id] = (
+                        (metadata.fetch_type.value, str(metadata.id), tag)
+                        if metadata is not None
+                        else None
+                    )
 
-            mapping_header_content = bytes(
-                "".join(sorted(t.value for t in fetch_types_encountered)), "utf-8"
-            )
+                if entry is not None:
+                    fetch_type, string_id_str, tag = entry
+                    output_message_meta[fetch_type][string_id_str] = tag
+
+            mapping_header_content = bytes("".join(sorted(output_message_meta)), "utf-8")
 
-            # When sending tag values as strings, set the version on the payload
-            # to 2. This is used by the consumer to determine how to decode the
-            # tag values.
-            if not self.__should_index_tag_values:
-                new_payload_value["version"] = 2
-            new_payload_value["tags"] = new_tags
-            new_payload_value["metric_id"] = numeric_metric_id = mapping[org_id][metric_name]
+            numeric_metric_id = mapping[org_id][metric_name]
             if numeric_metric_id is None:
                 metadata = bulk_record_meta[org_id].get(metric_name)
                 metrics.incr(
@@ -344,19 +541,26 @@ class IndexerBatch:
                     )
                 continue
 
-            new_payload_value["retention_days"] = 90
-            new_payload_value["mapping_meta"] = output_message_meta
-            new_payload_value["use_case_id"] = self.use_case_id.value
-
-            del new_payload_value["name"]
+            # The output payload is the passed through fields of the inbound
+            # payload along with the indexed fields. When sending tag values as
+            # strings, set the version on the payload to 2. This is used by the
+            # consumer to determine how to decode the tag values.
+            new_payload_value = '{%s%s"tags":%s,"metric_id":%d,"mapping_meta":%s%s}' % (
+                passthrough_fields + "," if passthrough_fields else "",
+                version_field,
+                rapidjson.dumps(new_tags),
+                numeric_metric_id,
+                rapidjson.dumps(output_message_meta),
+                batch_fields,
+            )
 
             kafka_payload = KafkaPayload(
                 key=message.payload.key,
-                value=rapidjson.dumps(new_payload_value).encode(),
+                value=new_payload_value.encode(),
                 headers=[
                     *message.payload.headers,
                     ("mapping_sources", mapping_header_content),
-                    ("metric_type", new_payload_value["type"]),
+                    ("metric_type", columns.types[row]),
                 ],
             )
             if self.is_output_sliced:
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import dataclasses
 import functools
 import logging
 from typing import Any, Mapping, Optional, Union
@@ -30,6 +31,7 @@ from sentry.sentry_metrics.consumers.indexer.routing_producer import (
     RoutingProducerStep,
 )
 from sentry.sentry_metrics.consumers.indexer.slicing_router import SlicingRouter
+from sentry.sentry_metrics.indexer.shared_table import create_shared_string_table
 from sentry.utils.batching_kafka_consumer import create_topics
 
 logger = logging.getLogger(__name__)
@@ -188,6 +190,15 @@ def get_parallel_metrics_consumer(
     slicing_router: Optional[SlicingRouter],
     **options: Mapping[str, Union[str, int]],
 ) -> StreamProcessor[KafkaPayload]:
+    shared_table_size = settings.SENTRY_METRICS_INDEXER_SHARED_TABLE_SIZE
+    if shared_table_size and processes > 1:
+        # Created before any process is started, the processes attach to the
+        # table in `initialize_global_consumer_state`.
+        shared_table = create_shared_string_table(shared_table_size)
+        indexer_profile = dataclasses.replace(
+            indexer_profile, shared_string_table_name=shared_table.name
+        )
+
     processing_factory = MetricsConsumerStrategyFactory(
         max_msg_batch_size=max_msg_batch_size,
         max_msg_batch_time=max_msg_batch_time,
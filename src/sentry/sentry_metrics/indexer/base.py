@@ -20,6 +20,7 @@ from sentry.utils.services import Service
 
 class FetchType(Enum):
     CACHE_HIT = "c"
+    LOCAL_CACHE_HIT = "l"
     HARDCODED = "h"
     DB_READ = "d"
     FIRST_SEEN = "f"
@@ -210,7 +211,7 @@ class StringIndexer(Service):
 
         There are three steps to getting the ids for strings:
             0. ids from static strings (StaticStringIndexer)
-            1. ids from cache (CachingIndexer)
+            1. ids from in-process and shared cache (CachingIndexer)
             2. ids from existing db records (postgres/spanner)
             3. ids that have been rate limited (postgres/spanner)
             4. ids from newly created db records (postgres/spanner)
@@ -1,6 +1,6 @@
 import logging
 import random
-from typing import Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Mapping, MutableMapping, Optional, Sequence, Set, Tuple
 
 from django.conf import settings
 from django.core.cache import caches
@@ -13,12 +13,16 @@ from sentry.sentry_metrics.indexer.base import (
     KeyResults,
     StringIndexer,
 )
+from sentry.sentry_metrics.indexer.shared_table import get_shared_string_table
 from sentry.utils import metrics
 from sentry.utils.hashlib import md5_text
+from sentry.utils.lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
 _INDEXER_CACHE_METRIC = "sentry_metrics.indexer.memcache"
+_INDEXER_LOCAL_CACHE_METRIC = "sentry_metrics.indexer.local_cache"
+_INDEXER_SHARED_TABLE_FULL_METRIC = "sentry_metrics.indexer.shared_table.full"
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
 
@@ -97,16 +101,141 @@ class StringIndexerCache:
         self.cache.delete_many(cache_keys, version=self.version)
 
 
+class StringIndexerLocalCache:
+    """
+    A bounded, in-process LRU cache of string/id mappings, which sits in front
+    of the shared `StringIndexerCache`.
+
+    Entries are keyed by `(use_case_id, org_id, string)`, and the reverse
+    mapping `(use_case_id, org_id, id)` is kept alongside, so that both
+    `resolve` and `reverse_resolve` can be served from memory. Since the id of
+    a string never changes once it has been assigned, entries do not expire
+    and are only evicted when the cache is full.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._ids: LRUCache[Tuple[str, int, str], int] = LRUCache(max_size)
+        # Reverse entries are checked against `_ids` when they are read, and
+        # dropped along with the entries they belong to.
+        self._strings: MutableMapping[Tuple[str, int, int], str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, use_case_id: str, org_id: int, string: str) -> Optional[int]:
+        return self._ids.get((use_case_id, org_id, string))
+
+    def get_string(self, use_case_id: str, org_id: int, id: int) -> Optional[str]:
+        string = self._strings.get((use_case_id, org_id, id))
+        if string is None or self._ids.get((use_case_id, org_id, string)) != id:
+            return None
+        return string
+
+    def set(self, use_case_id: str, org_id: int, string: str, id: int) -> None:
+        self._strings[(use_case_id, org_id, id)] = string
+        evicted = self._ids.set((use_case_id, org_id, string), id)
+        for (evicted_use_case_id, evicted_org_id, _), evicted_id in evicted:
+            self._strings.pop((evicted_use_case_id, evicted_org_id, evicted_id), None)
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._strings.clear()
+
+
 class CachingIndexer(StringIndexer):
-    def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
+    def __init__(
+        self,
+        cache: StringIndexerCache,
+        indexer: StringIndexer,
+        local_cache_size: Optional[int] = None,
+    ) -> None:
         self.cache = cache
         self.indexer = indexer
 
+        if local_cache_size is None:
+            local_cache_size = settings.SENTRY_METRICS_INDEXER_LOCAL_CACHE_SIZE
+        self.local_cache = StringIndexerLocalCache(local_cache_size) if local_cache_size else None
+
+    def _get_local(self, use_case_id: UseCaseKey, org_id: int, string: str) -> Optional[int]:
+        """
+        Looks up a string in the in-process cache, and then in the table
+        shared by the indexer processes on this host.
+        """
+        if self.local_cache is not None:
+            id = self.local_cache.get(use_case_id.value, org_id, string)
+            if id is not None:
+                return id
+
+        shared_table = get_shared_string_table()
+        if shared_table is None:
+            return None
+
+        id = shared_table.get(use_case_id.value, org_id, string)
+        if id is not None and self.local_cache is not None:
+            self.local_cache.set(use_case_id.value, org_id, string, id)
+        return id
+
+    def _get_many_local(self, use_case_id: UseCaseKey, keys: KeyCollection) -> Optional[KeyResults]:
+        if self.local_cache is None and get_shared_string_table() is None:
+            return None
+
+        local_key_results = KeyResults()
+        for org_id, strings in keys.mapping.items():
+            for string in strings:
+                id = self._get_local(use_case_id, org_id, string)
+                if id is not None:
+                    local_key_results.add_key_result(
+                        KeyResult(org_id, string, id), FetchType.LOCAL_CACHE_HIT
+                    )
+
+        hits = sum(len(strings) for strings in local_key_results.results.values())
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC,
+            tags={"cache_hit": "true", "caller": "get_many_ids"},
+            amount=hits,
+        )
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC,
+            tags={"cache_hit": "false", "caller": "get_many_ids"},
+            amount=keys.size - hits,
+        )
+        return local_key_results
+
+    def _set_many_local(self, use_case_id: UseCaseKey, key_values: Mapping[str, int]) -> None:
+        shared_table = get_shared_string_table()
+        if self.local_cache is None and shared_table is None:
+            return
+
+        dropped = 0
+        for key, id in key_values.items():
+            org_id, string = key.split(":", 1)
+            if self.local_cache is not None:
+                self.local_cache.set(use_case_id.value, int(org_id), string, id)
+            if shared_table is not None and not shared_table.set(
+                use_case_id.value, int(org_id), string, id
+            ):
+                dropped += 1
+
+        if dropped:
+            metrics.incr(_INDEXER_SHARED_TABLE_FULL_METRIC, amount=dropped)
+
     def bulk_record(
         self, use_case_id: UseCaseKey, org_strings: Mapping[int, Set[str]]
     ) -> KeyResults:
-        cache_keys = KeyCollection(org_strings)
-        metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
+        keys = KeyCollection(org_strings)
+        metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=keys.size)
+
+        local_key_results = self._get_many_local(use_case_id, keys)
+        if local_key_results is None:
+            return self._bulk_record_shared(use_case_id, keys)
+
+        cache_keys = local_key_results.get_unmapped_keys(keys)
+        if cache_keys.size == 0:
+            return local_key_results
+
+        return local_key_results.merge(self._bulk_record_shared(use_case_id, cache_keys))
+
+    def _bulk_record_shared(self, use_case_id: UseCaseKey, cache_keys: KeyCollection) -> KeyResults:
         cache_key_strs = cache_keys.as_strings()
         cache_results = self.cache.get_many(cache_key_strs, use_case_id.value)
 
@@ -133,6 +262,7 @@ class CachingIndexer(StringIndexer):
             [KeyResult.from_string(k, v) for k, v in cache_results.items() if v is not None],
             FetchType.CACHE_HIT,
         )
+        self._set_many_local(use_case_id, cache_key_results.get_mapped_key_strings_to_ints())
 
         db_record_keys = cache_key_results.get_unmapped_keys(cache_keys)
 
@@ -140,9 +270,9 @@ class CachingIndexer(StringIndexer):
             return cache_key_results
 
         db_record_key_results = self.indexer.bulk_record(use_case_id, db_record_keys.mapping)
-        self.cache.set_many(
-            db_record_key_results.get_mapped_key_strings_to_ints(), use_case_id.value
-        )
+        db_record_key_strs_to_ints = db_record_key_results.get_mapped_key_strings_to_ints()
+        self.cache.set_many(db_record_key_strs_to_ints, use_case_id.value)
+        self._set_many_local(use_case_id, db_record_key_strs_to_ints)
         return cache_key_results.merge(db_record_key_results)
 
     def record(self, use_case_id: UseCaseKey, org_id: int, string: str) -> Optional[int]:
@@ -150,11 +280,21 @@ class CachingIndexer(StringIndexer):
         return result[org_id][string]
 
     def resolve(self, use_case_id: UseCaseKey, org_id: int, string: str) -> Optional[int]:
+        if self.local_cache is not None or get_shared_string_table() is not None:
+            result = self._get_local(use_case_id, org_id, string)
+            metrics.incr(
+                _INDEXER_LOCAL_CACHE_METRIC,
+                tags={"cache_hit": str(result is not None).lower(), "caller": "resolve"},
+            )
+            if result is not None:
+                return result
+
         key = f"{org_id}:{string}"
         result = self.cache.get(key, use_case_id.value)
 
         if result and isinstance(result, int):
             metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "true", "caller": "resolve"})
+            self._set_many_local(use_case_id, {key: result})
             return result
 
         metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "false", "caller": "resolve"})
@@ -162,8 +302,24 @@ class CachingIndexer(StringIndexer):
 
         if id is not None:
             self.cache.set(key, id, use_case_id.value)
+            self._set_many_local(use_case_id, {key: id})
 
         return id
 
     def reverse_resolve(self, use_case_id: UseCaseKey, org_id: int, id: int) -> Optional[str]:
-        return self.indexer.reverse_resolve(use_case_id, org_id, id)
+        if self.local_cache is None:
+            return self.indexer.reverse_resolve(use_case_id, org_id, id)
+
+        string = self.local_cache.get_string(use_case_id.value, org_id, id)
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC,
+            tags={"cache_hit": str(string is not None).lower(), "caller": "reverse_resolve"},
+        )
+        if string is not None:
+            return string
+
+        string = self.indexer.reverse_resolve(use_case_id, org_id, id)
+        if string is not None:
+            self.local_cache.set(use_case_id.value, org_id, string, id)
+
+        return string
@@ -1,14 +1,20 @@
+import csv
+import io
 from functools import reduce
 from operator import or_
 from time import sleep
-from typing import Any, Mapping, Optional, Sequence, Set
+from typing import Any, Callable, Mapping, Optional, Sequence, Set, TypeVar
 
 import sentry_sdk
 from django.conf import settings
+from django.db import connections, router, transaction
 from django.db.models import Q
+from django.utils import timezone
 from psycopg2 import OperationalError
 from psycopg2.errorcodes import DEADLOCK_DETECTED
 
+from sentry import options
+from sentry.db.postgres.base import remove_null, remove_surrogates
 from sentry.sentry_metrics.configuration import IndexerStorage, UseCaseKey, get_ingest_config
 from sentry.sentry_metrics.indexer.base import (
     FetchType,
@@ -31,6 +37,10 @@ _INDEXER_DB_METRIC = "sentry_metrics.indexer.postgres"
 
 _PARTITION_KEY = "pg"
 
+_COPY_TABLE = "sentry_metrics_indexer_new_strings"
+
+T = TypeVar("T")
+
 indexer_cache = StringIndexerCache(
     **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS, partition_key=_PARTITION_KEY
 )
@@ -52,13 +62,11 @@ class PGStringIndexerV2(StringIndexer):
 
         return self._table(use_case_id).objects.filter(query_statement)
 
-    def _bulk_create_with_retry(
-        self, table: IndexerTable, new_records: Sequence[BaseIndexer]
-    ) -> None:
+    def _retry_on_deadlock(self, create: Callable[[], T]) -> T:
         """
         With multiple instances of the Postgres indexer running, we found that
         rather than direct insert conflicts we were actually observing deadlocks
-        on insert. Here we surround bulk_create with a catch for the deadlock error
+        on insert. Here we surround the insert with a catch for the deadlock error
         specifically so that we don't interrupt processing or raise an error for a
         fairly normal event.
         """
@@ -67,13 +75,9 @@ class PGStringIndexerV2(StringIndexer):
         last_seen_exception: Optional[BaseException] = None
 
         with metrics.timer("sentry_metrics.indexer.pg_bulk_create"):
-            # We use `ignore_conflicts=True` here to avoid race conditions where metric indexer
-            # records might have be created between when we queried in `bulk_record` and the
-            # attempt to create the rows down below.
             while retry_count + 1 < settings.SENTRY_POSTGRES_INDEXER_RETRY_COUNT:
                 try:
-                    table.objects.bulk_create(new_records, ignore_conflicts=True)
-                    return
+                    return create()
                 except OperationalError as e:
                     sentry_sdk.capture_message(
                         f"retryable deadlock exception encountered; pgcode={e.pgcode}, pgerror={e.pgerror}"
@@ -90,6 +94,72 @@ class PGStringIndexerV2(StringIndexer):
             assert isinstance(last_seen_exception, BaseException)
             raise last_seen_exception
 
+    def _bulk_create_with_retry(
+        self, table: IndexerTable, new_records: Sequence[BaseIndexer]
+    ) -> None:
+        # We use `ignore_conflicts=True` here to avoid race conditions where metric indexer
+        # records might have be created between when we queried in `bulk_record` and the
+        # attempt to create the rows down below.
+        self._retry_on_deadlock(
+            lambda: table.objects.bulk_create(new_records, ignore_conflicts=True)
+        )
+
+    def _copy_create_with_retry(
+        self, table: IndexerTable, db_write_keys: KeyCollection
+    ) -> Sequence[KeyResult]:
+        """
+        Creates records for all keys in `db_write_keys` and returns them,
+        without a query per record or reading the records back afterwards.
+
+        The keys are `COPY`ed into a temporary table, from which a single
+        `INSERT ... ON CONFLICT DO NOTHING RETURNING` creates the records. Like
+        `bulk_create(ignore_conflicts=True)`, keys that were created
+        concurrently by another indexer are skipped, and so are not returned.
+        """
+        # COPY does not go through the parameter cleaning of our cursor wrapper,
+        # so strings are cleaned up the same way here.
+        rows = io.StringIO()
+        writer = csv.writer(rows, quoting=csv.QUOTE_ALL)
+        for organization_id, string in db_write_keys.as_tuples():
+            writer.writerow((int(organization_id), remove_null(remove_surrogates(string))))
+
+        using = router.db_for_write(table)
+        now = timezone.now()
+        retention_days = table._meta.get_field("retention_days").get_default()
+
+        def create() -> Sequence[KeyResult]:
+            rows.seek(0)
+            with transaction.atomic(using=using), connections[using].cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {_COPY_TABLE} (organization_id bigint, string text)"
+                )
+                cursor.copy_expert(
+                    f"COPY {_COPY_TABLE} (organization_id, string) FROM STDIN WITH (FORMAT csv)",
+                    rows,
+                )
+                # Rows are inserted in a consistent order, so that concurrent
+                # inserts of overlapping keys wait on each other rather than
+                # deadlock.
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table._meta.db_table}
+                        (organization_id, string, date_added, last_seen, retention_days)
+                    SELECT organization_id, string, %s, %s, %s FROM {_COPY_TABLE}
+                    ORDER BY organization_id, string
+                    ON CONFLICT DO NOTHING
+                    RETURNING organization_id, string, id
+                    """,
+                    [now, now, retention_days],
+                )
+                key_results = [
+                    KeyResult(org_id=org_id, string=string, id=id)
+                    for org_id, string, id in cursor.fetchall()
+                ]
+                cursor.execute(f"DROP TABLE {_COPY_TABLE}")
+            return key_results
+
+        return self._retry_on_deadlock(create)
+
     def bulk_record(
         self, use_case_id: UseCaseKey, org_strings: Mapping[int, Set[str]]
     ) -> KeyResults:
@@ -140,24 +210,36 @@ class PGStringIndexerV2(StringIndexer):
             if filtered_db_write_keys.size == 0:
                 return db_read_key_results.merge(rate_limited_key_results)
 
-            new_records = []
-            for write_pair in filtered_db_write_keys.as_tuples():
-                organization_id, string = write_pair
-                new_records.append(
-                    self._table(use_case_id)(organization_id=int(organization_id), string=string)
+            db_write_key_results = KeyResults()
+            if options.get("sentry-metrics.indexer.copy-writes"):
+                db_write_key_results.add_key_results(
+                    self._copy_create_with_retry(self._table(use_case_id), filtered_db_write_keys),
+                    fetch_type=FetchType.FIRST_SEEN,
                 )
+            else:
+                new_records = []
+                for write_pair in filtered_db_write_keys.as_tuples():
+                    organization_id, string = write_pair
+                    new_records.append(
+                        self._table(use_case_id)(
+                            organization_id=int(organization_id), string=string
+                        )
+                    )
 
-            with metrics.timer("sentry_metrics.indexer.pg_bulk_create"):
-                self._bulk_create_with_retry(self._table(use_case_id), new_records)
-
-        db_write_key_results = KeyResults()
-        db_write_key_results.add_key_results(
-            [
-                KeyResult(org_id=db_obj.organization_id, string=db_obj.string, id=db_obj.id)
-                for db_obj in self._get_db_records(use_case_id, filtered_db_write_keys)
-            ],
-            fetch_type=FetchType.FIRST_SEEN,
-        )
+                with metrics.timer("sentry_metrics.indexer.pg_bulk_create"):
+                    self._bulk_create_with_retry(self._table(use_case_id), new_records)
+
+        # `bulk_create` does not return ids, and neither insert returns records
+        # that other indexers created in the meantime, so those are read back.
+        db_reread_keys = db_write_key_results.get_unmapped_keys(filtered_db_write_keys)
+        if db_reread_keys.size:
+            db_write_key_results.add_key_results(
+                [
+                    KeyResult(org_id=db_obj.organization_id, string=db_obj.string, id=db_obj.id)
+                    for db_obj in self._get_db_records(use_case_id, db_reread_keys)
+                ],
+                fetch_type=FetchType.FIRST_SEEN,
+            )
 
         return db_read_key_results.merge(db_write_key_results).merge(rate_limited_key_results)
 
@@ -0,0 +1,149 @@
+"""
+A string/id table shared by all indexer processes on a host.
+
+The parallel indexer runs several processes, which would otherwise each
+resolve the same strings through the shared indexer cache. The
+`SharedStringTable` lives in a `multiprocessing.shared_memory` segment created
+by the main process, so that a string resolved by any process is resolved for
+all of them.
+
+Note: Like `sentry.sentry_metrics.configuration`, this module must be
+importable without initializing Sentry.
+"""
+
+import atexit
+import hashlib
+import os
+import struct
+from multiprocessing import shared_memory
+from typing import Optional
+
+__all__ = (
+    "SharedStringTable",
+    "attach_shared_string_table",
+    "create_shared_string_table",
+    "get_shared_string_table",
+)
+
+_HEADER = struct.Struct("<8sQ")
+_MAGIC = b"smstrtb1"
+
+# A slot holds the two halves of a 128-bit fingerprint of the key, the id, and
+# a checksum over all three.
+_SLOT = struct.Struct("<QQQQ")
+
+# Number of slots probed for a key, before giving up.
+MAX_PROBES = 8
+
+_shared_table: Optional["SharedStringTable"] = None
+
+
+class SharedStringTable:
+    """
+    A fixed-size, open-addressing hash table mapping `(use_case_id, org_id,
+    string)` to ids, stored in shared memory.
+
+    Keys are stored as 128-bit fingerprints, and the ids of strings never
+    change once assigned, so entries are never updated or removed. Any process
+    may write without locking: a slot is only trusted if its checksum matches,
+    so slots torn by concurrent writes read as misses. Once all slots a key
+    may be stored in are taken, the key is not added.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False) -> None:
+        magic, capacity = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{shm.name} is not a shared string table")
+
+        self._shm = shm
+        self._owner_pid = os.getpid() if owner else None
+        self.name = shm.name
+        self.capacity = capacity
+
+    @classmethod
+    def create(cls, capacity: int, name: Optional[str] = None) -> "SharedStringTable":
+        """Creates a table with room for `capacity` strings."""
+        assert capacity > 0
+        shm = shared_memory.SharedMemory(
+            name=name, create=True, size=_HEADER.size + capacity * _SLOT.size
+        )
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedStringTable":
+        """Attaches to a table created by another process."""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @staticmethod
+    def _fingerprint(use_case_id: str, org_id: int, string: str) -> bytes:
+        key = f"{use_case_id}:{org_id}:{string}".encode()
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _slot_offset(self, slot: int) -> int:
+        return _HEADER.size + (slot % self.capacity) * _SLOT.size
+
+    def get(self, use_case_id: str, org_id: int, string: str) -> Optional[int]:
+        low, high = struct.unpack("<QQ", self._fingerprint(use_case_id, org_id, string))
+        buf = self._shm.buf
+
+        for probe in range(MAX_PROBES):
+            slot_low, slot_high, id, checksum = _SLOT.unpack_from(
+                buf, self._slot_offset(low + probe)
+            )
+            if slot_low == low and slot_high == high:
+                return id if checksum == low ^ high ^ id else None
+            if not (slot_low or slot_high or checksum):
+                return None
+
+        return None
+
+    def set(self, use_case_id: str, org_id: int, string: str, id: int) -> bool:
+        """Adds an entry, returning whether it is stored in the table."""
+        low, high = struct.unpack("<QQ", self._fingerprint(use_case_id, org_id, string))
+        buf = self._shm.buf
+
+        for probe in range(MAX_PROBES):
+            offset = self._slot_offset(low + probe)
+            slot_low, slot_high, slot_id, checksum = _SLOT.unpack_from(buf, offset)
+            if slot_low == low and slot_high == high and checksum == low ^ high ^ slot_id:
+                return True
+            # Empty slots, and slots of this key that were torn by concurrent
+            # writes, are (re)written.
+            if (slot_low == low and slot_high == high) or not (slot_low or slot_high or checksum):
+                _SLOT.pack_into(buf, offset, low, high, id, low ^ high ^ id)
+                return True
+
+        return False
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+
+def create_shared_string_table(capacity: int) -> SharedStringTable:
+    """
+    Creates the table shared by the processes on this host, which is removed
+    once the calling process exits. Other processes use
+    `attach_shared_string_table` with the name of the table.
+    """
+    global _shared_table
+    _shared_table = SharedStringTable.create(capacity)
+    atexit.register(_shared_table.close)
+    return _shared_table
+
+
+def attach_shared_string_table(name: str) -> SharedStringTable:
+    global _shared_table
+    if _shared_table is None or _shared_table.name != name:
+        _shared_table = SharedStringTable.attach(name)
+    return _shared_table
+
+
+def get_shared_string_table() -> Optional[SharedStringTable]:
+    """
+    Returns the table shared by the processes on this host, or `None` if this
+    process is not attached to one.
+    """
+    return _shared_table
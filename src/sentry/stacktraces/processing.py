@@ -1,14 +1,19 @@
 import logging
+import pickle
+import threading
 from collections import namedtuple
 from datetime import datetime
 
 import sentry_sdk
+from django.conf import settings
 from django.utils import timezone
 
 from sentry.models import Project, Release
 from sentry.stacktraces.functions import set_in_app, trim_function_name
+from sentry.utils import metrics
 from sentry.utils.cache import cache
 from sentry.utils.hashlib import hash_values
+from sentry.utils.lru import LRUCache
 from sentry.utils.safe import get_path, safe_execute
 
 logger = logging.getLogger(__name__)
@@ -20,6 +25,47 @@ StacktraceInfo.__hash__ = lambda x: id(x)
 StacktraceInfo.__eq__ = lambda a, b: a is b
 StacktraceInfo.__ne__ = lambda a, b: a is not b
 
+# Seconds for which processed frames are kept in the shared frame cache.
+FRAME_CACHE_TTL = 3600
+
+
+class LocalFrameCache(LRUCache):
+    """
+    The process-wide LRU of processed frames, in front of the shared frame
+    cache. Frames are pickled when they are stored, since processors modify
+    the frames they are handed.
+    """
+
+    def get(self, key):
+        payload = super().get(key)
+        if payload is None:
+            return None
+        return pickle.loads(payload)
+
+    def set(self, key, value):
+        return super().set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_local_frame_cache = None
+_local_frame_cache_lock = threading.Lock()
+
+
+def get_local_frame_cache():
+    """
+    Returns the process-wide ``LocalFrameCache``, or ``None`` if it is
+    disabled through ``SENTRY_FRAME_CACHE_LOCAL_SIZE``.
+    """
+    global _local_frame_cache
+
+    max_size = settings.SENTRY_FRAME_CACHE_LOCAL_SIZE
+    if not max_size:
+        return None
+
+    with _local_frame_cache_lock:
+        if _local_frame_cache is None:
+            _local_frame_cache = LocalFrameCache(max_size)
+        return _local_frame_cache
+
 
 class ProcessableFrame:
     def __init__(self, frame, idx, processor, stacktrace_info, processable_frames):
@@ -64,7 +110,10 @@ class ProcessableFrame:
 
     def set_cache_value(self, value):
         if self.cache_key is not None:
-            cache.set(self.cache_key, value, 3600)
+            cache.set(self.cache_key, value, FRAME_CACHE_TTL)
+            local_cache = get_local_frame_cache()
+            if local_cache is not None:
+                local_cache.set(self.cache_key, value)
             return True
         return False
 
@@ -73,7 +122,12 @@ class ProcessableFrame:
             self.cache_key = None
             return
 
-        h = hash_values(values, seed=self.processor.__class__.__name__)
+        try:
+            h = hash_values(values, seed=self.processor.__class__.__name__)
+        except TypeError:
+            # Values that cannot be hashed (e.g. floats) are not cached.
+            self.cache_key = None
+            return
         self.cache_key = rv = "pf:%s" % h
         return rv
 
@@ -442,8 +496,22 @@ def get_crash_frame_from_event_data(data, frame_filter=None):
 
 def lookup_frame_cache(keys):
     rv = {}
-    for key in keys:
-        rv[key] = cache.get(key)
+    local_cache = get_local_frame_cache()
+    if local_cache is not None:
+        for key in keys:
+            value = local_cache.get(key)
+            if value is not None:
+                rv[key] = value
+
+    missing = [key for key in keys if key not in rv]
+    if missing:
+        shared_values = cache.get_many(missing)
+        for key in missing:
+            value = shared_values.get(key)
+            if value is not None and local_cache is not None:
+                local_cache.set(key, value)
+            rv[key] = value
+
     return rv
 
 
@@ -470,9 +538,24 @@ def get_stacktrace_processing_task(infos, processors):
             if processable_frame.cache_key is not None:
                 to_lookup[processable_frame.cache_key] = processable_frame
 
-    frame_cache = lookup_frame_cache(to_lookup)
-    for cache_key, processable_frame in to_lookup.items():
-        processable_frame.cache_value = frame_cache.get(cache_key)
+    if to_lookup:
+        frame_cache = lookup_frame_cache(list(to_lookup))
+        hits = {}
+        misses = {}
+        for cache_key, processable_frame in to_lookup.items():
+            processable_frame.cache_value = frame_cache.get(cache_key)
+            processor_name = processable_frame.processor.__class__.__name__
+            counts = misses if processable_frame.cache_value is None else hits
+            counts[processor_name] = counts.get(processor_name, 0) + 1
+
+        for metric, counts in (("hit", hits), ("miss", misses)):
+            for processor_name, count in counts.items():
+                metrics.incr(
+                    f"stacktraces.frame_cache.{metric}",
+                    amount=count,
+                    tags={"processor": processor_name},
+                    skip_internal=True,
+                )
 
     return StacktraceProcessingTask(
         processable_stacktraces=by_stacktrace_info, processors=by_processor
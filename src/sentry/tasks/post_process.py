@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import logging
 from datetime import timedelta
-from typing import TYPE_CHECKING, List, Mapping, Optional, Sequence, Tuple, TypedDict, Union
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Sequence, Tuple, TypedDict, Union
 
 import sentry_sdk
+from celery.exceptions import SoftTimeLimitExceeded
 from django.conf import settings
 from django.utils import timezone
 
@@ -32,6 +33,11 @@ logger = logging.getLogger(__name__)
 
 locks = LockManager(build_instance_from_options(settings.SENTRY_POST_PROCESS_LOCKS_BACKEND_OPTIONS))
 
+#: Time limits of a single ``post_process_group`` task. Batches are granted
+#: these limits for every job, see ``get_post_process_group_batch_time_limits``.
+POST_PROCESS_GROUP_TIME_LIMIT = 120
+POST_PROCESS_GROUP_SOFT_TIME_LIMIT = 110
+
 
 class PostProcessJob(TypedDict, total=False):
     event: Union[Event, GroupEvent]
@@ -304,8 +310,8 @@ def fetch_buffered_group_stats(group):
 
 @instrumented_task(
     name="sentry.tasks.post_process.post_process_group",
-    time_limit=120,
-    soft_time_limit=110,
+    time_limit=POST_PROCESS_GROUP_TIME_LIMIT,
+    soft_time_limit=POST_PROCESS_GROUP_SOFT_TIME_LIMIT,
 )
 def post_process_group(
     is_new,
@@ -410,6 +416,57 @@ def post_process_group(
             run_post_process_job(job)
 
 
+def get_post_process_group_batch_time_limits(batch_size: int) -> Tuple[int, int]:
+    """
+    Returns the ``(time_limit, soft_time_limit)`` of a ``post_process_group_batch``
+    task running ``batch_size`` jobs, which grants every job the time limits of a
+    single ``post_process_group`` task.
+    """
+    batch_size = max(batch_size, 1)
+    return (
+        POST_PROCESS_GROUP_TIME_LIMIT * batch_size,
+        POST_PROCESS_GROUP_SOFT_TIME_LIMIT * batch_size,
+    )
+
+
+@instrumented_task(
+    name="sentry.tasks.post_process.post_process_group_batch",
+    time_limit=600,
+    soft_time_limit=590,
+)
+def post_process_group_batch(jobs: Sequence[Mapping[str, Any]], **kwargs):
+    """
+    Fires post processing hooks for many events of the same group, in order.
+
+    ``jobs`` holds the arguments of ``post_process_group`` for every event.
+    Models fetched through ``get_from_cache``, such as the project and
+    organization, are fetched once and shared by all events of the batch.
+    The group is excluded, since its counters change between events.
+
+    Callers should set the time limits of the task with
+    ``get_post_process_group_batch_time_limits``. If the soft time limit is
+    exceeded anyway, the events which were not processed are logged.
+    """
+    from sentry.db.models.manager import BaseManager
+    from sentry.models import Group
+
+    metrics.timing("tasks.post_process.batch_size", len(jobs))
+    with BaseManager.local_cache(exclude=[Group]):
+        for i, job in enumerate(jobs):
+            try:
+                post_process_group(**job)
+            except SoftTimeLimitExceeded:
+                logger.error(
+                    "post_process.batch.time_limit_exceeded",
+                    extra={"cache_keys": [remaining.get("cache_key") for remaining in jobs[i:]]},
+                )
+                raise
+            except Exception:
+                logger.exception(
+                    "post_process.batch.failed", extra={"cache_key": job.get("cache_key")}
+                )
+
+
 def run_post_process_job(job: PostProcessJob):
     group_event = job["event"]
     if group_event.group.issue_category not in GROUP_CATEGORY_POST_PROCESS_PIPELINE:
@@ -1,7 +1,10 @@
+import functools
 import logging
 import random
+import threading
+from contextlib import contextmanager
 from time import sleep, time
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Generator, Mapping, Optional, Sequence, Tuple
 
 import sentry_sdk
 from django.conf import settings
@@ -83,6 +86,44 @@ def should_demote_symbolication(project_id: int) -> bool:
             return False
 
 
+#: Collects the ``symbolicate_event`` tasks submitted within
+#: ``batch_symbolicate_submissions`` on this thread.
+_batched_submissions = threading.local()
+
+
+@contextmanager
+def batch_symbolicate_submissions() -> Generator[None, None, None]:
+    """
+    Collects the ``symbolicate_event`` tasks submitted on this thread, and
+    submits them in batches of up to ``symbolicate-event.batch-size`` events
+    through ``symbolicate_event_batch`` on exit. Tasks for the low priority
+    queue and for reprocessing are submitted right away.
+
+    Does nothing unless ``symbolicate-event.batch-size`` is greater than 1.
+    """
+    batch_size = options.get("symbolicate-event.batch-size")
+    if batch_size <= 1 or getattr(_batched_submissions, "jobs", None) is not None:
+        yield
+        return
+
+    jobs = _batched_submissions.jobs = []
+    try:
+        yield
+    finally:
+        _batched_submissions.jobs = None
+        for i in range(0, len(jobs), batch_size):
+            chunk = jobs[i : i + batch_size]
+            if len(chunk) == 1:
+                symbolicate_event.delay(**chunk[0])
+                continue
+
+            metrics.incr("tasks.symbolicate_event_batch.dispatched", sample_rate=1)
+            time_limit, soft_time_limit = get_symbolicate_event_batch_time_limits(len(chunk))
+            symbolicate_event_batch.apply_async(
+                kwargs={"jobs": chunk}, time_limit=time_limit, soft_time_limit=soft_time_limit
+            )
+
+
 def submit_symbolicate(
     is_low_priority: bool,
     from_reprocessing: bool,
@@ -101,7 +142,7 @@ def submit_symbolicate(
     else:
         task = symbolicate_event_from_reprocessing if from_reprocessing else symbolicate_event
 
-    task.delay(
+    task_kwargs = dict(
         cache_key=cache_key,
         start_time=start_time,
         event_id=event_id,
@@ -109,18 +150,25 @@ def submit_symbolicate(
         has_attachments=has_attachments,
     )
 
+    batched_jobs = getattr(_batched_submissions, "jobs", None)
+    if task is symbolicate_event and batched_jobs is not None:
+        batched_jobs.append(task_kwargs)
+    else:
+        task.delay(**task_kwargs)
 
-def _do_symbolicate_event(
+
+def _load_symbolicate_event(
     cache_key: str,
     start_time: Optional[int],
-    event_id: Optional[str],
     symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
     data: Optional[Event] = None,
     queue_switches: int = 0,
     has_attachments: bool = False,
-) -> None:
-    from sentry.lang.native.processing import get_symbolication_function
-
+) -> Optional[CanonicalKeyDict]:
+    """
+    Returns the data of the event to symbolicate, or ``None`` if it is missing
+    or was moved to the other symbolication queue.
+    """
     if data is None:
         data = processing.event_processing_store.get(cache_key)
 
@@ -129,7 +177,7 @@ def _do_symbolicate_event(
             "events.failed", tags={"reason": "cache", "stage": "symbolicate"}, skip_internal=False
         )
         error_logger.error("symbolicate.failed.empty", extra={"cache_key": cache_key})
-        return
+        return None
 
     data = CanonicalKeyDict(data)
 
@@ -165,62 +213,119 @@ def _do_symbolicate_event(
                 queue_switches + 1,
                 has_attachments=has_attachments,
             )
-            return
+            return None
 
-    def _continue_to_process_event() -> None:
-        process_task = (
-            store.process_event_from_reprocessing if from_reprocessing else store.process_event
-        )
-        store.do_process_event(
-            cache_key=cache_key,
-            start_time=start_time,
-            event_id=event_id,
-            process_task=process_task,
-            data=data,
-            data_has_changed=has_changed,
-            from_symbolicate=True,
-            has_attachments=has_attachments,
-        )
+    return data
 
-    symbolication_function = get_symbolication_function(data)
-    symbolication_function_name = getattr(symbolication_function, "__name__", "none")
 
-    if killswitch_matches_context(
+def _is_symbolication_load_shed(data: CanonicalKeyDict, symbolication_function_name: str) -> bool:
+    return killswitch_matches_context(
         "store.load-shed-symbolicate-event-projects",
         {
-            "project_id": project_id,
-            "event_id": event_id,
+            "project_id": data["project"],
+            "event_id": data["event_id"],
             "platform": data.get("platform") or "null",
             "symbolication_function": symbolication_function_name,
         },
-    ):
-        return _continue_to_process_event()
+    )
+
+
+def _record_symbolication_duration(project_id: int, symbolication_start_time: float) -> float:
+    """
+    Returns the symbolication duration so far, and optionally record the duration to the LPQ metrics if configured.
+    """
+    symbolication_duration = time() - symbolication_start_time
+
+    submission_ratio = options.get("symbolicate-event.low-priority.metrics.submission-rate")
+    # we throw the dice on each record operation, otherwise an unlucky extremely slow event would never count
+    # towards the budget.
+    submit_realtime_metrics = random.random() < submission_ratio
+    if submit_realtime_metrics:
+        with sentry_sdk.start_span(op="tasks.store.symbolicate_event.low_priority.metrics"):
+            try:
+                # we adjust the duration according to the `submission_ratio` so that the budgeting works
+                # the same even considering sampling of metrics.
+                recorded_duration = symbolication_duration / submission_ratio
+                realtime_metrics.record_project_duration(project_id, recorded_duration)
+            except Exception as e:
+                sentry_sdk.capture_exception(e)
+    return symbolication_duration
+
+
+def _mark_symbolication_fatal(data: CanonicalKeyDict) -> None:
+    data.setdefault("_metrics", {})["flag.processing.error"] = True
+    data.setdefault("_metrics", {})["flag.processing.fatal"] = True
+
+
+def _continue_to_process_event(
+    cache_key: str,
+    start_time: Optional[int],
+    event_id: Optional[str],
+    symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
+    data: Any,
+    has_changed: bool,
+    has_attachments: bool = False,
+) -> None:
+    from_reprocessing = (
+        symbolicate_task is symbolicate_event_from_reprocessing
+        or symbolicate_task is symbolicate_event_from_reprocessing_low_priority
+    )
+
+    # We cannot persist canonical types in the cache, so we need to
+    # downgrade this.
+    if isinstance(data, CANONICAL_TYPES):
+        data = dict(data.items())
+
+    if has_changed:
+        cache_key = processing.event_processing_store.store(data)
+
+    process_task = (
+        store.process_event_from_reprocessing if from_reprocessing else store.process_event
+    )
+    store.do_process_event(
+        cache_key=cache_key,
+        start_time=start_time,
+        event_id=event_id,
+        process_task=process_task,
+        data=data,
+        data_has_changed=has_changed,
+        from_symbolicate=True,
+        has_attachments=has_attachments,
+    )
+
+
+def _do_symbolicate_event(
+    cache_key: str,
+    start_time: Optional[int],
+    event_id: Optional[str],
+    symbolicate_task: Callable[[Optional[str], Optional[int], Optional[str]], None],
+    data: Optional[Event] = None,
+    queue_switches: int = 0,
+    has_attachments: bool = False,
+) -> None:
+    from sentry.lang.native.processing import get_symbolication_function
+
+    data = _load_symbolicate_event(
+        cache_key, start_time, symbolicate_task, data, queue_switches, has_attachments
+    )
+    if data is None:
+        return
+
+    project_id = data["project"]
+    event_id = data["event_id"]
+
+    symbolication_function = get_symbolication_function(data)
+    symbolication_function_name = getattr(symbolication_function, "__name__", "none")
+
+    if _is_symbolication_load_shed(data, symbolication_function_name):
+        return _continue_to_process_event(
+            cache_key, start_time, event_id, symbolicate_task, data, False, has_attachments
+        )
 
     has_changed = False
 
     symbolication_start_time = time()
 
-    def record_symbolication_duration() -> float:
-        """
-        Returns the symbolication duration so far, and optionally record the duration to the LPQ metrics if configured.
-        """
-        symbolication_duration = time() - symbolication_start_time
-
-        submission_ratio = options.get("symbolicate-event.low-priority.metrics.submission-rate")
-        # we throw the dice on each record operation, otherwise an unlucky extremely slow event would never count
-        # towards the budget.
-        submit_realtime_metrics = random.random() < submission_ratio
-        if submit_realtime_metrics:
-            with sentry_sdk.start_span(op="tasks.store.symbolicate_event.low_priority.metrics"):
-                try:
-                    # we adjust the duration according to the `submission_ratio` so that the budgeting works
-                    # the same even considering sampling of metrics.
-                    recorded_duration = symbolication_duration / submission_ratio
-                    realtime_metrics.record_project_duration(project_id, recorded_duration)
-                except Exception as e:
-                    sentry_sdk.capture_exception(e)
-        return symbolication_duration
-
     with sentry_sdk.start_span(op="tasks.store.symbolicate_event.symbolication") as span:
         span.set_data("symbolication_function", symbolication_function_name)
         with metrics.timer(
@@ -239,10 +344,10 @@ def _do_symbolicate_event(
                         data = symbolicated_data
                         has_changed = True
 
-                    record_symbolication_duration()
+                    _record_symbolication_duration(project_id, symbolication_start_time)
                     break
                 except RetrySymbolication as e:
-                    duration = record_symbolication_duration()
+                    duration = _record_symbolication_duration(project_id, symbolication_start_time)
                     if duration > settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT:
                         # Do not drop event but actually continue with rest of pipeline
                         # (persisting unsymbolicated event)
@@ -257,8 +362,7 @@ def _do_symbolicate_event(
                             "symbolicate.failed.infinite_retry",
                             extra={"project_id": project_id, "event_id": event_id},
                         )
-                        data.setdefault("_metrics", {})["flag.processing.error"] = True
-                        data.setdefault("_metrics", {})["flag.processing.fatal"] = True
+                        _mark_symbolication_fatal(data)
                         has_changed = True
                         break
                     else:
@@ -288,22 +392,128 @@ def _do_symbolicate_event(
                         },
                     )
                     error_logger.exception("tasks.store.symbolicate_event.symbolication")
-                    data.setdefault("_metrics", {})["flag.processing.error"] = True
-                    data.setdefault("_metrics", {})["flag.processing.fatal"] = True
+                    _mark_symbolication_fatal(data)
                     has_changed = True
 
-                    record_symbolication_duration()
+                    _record_symbolication_duration(project_id, symbolication_start_time)
                     break
 
-    # We cannot persist canonical types in the cache, so we need to
-    # downgrade this.
-    if isinstance(data, CANONICAL_TYPES):
-        data = dict(data.items())
+    return _continue_to_process_event(
+        cache_key, start_time, event_id, symbolicate_task, data, has_changed, has_attachments
+    )
 
-    if has_changed:
-        cache_key = processing.event_processing_store.store(data)
 
-    return _continue_to_process_event()
+def _do_symbolicate_event_batch(jobs: Sequence[Mapping[str, Any]]) -> None:
+    from sentry.lang.native.processing import get_symbolication_function, get_symbolication_request
+    from sentry.lang.native.symbolicator import SymbolicatorBatch
+
+    batch = SymbolicatorBatch()
+    symbolication_start_time = time()
+
+    def on_response(job, data, request, symbolication_function_name, response):
+        event_id = data["event_id"]
+        _record_symbolication_duration(data["project"], symbolication_start_time)
+        if response is None:
+            # The batch failed to symbolicate the event or timed out, which
+            # it has logged already.
+            metrics.incr(
+                "tasks.store.symbolicate_event.fatal",
+                tags={"reason": "batch", "symbolication_function": symbolication_function_name},
+            )
+            _mark_symbolication_fatal(data)
+        else:
+            try:
+                data = request.merge(response)
+            except Exception:
+                metrics.incr(
+                    "tasks.store.symbolicate_event.fatal",
+                    tags={"reason": "error", "symbolication_function": symbolication_function_name},
+                )
+                error_logger.exception("tasks.store.symbolicate_event.symbolication")
+                _mark_symbolication_fatal(data)
+
+        try:
+            _continue_to_process_event(
+                job["cache_key"],
+                job.get("start_time"),
+                event_id,
+                symbolicate_event,
+                data,
+                True,
+                job.get("has_attachments", False),
+            )
+        except Exception:
+            error_logger.exception(
+                "symbolicate_event_batch.failed", extra={"cache_key": job["cache_key"]}
+            )
+
+    def add_job(job):
+        data = _load_symbolicate_event(
+            job["cache_key"],
+            job.get("start_time"),
+            symbolicate_event,
+            None,
+            job.get("queue_switches", 0),
+            job.get("has_attachments", False),
+        )
+        if data is None:
+            return
+
+        symbolication_function_name = getattr(get_symbolication_function(data), "__name__", "none")
+
+        has_changed = False
+        request = None
+        if not _is_symbolication_load_shed(data, symbolication_function_name):
+            try:
+                request = get_symbolication_request(data)
+            except Exception:
+                metrics.incr(
+                    "tasks.store.symbolicate_event.fatal",
+                    tags={"reason": "error", "symbolication_function": symbolication_function_name},
+                )
+                error_logger.exception("tasks.store.symbolicate_event.symbolication")
+                _mark_symbolication_fatal(data)
+                has_changed = True
+
+        if request is None:
+            _continue_to_process_event(
+                job["cache_key"],
+                job.get("start_time"),
+                data["event_id"],
+                symbolicate_event,
+                data,
+                has_changed,
+                job.get("has_attachments", False),
+            )
+        else:
+            request.add_to_batch(
+                batch,
+                functools.partial(on_response, job, data, request, symbolication_function_name),
+            )
+
+    for job in jobs:
+        try:
+            add_job(job)
+        except Exception:
+            error_logger.exception(
+                "symbolicate_event_batch.failed", extra={"cache_key": job["cache_key"]}
+            )
+
+    with metrics.timer("tasks.symbolicate_event_batch.symbolication"):
+        batch.run()
+
+
+def get_symbolicate_event_batch_time_limits(batch_size: int) -> Tuple[int, int]:
+    """
+    Returns the ``(time_limit, soft_time_limit)`` of a ``symbolicate_event_batch``
+    task for ``batch_size`` events. Events are symbolicated concurrently, but
+    are processed one after another once symbolicated.
+    """
+    batch_size = max(batch_size, 1)
+    return (
+        settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT + 30 + 65 * batch_size,
+        settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT + 20 + 60 * batch_size,
+    )
 
 
 @instrumented_task(  # type: ignore
@@ -429,3 +639,23 @@ def symbolicate_event_from_reprocessing_low_priority(
         queue_switches=queue_switches,
         has_attachments=has_attachments,
     )
+
+
+@instrumented_task(  # type: ignore
+    name="sentry.tasks.symbolication.symbolicate_event_batch",
+    queue="events.symbolicate_event",
+    time_limit=settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT + 30,
+    soft_time_limit=settings.SYMBOLICATOR_PROCESS_EVENT_HARD_TIMEOUT + 20,
+    acks_late=True,
+)
+def symbolicate_event_batch(jobs: Sequence[Mapping[str, Any]], **kwargs: Any) -> None:
+    """
+    Symbolicates many events with a single ``SymbolicatorBatch``, see
+    ``batch_symbolicate_submissions``.
+
+    ``jobs`` holds the arguments of ``symbolicate_event`` for every event.
+    Events are moved to the low priority queue and load shed like in
+    ``symbolicate_event``. Events which fail or time out are processed
+    unsymbolicated.
+    """
+    return _do_symbolicate_event_batch(jobs)
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from collections.abc import Callable
 from datetime import timedelta
 from enum import Enum
@@ -104,10 +105,104 @@ class TSDBModel(Enum):
     sentry_app_component_interacted = 801
 
 
+class SeriesTable:
+    """
+    A columnar representation of counter series for many keys that share the
+    same buckets: one sorted list of timestamps, and one list of values per
+    key, rather than a list of ``(timestamp, value)`` tuples for every key.
+
+    Bucket computations (rollups, jitter) are done once for the timestamp
+    column instead of once per key, and aggregations work on plain lists of
+    values. Use ``to_range`` to convert to the ``get_range`` result shape.
+    """
+
+    __slots__ = ("timestamps", "columns")
+
+    def __init__(self, timestamps, columns):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, SeriesTable)
+            and self.timestamps == other.timestamps
+            and self.columns == other.columns
+        )
+
+    def __repr__(self):
+        return f"<SeriesTable timestamps={self.timestamps!r} columns={self.columns!r}>"
+
+    @classmethod
+    def from_buckets(cls, buckets):
+        """
+        Build a table from a mapping of key => {timestamp: value}. Missing
+        buckets are filled with zeroes.
+        """
+        timestamps = sorted({ts for values in buckets.values() for ts in values})
+        return cls(
+            timestamps,
+            {key: [values.get(ts, 0) for ts in timestamps] for key, values in buckets.items()},
+        )
+
+    @classmethod
+    def from_range(cls, range_set):
+        """
+        Build a table from a ``get_range`` result.
+        """
+        return cls.from_buckets({key: dict(points) for key, points in range_set.items()})
+
+    def to_range(self):
+        """
+        Returns a mapping of key => [(timestamp, value), ...] as returned by
+        ``get_range``, which returns no keys at all for an empty range.
+        """
+        timestamps = self.timestamps
+        if not timestamps:
+            return {}
+        return {key: list(zip(timestamps, values)) for key, values in self.columns.items()}
+
+    def to_rollup(self):
+        """
+        Returns a mapping of key => [[timestamp, value], ...] as returned by
+        ``BaseTSDB.rollup``.
+        """
+        timestamps = self.timestamps
+        if not timestamps:
+            return {}
+        return {
+            key: [[ts, value] for ts, value in zip(timestamps, values)]
+            for key, values in self.columns.items()
+        }
+
+    def sums(self):
+        return {key: sum(values) for key, values in self.columns.items()}
+
+    def rollup(self, rollup):
+        """
+        Sum up consecutive buckets which fall into the same ``rollup`` interval.
+        """
+        timestamps = []
+        bounds = []
+        for index, ts in enumerate(self.timestamps):
+            new_ts = ts - (ts % rollup)
+            if not timestamps or timestamps[-1] != new_ts:
+                timestamps.append(new_ts)
+                bounds.append(index)
+        bounds.append(len(self.timestamps))
+
+        slices = [slice(bounds[i], bounds[i + 1]) for i in range(len(timestamps))]
+        return SeriesTable(
+            timestamps,
+            {key: [sum(values[s]) for s in slices] for key, values in self.columns.items()},
+        )
+
+
 class BaseTSDB(Service):
     __read_methods__ = frozenset(
         [
             "get_range",
+            "get_range_multi",
+            "get_range_table",
             "get_sums",
             "get_distinct_counts_series",
             "get_distinct_counts_totals",
@@ -143,6 +238,7 @@ class BaseTSDB(Service):
                 "get_optimal_rollup",
                 "get_optimal_rollup_series",
                 "get_rollups",
+                "get_sums_multi",
                 "make_series",
                 "models",
                 "models_with_environment_support",
@@ -255,13 +351,12 @@ class BaseTSDB(Service):
         # to the requested interval using the requested (or inferred) rollup
         # resolution. This result always includes the ``end`` timestamp, but
         # may not include the ``start`` timestamp.
-        series = []
-        timestamp = end
-        while timestamp >= start:
-            series.append(self.normalize_to_epoch(timestamp, rollup))
-            timestamp = timestamp - timedelta(seconds=rollup)
+        if end < start:
+            return rollup, []
 
-        return rollup, sorted(series)
+        count = (end - start) // timedelta(seconds=rollup)
+        last = self.normalize_to_epoch(end, rollup)
+        return rollup, list(range(last - count * rollup, last + rollup, rollup))
 
     def get_active_series(self, start=None, end=None, timestamp=None):
         rollups = {}
@@ -369,6 +464,36 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def get_range_table(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+    ):
+        """
+        Like ``get_range``, but returns a ``SeriesTable``.
+
+        Backends should override this (and implement ``get_range`` in terms
+        of it), by default the result of ``get_range`` is converted.
+        """
+        return SeriesTable.from_range(
+            self.get_range(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_ids=environment_ids,
+                use_cache=use_cache,
+                jitter_value=jitter_value,
+            )
+        )
+
     def get_sums(
         self,
         model,
@@ -380,7 +505,7 @@ class BaseTSDB(Service):
         use_cache=False,
         jitter_value=None,
     ):
-        range_set = self.get_range(
+        return self.get_range_table(
             model,
             keys,
             start,
@@ -389,9 +514,51 @@ class BaseTSDB(Service):
             environment_ids=[environment_id] if environment_id is not None else None,
             use_cache=use_cache,
             jitter_value=jitter_value,
-        )
-        sum_set = {key: sum(p for _, p in points) for (key, points) in range_set.items()}
-        return sum_set
+        ).sums()
+
+    def get_range_multi(self, queries, start, end, rollup=None, use_cache=False):
+        """
+        Fetch the series for many counters, possibly across several models
+        and environments, at once.
+
+        ``queries`` is a sequence of ``(model, key, environment_id)`` tuples.
+        Returns a mapping of each of those tuples to ``[(timestamp, count), ...]``.
+
+        Backends should override this to fetch everything in as few round
+        trips as possible; by default there is one ``get_range`` call per
+        model and environment.
+
+        >>> now = timezone.now()
+        >>> get_range_multi([(TSDBModel.group, 1, None), (TSDBModel.project, 2, 3)],
+        >>>                 start=now - timedelta(days=1),
+        >>>                 end=now)
+        """
+        keys_by_model = defaultdict(list)
+        for model, key, environment_id in queries:
+            keys_by_model[(model, environment_id)].append(key)
+
+        results = {}
+        for (model, environment_id), keys in keys_by_model.items():
+            range_set = self.get_range(
+                model,
+                keys,
+                start,
+                end,
+                rollup,
+                environment_ids=[environment_id] if environment_id is not None else None,
+                use_cache=use_cache,
+            )
+            for key in keys:
+                results[(model, key, environment_id)] = range_set.get(key, [])
+        return results
+
+    def get_sums_multi(self, queries, start, end, rollup=None, use_cache=False):
+        """
+        Like ``get_sums``, but for ``(model, key, environment_id)`` tuples as
+        accepted by ``get_range_multi``.
+        """
+        range_set = self.get_range_multi(queries, start, end, rollup, use_cache=use_cache)
+        return {query: sum(p for _, p in points) for query, points in range_set.items()}
 
     def _add_jitter_to_series(self, series, start, rollup, jitter_value):
         if jitter_value and series:
@@ -405,7 +572,13 @@ class BaseTSDB(Service):
         """
         Given a set of values (as returned from ``get_range``), roll them up
         using the ``rollup`` time (in seconds).
+
+        ``values`` may also be a ``SeriesTable``, in which case a rolled up
+        ``SeriesTable`` is returned.
         """
+        if isinstance(values, SeriesTable):
+            return values.rollup(rollup)
+
         normalize_ts_to_epoch = self.normalize_ts_to_epoch
         result = {}
         for key, points in values.items():
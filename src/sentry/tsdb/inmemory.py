@@ -2,7 +2,7 @@ from collections import Counter, defaultdict
 
 from django.utils import timezone
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, SeriesTable
 from sentry.utils.dates import to_datetime, to_timestamp
 
 
@@ -70,32 +70,68 @@ class InMemoryTSDB(BaseTSDB):
         environment_ids=None,
         use_cache=False,
         jitter_value=None,
+    ):
+        return self.get_range_table(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids=environment_ids,
+            use_cache=use_cache,
+            jitter_value=jitter_value,
+        ).to_range()
+
+    def get_range_table(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
     ):
         self.validate_arguments([model], environment_ids if environment_ids is not None else [None])
 
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        timestamps = [to_datetime(item) for item in series]
+        norm_epochs = [self.normalize_to_rollup(timestamp, rollup) for timestamp in timestamps]
 
-        results = []
-        for timestamp in map(to_datetime, series):
-            norm_epoch = self.normalize_to_rollup(timestamp, rollup)
+        columns = {}
+        for key in keys:
+            if not environment_ids:
+                data = self.data[model][(key, None)]
+                columns[key] = [int(data[norm_epoch] or 0) for norm_epoch in norm_epochs]
+            else:
+                sources = [
+                    self.data[model][(key, environment_id)] for environment_id in environment_ids
+                ]
+                columns[key] = [
+                    sum(int(source[norm_epoch]) for source in sources) for norm_epoch in norm_epochs
+                ]
+
+        return SeriesTable([to_timestamp(timestamp) for timestamp in timestamps], columns)
+
+    def get_range_multi(self, queries, start, end, rollup=None, use_cache=False):
+        for model, _, environment_id in queries:
+            self.validate_arguments([model], [environment_id])
 
-            for key in keys:
-                if not environment_ids:
-                    value = self.data[model][(key, None)][norm_epoch]
-                else:
-                    value = sum(
-                        int(self.data[model][(key, environment_id)][norm_epoch])
-                        for environment_id in environment_ids
-                    )
-                results.append((to_timestamp(timestamp), key, value))
-
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count or 0)
-
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        for query in queries:
+            model, key, environment_id = query
+            data = self.data[model][(key, environment_id)]
+            results[query] = [
+                (
+                    to_timestamp(timestamp),
+                    int(data[self.normalize_to_rollup(timestamp, rollup)] or 0),
+                )
+                for timestamp in map(to_datetime, series)
+            ]
+        return results
 
     def record(self, model, key, values, timestamp=None, environment_id=None):
         self.validate_arguments([model], [environment_id])
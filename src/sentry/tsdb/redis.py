@@ -11,7 +11,7 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
-from sentry.tsdb.base import BaseTSDB
+from sentry.tsdb.base import BaseTSDB, SeriesTable
 from sentry.utils.compat import crc32
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -281,6 +281,28 @@ class RedisTSDB(BaseTSDB):
         >>>          start=now - timedelta(days=1),
         >>>          end=now)
         """
+        return self.get_range_table(
+            model,
+            keys,
+            start,
+            end,
+            rollup,
+            environment_ids=environment_ids,
+            use_cache=use_cache,
+            jitter_value=jitter_value,
+        ).to_range()
+
+    def get_range_table(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+    ):
         # redis backend doesn't support multiple envs
         if environment_ids is not None and len(environment_ids) > 1:
             raise NotImplementedError
@@ -291,25 +313,61 @@ class RedisTSDB(BaseTSDB):
         rollup, series = self.get_optimal_rollup_series(start, end, rollup)
         series = [to_datetime(item) for item in series]
 
-        results = []
+        results = {}
         cluster, _ = self.get_cluster(environment_id)
         with cluster.map() as client:
             for key in keys:
+                promises = results[key] = []
                 for timestamp in series:
                     hash_key, hash_field = self.make_counter_key(
                         model, rollup, timestamp, key, environment_id
                     )
-                    results.append(
-                        (to_timestamp(timestamp), key, client.hget(hash_key, hash_field))
-                    )
+                    promises.append(client.hget(hash_key, hash_field))
+
+        return SeriesTable(
+            [to_timestamp(timestamp) for timestamp in series],
+            {
+                key: [int(promise.value or 0) for promise in promises]
+                for key, promises in results.items()
+            },
+        )
+
+    def get_range_multi(self, queries, start, end, rollup=None, use_cache=False):
+        """
+        Fetch many counter series with a single pipeline per Redis host (per
+        cluster, if environments are spread across several clusters).
+        """
+        queries_by_environment = defaultdict(list)
+        for query in queries:
+            queries_by_environment[query[2]].append(query)
+
+        for environment_id, environment_queries in queries_by_environment.items():
+            self.validate_arguments(
+                [model for model, _, _ in environment_queries], [environment_id]
+            )
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+        series = [to_datetime(item) for item in series]
+
+        results = []
+        for (cluster, _), environment_ids in self.get_cluster_groups(queries_by_environment):
+            with cluster.map() as client:
+                for environment_id in environment_ids:
+                    for query in queries_by_environment[environment_id]:
+                        model, key, _ = query
+                        for timestamp in series:
+                            hash_key, hash_field = self.make_counter_key(
+                                model, rollup, timestamp, key, environment_id
+                            )
+                            results.append(
+                                (query, to_timestamp(timestamp), client.hget(hash_key, hash_field))
+                            )
 
-        results_by_key = defaultdict(dict)
-        for epoch, key, count in results:
-            results_by_key[key][epoch] = int(count.value or 0)
+        results_by_query = defaultdict(dict)
+        for query, epoch, count in results:
+            results_by_query[query][epoch] = int(count.value or 0)
 
-        for key, points in results_by_key.items():
-            results_by_key[key] = sorted(points.items())
-        return dict(results_by_key)
+        return {query: sorted(points.items()) for query, points in results_by_query.items()}
 
     def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
         environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
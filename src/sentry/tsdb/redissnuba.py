@@ -1,5 +1,6 @@
 import inspect
 import time
+from collections import defaultdict
 
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
@@ -25,6 +26,8 @@ def dont_do_this(callargs):
 method_specifications = {
     # method: (type, function(callargs) -> set[model])
     "get_range": (READ, single_model_argument),
+    "get_range_multi": (READ, lambda callargs: {model for model, _, _ in callargs["queries"]}),
+    "get_range_table": (READ, single_model_argument),
     "get_sums": (READ, single_model_argument),
     "get_distinct_counts_series": (READ, single_model_argument),
     "get_distinct_counts_totals": (READ, single_model_argument),
@@ -92,7 +95,9 @@ def make_method(key):
 class RedisSnubaTSDBMeta(type):
     def __new__(cls, name, bases, attrs):
         for key in method_specifications.keys():
-            attrs[key] = make_method(key)
+            # methods which need to talk to several backends at once are
+            # implemented explicitly
+            attrs.setdefault(key, make_method(key))
         return type.__new__(cls, name, bases, attrs)
 
 
@@ -121,3 +126,22 @@ class RedisSnubaTSDB(BaseTSDB, metaclass=RedisSnubaTSDBMeta):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super().__init__(**options)
+
+    def get_range_multi(self, queries, start, end, rollup=None, use_cache=False):
+        # Unlike all other methods, a single call may span models that are
+        # served by different backends, so split the queries up accordingly.
+        queries_by_backend = defaultdict(list)
+        for query in queries:
+            backend = selector_func(
+                "get_range_multi", {"queries": [query]}, self.switchover_timestamp
+            )
+            queries_by_backend[backend].append(query)
+
+        results = {}
+        for backend, backend_queries in queries_by_backend.items():
+            results.update(
+                self.backends[backend].get_range_multi(
+                    backend_queries, start, end, rollup, use_cache=use_cache
+                )
+            )
+        return results
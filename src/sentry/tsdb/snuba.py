@@ -7,7 +7,7 @@ from typing import Any, Optional, Sequence
 
 from sentry.constants import DataCategory
 from sentry.ingest.inbound_filters import FILTER_STAT_KEYS_TO_VALUES
-from sentry.tsdb.base import BaseTSDB, TSDBModel
+from sentry.tsdb.base import BaseTSDB, SeriesTable, TSDBModel
 from sentry.utils import outcomes, snuba
 from sentry.utils.dates import to_datetime
 
@@ -469,6 +469,38 @@ class SnubaTSDB(BaseTSDB):
         conditions=None,
         use_cache=False,
         jitter_value=None,
+    ):
+        result = self._get_range_data(
+            model, keys, start, end, rollup, environment_ids, conditions, use_cache, jitter_value
+        )
+        # convert
+        #    {group:{timestamp:count, ...}}
+        # into
+        #    {group: [(timestamp, count), ...]}
+        return {k: sorted(result[k].items()) for k in result}
+
+    def get_range_table(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        conditions=None,
+        use_cache=False,
+        jitter_value=None,
+    ):
+        result = self._get_range_data(
+            model, keys, start, end, rollup, environment_ids, conditions, use_cache, jitter_value
+        )
+        # convert
+        #    {group:{timestamp:count, ...}}
+        # into columns of counts per group, sharing the timestamps
+        return SeriesTable.from_buckets(result)
+
+    def _get_range_data(
+        self, model, keys, start, end, rollup, environment_ids, conditions, use_cache, jitter_value
     ):
         model_query_settings = self.model_query_settings.get(model)
         assert model_query_settings is not None, f"Unsupported TSDBModel: {model.name}"
@@ -478,7 +510,7 @@ class SnubaTSDB(BaseTSDB):
         else:
             aggregate_function = "count()"
 
-        result = self.get_data(
+        return self.get_data(
             model,
             keys,
             start,
@@ -491,11 +523,6 @@ class SnubaTSDB(BaseTSDB):
             use_cache=use_cache,
             jitter_value=jitter_value,
         )
-        # convert
-        #    {group:{timestamp:count, ...}}
-        # into
-        #    {group: [(timestamp, count), ...]}
-        return {k: sorted(result[k].items()) for k in result}
 
     def get_distinct_counts_series(
         self, model, keys, start, end=None, rollup=None, environment_id=None
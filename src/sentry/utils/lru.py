@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar
+
+__all__ = ["LRUCache"]
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A bounded, thread-safe, in-process LRU cache.
+
+    Each entry counts towards ``max_size`` with the ``size`` it was set with,
+    which is 1 unless given, so that caches can be bounded by the number of
+    entries as well as by e.g. their size in bytes. If ``ttl`` is given,
+    entries expire that many seconds after they were set.
+
+    Values are stored and returned as they are. Callers that hand them out
+    to code which may mutate them have to store copies.
+
+    >>> cache = LRUCache(max_size=2)
+    >>> cache.set("a", 1)
+    []
+    >>> cache.get("a")
+    1
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size = 0
+        # key -> (expires_at, size, value)
+        self._items: "OrderedDict[K, Tuple[Optional[float], int, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            expires_at, _, value = item
+            if expires_at is not None and expires_at < monotonic():
+                self._remove(key)
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, size: int = 1) -> List[Tuple[K, V]]:
+        """
+        Adds or replaces the entry for ``key``, and returns the entries that
+        were evicted to make room for it, least recently used first.
+        """
+        expires_at = monotonic() + self.ttl if self.ttl is not None else None
+        evicted = []
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+            self._items[key] = (expires_at, size, value)
+            self.size += size
+
+            while self.size > self.max_size:
+                evicted_key, (_, evicted_size, evicted_value) = self._items.popitem(last=False)
+                self.size -= evicted_size
+                evicted.append((evicted_key, evicted_value))
+
+        return evicted
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _remove(self, key: K) -> None:
+        _, size, _ = self._items.pop(key)
+        self.size -= size
@@ -6,6 +6,7 @@ import os
 import random
 import re
 from abc import ABC, abstractmethod
+from array import array
 from collections import defaultdict, deque
 from datetime import timedelta
 from enum import Enum
@@ -273,8 +274,7 @@ def _detect_performance_problems(
         MNPlusOneDBSpanDetector(detection_settings, data),
     ]
 
-    for detector in detectors:
-        run_detector_on_data(detector, data)
+    run_detectors_on_data(detectors, data)
 
     # Metrics reporting only for detection, not created issues.
     report_metrics_for_detectors(data, event_id, detectors, sdk_span)
@@ -316,14 +316,25 @@ def _detect_performance_problems(
 
 
 def run_detector_on_data(detector, data):
-    if not detector.is_event_eligible(data):
+    run_detectors_on_data([detector], data)
+
+
+def run_detectors_on_data(detectors, data):
+    """
+    Runs all eligible detectors in a single pass over the spans of an event,
+    sharing one `SpanTable` between them.
+    """
+    detectors = [detector for detector in detectors if detector.is_event_eligible(data)]
+    if not detectors:
         return
 
-    spans = data.get("spans", [])
-    for span in spans:
-        detector.visit_span(span)
+    spans = SpanTable(data.get("spans", []))
+    for index in range(len(spans)):
+        for detector in detectors:
+            detector.visit_span_at(spans, index)
 
-    detector.on_complete()
+    for detector in detectors:
+        detector.on_complete()
 
 
 def fingerprint_group(transaction_name, span_op, hash, problem_class):
@@ -403,6 +414,82 @@ def total_span_time(span_list: List[Dict[str, Any]]) -> float:
     return total_duration * 1000
 
 
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_microseconds(value: timedelta) -> int:
+    return value // _MICROSECOND
+
+
+def _timestamp_to_microseconds(timestamp: Optional[float]) -> int:
+    # Rounds like `timedelta(seconds=timestamp)`, so comparisons against the
+    # table give the same results as comparisons of timedeltas.
+    return timedelta(seconds=timestamp or 0) // _MICROSECOND
+
+
+class SpanTable:
+    """
+    A columnar view of the spans of an event, parsed once and shared by all
+    detectors.
+
+    Every column is indexed by the position of the span in `spans`.
+    Timestamps and durations are stored in microseconds. `parent_indices`
+    holds the position of the parent span, or -1 if the parent is not part of
+    the table.
+    """
+
+    __slots__ = (
+        "spans",
+        "span_ids",
+        "parent_span_ids",
+        "parent_indices",
+        "ops",
+        "descriptions",
+        "hashes",
+        "start_timestamps",
+        "timestamps",
+        "durations",
+        "_fingerprints",
+    )
+
+    def __init__(self, spans: Sequence[Span]):
+        self.spans = spans
+        self.span_ids = [span.get("span_id", None) for span in spans]
+        self.parent_span_ids = [span.get("parent_span_id", None) for span in spans]
+        self.ops = [span.get("op", None) for span in spans]
+        self.descriptions = [span.get("description", None) for span in spans]
+        self.hashes = [span.get("hash", None) for span in spans]
+        self.start_timestamps = array(
+            "q", (_timestamp_to_microseconds(span.get("start_timestamp", 0)) for span in spans)
+        )
+        self.timestamps = array(
+            "q", (_timestamp_to_microseconds(span.get("timestamp", 0)) for span in spans)
+        )
+        self.durations = array(
+            "q", (end - start for start, end in zip(self.start_timestamps, self.timestamps))
+        )
+
+        positions = {span_id: index for index, span_id in enumerate(self.span_ids) if span_id}
+        self.parent_indices = array(
+            "q", (positions.get(parent_id, -1) for parent_id in self.parent_span_ids)
+        )
+        self._fingerprints: Dict[int, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def duration(self, index: int) -> timedelta:
+        return timedelta(microseconds=self.durations[index])
+
+    def fingerprint(self, index: int) -> Optional[str]:
+        """Returns `fingerprint_span` of a span, computing it at most once."""
+        try:
+            return self._fingerprints[index]
+        except KeyError:
+            rv = self._fingerprints[index] = fingerprint_span(self.spans[index])
+            return rv
+
+
 class PerformanceDetector(ABC):
     """
     Classes of this type have their visit functions called as the event is walked once and will store a performance issue if one is detected.
@@ -450,6 +537,13 @@ class PerformanceDetector(ABC):
     def visit_span(self, span: Span) -> None:
         raise NotImplementedError
 
+    def visit_span_at(self, spans: SpanTable, index: int) -> None:
+        """
+        Visits the span at `index` of the event's `SpanTable`. Detectors
+        override this to read the pre-parsed columns instead of the raw span.
+        """
+        self.visit_span(spans.spans[index])
+
     def on_complete(self) -> None:
         pass
 
@@ -496,25 +590,34 @@ class SlowSpanDetector(PerformanceDetector):
         self.stored_problems = {}
 
     def visit_span(self, span: Span):
-        settings_for_span = self.settings_for_span(span)
-        if not settings_for_span:
+        self.visit_span_at(SpanTable([span]), 0)
+
+    def visit_span_at(self, spans: SpanTable, index: int):
+        op = spans.ops[index]
+        span_id = spans.span_ids[index]
+        if not op or not span_id:
+            return
+
+        settings = next(
+            (setting for setting in self.settings if self.find_span_prefix(setting, op)), None
+        )
+        if not settings:
             return
-        op, span_id, op_prefix, span_duration, settings = settings_for_span
         duration_threshold = settings.get("duration_threshold")
 
-        fingerprint = fingerprint_span(span)
+        fingerprint = spans.fingerprint(index)
 
         if not fingerprint:
             return
 
+        span = spans.spans[index]
         if not SlowSpanDetector.is_span_eligible(span):
             return
 
-        description = span.get("description", None)
-        description = description.strip()
+        description = spans.descriptions[index].strip()
 
-        if span_duration >= timedelta(
-            milliseconds=duration_threshold
+        if spans.durations[index] >= to_microseconds(
+            timedelta(milliseconds=duration_threshold)
         ) and not self.stored_problems.get(fingerprint, False):
             spans_involved = [span_id]
 
@@ -581,21 +684,24 @@ class RenderBlockingAssetSpanDetector(PerformanceDetector):
                 self.fcp = fcp
 
     def visit_span(self, span: Span):
+        self.visit_span_at(SpanTable([span]), 0)
+
+    def visit_span_at(self, spans: SpanTable, index: int):
         if not self.fcp:
             return
 
-        op = span.get("op", None)
+        op = spans.ops[index]
         if op not in ["resource.link", "resource.script"]:
             return False
 
-        if self._is_blocking_render(span):
-            span_id = span.get("span_id", None)
-            fingerprint = fingerprint_span(span)
+        if self._is_blocking_render(spans, index):
+            span_id = spans.span_ids[index]
+            fingerprint = spans.fingerprint(index)
             if span_id and fingerprint:
                 self.stored_problems[fingerprint] = PerformanceProblem(
                     fingerprint=fingerprint,
                     op=op,
-                    desc=span.get("description") or "",
+                    desc=spans.descriptions[index] or "",
                     type=GroupType.PERFORMANCE_RENDER_BLOCKING_ASSET_SPAN,
                     offender_span_ids=[span_id],
                     parent_span_ids=[],
@@ -604,21 +710,18 @@ class RenderBlockingAssetSpanDetector(PerformanceDetector):
 
         # If we visit a span that starts after FCP, then we know we've already
         # seen all possible render-blocking resource spans.
-        span_start_timestamp = timedelta(seconds=span.get("start_timestamp", 0))
-        fcp_timestamp = self.transaction_start + self.fcp
-        if span_start_timestamp >= fcp_timestamp:
+        fcp_timestamp = to_microseconds(self.transaction_start + self.fcp)
+        if spans.start_timestamps[index] >= fcp_timestamp:
             # Early return for all future span visits.
             self.fcp = None
 
-    def _is_blocking_render(self, span):
-        span_end_timestamp = timedelta(seconds=span.get("timestamp", 0))
-        fcp_timestamp = self.transaction_start + self.fcp
-        if span_end_timestamp >= fcp_timestamp:
+    def _is_blocking_render(self, spans: SpanTable, index: int):
+        fcp_timestamp = to_microseconds(self.transaction_start + self.fcp)
+        if spans.timestamps[index] >= fcp_timestamp:
             return False
 
-        span_duration = get_span_duration(span)
         fcp_ratio_threshold = self.settings.get("fcp_ratio_threshold")
-        return span_duration / self.fcp > fcp_ratio_threshold
+        return spans.duration(index) / self.fcp > fcp_ratio_threshold
 
 
 class NPlusOneAPICallsDetector(PerformanceDetector):
@@ -645,17 +748,19 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
         self.spans: list[Span] = []
 
     def visit_span(self, span: Span) -> None:
-        if not NPlusOneAPICallsDetector.is_span_eligible(span):
-            return
+        self.visit_span_at(SpanTable([span]), 0)
 
-        op = span.get("op", None)
+    def visit_span_at(self, spans: SpanTable, index: int) -> None:
+        op = spans.ops[index]
         if op not in self.settings.get("allowed_span_ops", []):
             return
 
         duration_threshold = timedelta(milliseconds=self.settings.get("duration_threshold"))
-        span_duration = get_span_duration(span)
+        if spans.durations[index] < to_microseconds(duration_threshold):
+            return
 
-        if span_duration < duration_threshold:
+        span = spans.spans[index]
+        if not NPlusOneAPICallsDetector.is_span_eligible(span):
             return
 
         previous_span = self.spans[-1] if len(self.spans) > 0 else None
@@ -808,16 +913,25 @@ class ConsecutiveDBSpanDetector(PerformanceDetector):
         self.stored_problems: dict[str, PerformanceProblem] = {}
         self.consecutive_db_spans: list[Span] = []
         self.independent_db_spans: list[Span] = []
+        self.last_span_ends = 0
 
     def visit_span(self, span: Span) -> None:
-        span_id = span.get("span_id", None)
+        self.visit_span_at(SpanTable([span]), 0)
+
+    def visit_span_at(self, spans: SpanTable, index: int) -> None:
+        span_id = spans.span_ids[index]
 
-        if not span_id or not self._is_db_query(span) or self._overlaps_last_span(span):
+        if (
+            not span_id
+            or not self._is_db_query(spans.ops[index], spans.descriptions[index])
+            or self._overlaps_last_span(spans.start_timestamps[index])
+        ):
             self._validate_and_store_performance_problem()
             self._reset_variables()
             return
 
-        self._add_problem_span(span)
+        self._add_problem_span(spans.spans[index])
+        self.last_span_ends = spans.timestamps[index]
 
     def _add_problem_span(self, span: Span) -> None:
         self.consecutive_db_spans.append(span)
@@ -909,23 +1023,19 @@ class ConsecutiveDBSpanDetector(PerformanceDetector):
 
         return total_duration - max(max_independent_span_duration, sum_of_dependent_span_durations)
 
-    def _overlaps_last_span(self, span: Span) -> bool:
+    def _overlaps_last_span(self, span_begins: int) -> bool:
         if len(self.consecutive_db_spans) == 0:
             return False
 
-        last_span = self.consecutive_db_spans[-1]
-
-        last_span_ends = timedelta(seconds=last_span.get("timestamp", 0))
-        current_span_begins = timedelta(seconds=span.get("start_timestamp", 0))
-        return last_span_ends > current_span_begins
+        return self.last_span_ends > span_begins
 
     def _reset_variables(self) -> None:
         self.consecutive_db_spans = []
         self.independent_db_spans = []
 
-    def _is_db_query(self, span: Span) -> bool:
-        op: str = span.get("op", "") or ""
-        description: str = span.get("description", "") or ""
+    def _is_db_query(self, op: Optional[str], description: Optional[str]) -> bool:
+        op = op or ""
+        description = description or ""
         is_db_op = op == "db" or op.startswith("db.sql")
         is_query = "SELECT" in description.upper()  # TODO - make this more elegant
         return is_db_op and is_query
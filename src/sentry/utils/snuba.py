@@ -2,6 +2,7 @@ import functools
 import logging
 import os
 import re
+import threading
 import time
 from collections import namedtuple
 from concurrent.futures import ThreadPoolExecutor
@@ -9,10 +10,22 @@ from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
 from hashlib import sha1
-from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import pytz
+import rapidjson
 import sentry_sdk
 import urllib3
 from dateutil.parser import parse as parse_datetime
@@ -22,6 +35,8 @@ from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
 
+from sentry import options
+from sentry.locks import locks
 from sentry.models import (
     Environment,
     Group,
@@ -38,6 +53,8 @@ from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.locking import UnableToAcquireLock
+from sentry.utils.locking.lock import Lock
 
 logger = logging.getLogger(__name__)
 
@@ -360,9 +377,25 @@ _snuba_pool = connection_from_url(
         allowed_methods={"GET", "POST", "DELETE"},
     ),
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
-    maxsize=10,
+    maxsize=settings.SENTRY_SNUBA_MAX_CONNECTIONS,
 )
 _query_thread_pool = ThreadPoolExecutor(max_workers=10)
+# Runs bulk queries when `snuba.bulk-query.max-concurrency` is set, it is
+# replaced whenever that option changes.
+_bulk_query_thread_pool: Optional[ThreadPoolExecutor] = None
+_bulk_query_thread_pool_size = 0
+_bulk_query_thread_pool_lock = threading.Lock()
+# (referrer, limit) -> semaphore bounding the referrer's concurrent queries
+_referrer_semaphores: MutableMapping[Tuple[str, int], threading.BoundedSemaphore] = {}
+_referrer_semaphores_lock = threading.Lock()
+# Used to refresh stale query cache entries after they have been served.
+_cache_refresh_thread_pool = ThreadPoolExecutor(max_workers=2)
+# Cache keys with a refresh queued or running in this process.
+_refreshing_cache_keys: Set[str] = set()
+_refreshing_cache_keys_lock = threading.Lock()
+
+# Bytes read from Snuba at a time, when decoding responses while receiving them.
+STREAM_DECODE_CHUNK_SIZE = 64 * 1024
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -747,6 +780,137 @@ def bulk_raw_query(
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
+def _get_inflight_lock(cache_key: str) -> Lock:
+    # Background refreshes are de-duplicated even when callers do not wait
+    # for in-flight queries, no query runs longer than the Snuba timeout.
+    return locks.get(
+        f"{cache_key}:inflight",
+        duration=settings.SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS or settings.SENTRY_SNUBA_TIMEOUT,
+        name="snuba_query_cache",
+    )
+
+
+def _try_acquire(lock: Lock) -> bool:
+    try:
+        lock.acquire()
+    except UnableToAcquireLock:
+        return False
+    return True
+
+
+def _set_cached_result(cache_key: str, result: Any) -> None:
+    payload = json.dumps(result)
+    cache.set(cache_key, payload, settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
+    if settings.SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS:
+        cache.set(
+            f"{cache_key}:stale",
+            payload,
+            settings.SENTRY_SNUBA_CACHE_TTL_SECONDS + settings.SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS,
+        )
+
+
+def _query_and_cache(
+    to_query: Sequence[Tuple[int, SnubaQueryBody, Optional[str]]],
+    headers: Mapping[str, str],
+    inflight_locks: Sequence[Lock] = (),
+) -> List[Tuple[int, Any]]:
+    results = []
+    try:
+        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+            if cache_key:
+                _set_cached_result(cache_key, result)
+            results.append((query_pos, result))
+    finally:
+        for lock in inflight_locks:
+            lock.release()
+
+    return results
+
+
+def _wait_for_inflight_queries(
+    waiting: Sequence[Tuple[int, SnubaQueryBody, str]],
+    headers: Mapping[str, str],
+    metric_tags: Optional[Mapping[str, str]],
+) -> List[Tuple[int, Any]]:
+    """
+    Waits for other workers to cache the results of queries they are running.
+
+    Queries whose in-flight marker goes away without a cached result (e.g.
+    because the other worker failed), or that are still running once the
+    marker would have expired, are run by this worker instead.
+    """
+    results = []
+    pending = list(waiting)
+    deadline = time.monotonic() + settings.SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS
+    delay = 0.05
+    to_query = []
+    inflight_locks = []
+
+    while pending and time.monotonic() < deadline:
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay = min(delay * 2, 1.0)
+
+        cache_data = cache.get_many([cache_key for _, _, cache_key in pending])
+        still_pending = []
+        for query_pos, query_params, cache_key in pending:
+            cached_result = cache_data.get(cache_key)
+            if cached_result is not None:
+                metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                results.append((query_pos, json.loads(cached_result)))
+                continue
+
+            lock = _get_inflight_lock(cache_key)
+            if not _try_acquire(lock):
+                still_pending.append((query_pos, query_params, cache_key))
+                continue
+
+            # The other worker may have finished between both checks.
+            cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                lock.release()
+                metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                results.append((query_pos, json.loads(cached_result)))
+            else:
+                to_query.append((query_pos, query_params, cache_key))
+                inflight_locks.append(lock)
+        pending = still_pending
+
+    if pending:
+        metrics.incr("snuba.query_cache.inflight_timeout", amount=len(pending), tags=metric_tags)
+        to_query.extend(pending)
+
+    if to_query:
+        results.extend(_query_and_cache(to_query, headers, inflight_locks))
+
+    return results
+
+
+def _revalidate_cached_queries(
+    to_refresh: Sequence[Tuple[SnubaQueryBody, str]],
+    headers: Mapping[str, str],
+) -> None:
+    for query_params, cache_key in to_refresh:
+        try:
+            # Only one worker refreshes a query, and none while it is running
+            # to fill the cache already.
+            lock = _get_inflight_lock(cache_key)
+            if not _try_acquire(lock):
+                continue
+
+            # Another worker may have refreshed it since it was served stale.
+            if cache.get(cache_key) is not None:
+                lock.release()
+                continue
+
+            _query_and_cache([(0, query_params, cache_key)], headers, [lock])
+        except Exception:
+            logger.exception("snuba.query_cache.revalidate_failed")
+        finally:
+            with _refreshing_cache_keys_lock:
+                _refreshing_cache_keys.discard(cache_key)
+
+
 def _apply_cache_and_build_results(
     snuba_param_list: Sequence[SnubaQueryBody],
     referrer: Optional[str] = None,
@@ -761,29 +925,83 @@ def _apply_cache_and_build_results(
     query_param_list = list(enumerate(snuba_param_list))
 
     results = []
+    inflight_locks: List[Lock] = []
+    waiting: List[Tuple[int, SnubaQueryBody, str]] = []
 
     if use_cache:
+        metric_tags = {"referrer": referrer} if referrer else None
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
         cache_data = cache.get_many(cache_keys)
         to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
         for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
             cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
             if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
                 to_query.append((query_pos, query_params, cache_key))
             else:
                 metrics.incr("snuba.query_cache.hit", tags=metric_tags)
                 results.append((query_pos, json.loads(cached_result)))
+
+        if to_query and settings.SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS:
+            # Serve expired results while a background thread refreshes them.
+            stale_data = cache.get_many([f"{cache_key}:stale" for _, _, cache_key in to_query])
+            to_refresh = []
+            missing = []
+            for query_pos, query_params, cache_key in to_query:
+                stale_result = stale_data.get(f"{cache_key}:stale")
+                if stale_result is None:
+                    missing.append((query_pos, query_params, cache_key))
+                else:
+                    metrics.incr("snuba.query_cache.stale", tags=metric_tags)
+                    results.append((query_pos, json.loads(stale_result)))
+                    to_refresh.append((query_params, cache_key))
+            to_query = missing
+
+            # Don't queue another refresh of a query while one is pending.
+            with _refreshing_cache_keys_lock:
+                to_refresh = [
+                    (query_params, cache_key)
+                    for query_params, cache_key in to_refresh
+                    if cache_key not in _refreshing_cache_keys
+                ]
+                _refreshing_cache_keys.update(cache_key for _, cache_key in to_refresh)
+
+            if to_refresh:
+                _cache_refresh_thread_pool.submit(_revalidate_cached_queries, to_refresh, headers)
+
+        # Stale hits are counted separately, not as misses.
+        if to_query:
+            metrics.incr("snuba.query_cache.miss", amount=len(to_query), tags=metric_tags)
+
+        if to_query and settings.SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS:
+            # Only one worker runs a query at a time, all others wait for it to
+            # cache the result.
+            leading = []
+            for query_pos, query_params, cache_key in to_query:
+                lock = _get_inflight_lock(cache_key)
+                if not _try_acquire(lock):
+                    waiting.append((query_pos, query_params, cache_key))
+                    continue
+
+                # Another worker may have cached the result and released the
+                # lock since the cache was checked.
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    lock.release()
+                    metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                    results.append((query_pos, json.loads(cached_result)))
+                else:
+                    leading.append((query_pos, query_params, cache_key))
+                    inflight_locks.append(lock)
+            to_query = leading
     else:
+        metric_tags = None
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
 
     if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+        results.extend(_query_and_cache(to_query, headers, inflight_locks))
+
+    if waiting:
+        results.extend(_wait_for_inflight_queries(waiting, headers, metric_tags))
 
     # Sort so that we get the results back in the original param list order
     results.sort()
@@ -818,16 +1036,33 @@ def _bulk_snuba_query(
             if scope.transaction:
                 parent_api = scope.transaction.name
 
+        semaphore = _get_referrer_semaphore(query_referrer)
+        if semaphore is not None:
+            query_fn = functools.partial(_run_bounded, query_fn, semaphore, query_referrer)
+
         if len(snuba_param_list) > 1:
-            query_results = list(
-                _query_thread_pool.map(
-                    query_fn,
-                    [
-                        (params, Hub(Hub.current), headers, parent_api)
-                        for params in snuba_param_list
-                    ],
+            executor = _get_bulk_query_thread_pool()
+            if executor is None:
+                query_results = list(
+                    _query_thread_pool.map(
+                        query_fn,
+                        [
+                            (params, Hub(Hub.current), headers, parent_api)
+                            for params in snuba_param_list
+                        ],
+                    )
                 )
-            )
+            else:
+                # Submit all but the first query, which runs on this thread
+                # rather than leaving it idle while waiting for the others.
+                futures = [
+                    executor.submit(query_fn, (params, Hub(Hub.current), headers, parent_api))
+                    for params in snuba_param_list[1:]
+                ]
+                query_results = [
+                    query_fn((snuba_param_list[0], Hub(Hub.current), headers, parent_api))
+                ]
+                query_results.extend(future.result() for future in futures)
         else:
             # No need to submit to the thread pool if we're just performing a single query
             query_results = [query_fn((snuba_param_list[0], Hub(Hub.current), headers, parent_api))]
@@ -835,7 +1070,10 @@ def _bulk_snuba_query(
     results = []
     for response, _, reverse in query_results:
         try:
-            body = json.loads(response.data)
+            if isinstance(response, DecodedResponse):
+                body = response.body
+            else:
+                body = json.loads(response.data)
             if SNUBA_INFO:
                 if "sql" in body:
                     print(  # NOQA: only prints when an env variable is set
@@ -877,7 +1115,101 @@ def _bulk_snuba_query(
     return results
 
 
-RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
+class DecodedResponse:
+    """
+    A successful Snuba response, whose body was decoded while it was received.
+    """
+
+    status = 200
+
+    def __init__(self, body: Any) -> None:
+        self.body = body
+
+
+def _read_response(
+    response: urllib3.response.HTTPResponse,
+) -> Union[urllib3.response.HTTPResponse, DecodedResponse]:
+    """
+    Reads a response opened with `preload_content=False`.
+
+    Successful responses are decoded from the connection in chunks, so their
+    bodies are never held in memory as a whole. This runs on the thread that
+    ran the query, so the responses of a bulk query are decoded concurrently.
+    Error responses are read as they are, to be handled along with their
+    status.
+    """
+    try:
+        if response.status != 200:
+            response.read(cache_content=True)
+            return response
+
+        try:
+            body = rapidjson.load(response, chunk_size=STREAM_DECODE_CHUNK_SIZE)
+        except ValueError as e:
+            raise UnexpectedResponseError(f"Could not decode JSON response: {e}")
+        return DecodedResponse(body)
+    finally:
+        response.drain_conn()
+        response.release_conn()
+
+
+RawResult = Tuple[
+    Union[urllib3.response.HTTPResponse, DecodedResponse],
+    Callable[[Any], Any],
+    Callable[[Any], Any],
+]
+
+
+def _get_bulk_query_thread_pool() -> Optional[ThreadPoolExecutor]:
+    global _bulk_query_thread_pool, _bulk_query_thread_pool_size
+
+    # More concurrent queries than connections would open (and then discard)
+    # new connections for every query above the limit.
+    max_workers = min(
+        options.get("snuba.bulk-query.max-concurrency"), settings.SENTRY_SNUBA_MAX_CONNECTIONS
+    )
+    if max_workers <= 0:
+        return None
+
+    with _bulk_query_thread_pool_lock:
+        if _bulk_query_thread_pool is None or _bulk_query_thread_pool_size != max_workers:
+            # The replaced pool is not shut down, as other threads may have
+            # fetched it and not submitted to it yet. Its idle workers exit
+            # once it has been garbage collected.
+            _bulk_query_thread_pool = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="snuba-bulk-query"
+            )
+            _bulk_query_thread_pool_size = max_workers
+        return _bulk_query_thread_pool
+
+
+def _get_referrer_semaphore(referrer: str) -> Optional[threading.BoundedSemaphore]:
+    limit = options.get("snuba.bulk-query.referrer-concurrency").get(referrer)
+    if not limit:
+        return None
+
+    with _referrer_semaphores_lock:
+        key = (referrer, limit)
+        semaphore = _referrer_semaphores.get(key)
+        if semaphore is None:
+            semaphore = _referrer_semaphores[key] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
+def _run_bounded(
+    query_fn: Callable[[Tuple[SnubaQuery, Hub, Mapping[str, str], str]], RawResult],
+    semaphore: threading.BoundedSemaphore,
+    referrer: str,
+    params: Tuple[SnubaQuery, Hub, Mapping[str, str], str],
+) -> RawResult:
+    start = time.time()
+    with semaphore:
+        metrics.timing(
+            "snuba.bulk_query.referrer_limit_wait",
+            time.time() - start,
+            tags={"referrer": referrer},
+        )
+        return query_fn(params)
 
 
 def _snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str], str]) -> RawResult:
@@ -911,7 +1243,7 @@ def _legacy_snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str], str]) -
 
 def _raw_snql_query(
     request: Request, thread_hub: Hub, headers: Mapping[str, str]
-) -> urllib3.response.HTTPResponse:
+) -> Union[urllib3.response.HTTPResponse, DecodedResponse]:
     # Enter hub such that http spans are properly nested
     with thread_hub, timer("snql_query"):
         referrer = headers.get("referer", "<unknown>")
@@ -929,6 +1261,16 @@ def _raw_snql_query(
 
         with thread_hub.start_span(op="snuba_snql.run", description=str(request)) as span:
             span.set_tag("snuba.referrer", referrer)
+            if options.get("snuba.stream-decode-responses"):
+                return _read_response(
+                    _snuba_pool.urlopen(
+                        "POST",
+                        f"/{request.dataset}/snql",
+                        body=body,
+                        headers=headers,
+                        preload_content=False,
+                    )
+                )
             return _snuba_pool.urlopen(
                 "POST", f"/{request.dataset}/snql", body=body, headers=headers
             )
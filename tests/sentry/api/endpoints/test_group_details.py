@@ -128,12 +128,13 @@ class GroupDetailsTest(APITestCase, SnubaTestCase):
         from sentry.api.endpoints.group_details import tsdb
 
         with mock.patch(
-            "sentry.api.endpoints.group_details.tsdb.get_range", side_effect=tsdb.get_range
-        ) as get_range:
+            "sentry.api.endpoints.group_details.tsdb.get_range_table",
+            side_effect=tsdb.get_range_table,
+        ) as get_range_table:
             response = self.client.get(url, {"environment": "production"}, format="json")
             assert response.status_code == 200
-            assert get_range.call_count == 2
-            for args, kwargs in get_range.call_args_list:
+            assert get_range_table.call_count == 2
+            for args, kwargs in get_range_table.call_args_list:
                 assert kwargs["environment_ids"] == [environment.id]
 
         response = self.client.get(url, {"environment": "invalid"}, format="json")
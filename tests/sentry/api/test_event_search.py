@@ -15,6 +15,8 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    _parse_tree,
+    _search_filter_cache,
     parse_search_query,
 )
 from sentry.constants import MODULE_ROOT
@@ -205,6 +207,11 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
     ParseSearchQueryTest.
     """
 
+    def setUp(self):
+        # Some tests patch field types, which must not leak into cached results.
+        _parse_tree.cache_clear()
+        _search_filter_cache.clear()
+
     def test_key_remapping(self):
         config = SearchConfig(key_mappings={"target_value": ["someValue", "legacy-value"]})
 
@@ -632,6 +639,69 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
         assert search_filter.value.value == 'a"b'
 
 
+class ParseSearchQueryCacheTest(SimpleTestCase):
+    def setUp(self):
+        _parse_tree.cache_clear()
+        _search_filter_cache.clear()
+
+    def test_cached_result(self):
+        query = "user.email:foo@example.com release:1.2.3 some text"
+        result = parse_search_query(query)
+        assert len(_search_filter_cache) == 1
+
+        cached_result = parse_search_query(query)
+        assert cached_result == result
+        # Callers get their own list, so they may modify it.
+        assert cached_result is not result
+        assert _parse_tree.cache_info().hits == 1
+
+    def test_config_aware(self):
+        query = "someValue:123"
+        config = SearchConfig(key_mappings={"target_value": ["someValue"]})
+
+        assert parse_search_query(query) == [
+            SearchFilter(key=SearchKey(name="someValue"), operator="=", value=SearchValue("123"))
+        ]
+        assert parse_search_query(query, config=config) == [
+            SearchFilter(key=SearchKey(name="target_value"), operator="=", value=SearchValue("123"))
+        ]
+        assert parse_search_query(
+            query, config_overrides={"key_mappings": {"other_value": ["someValue"]}}
+        ) == [
+            SearchFilter(key=SearchKey(name="other_value"), operator="=", value=SearchValue("123"))
+        ]
+        assert len(_search_filter_cache) == 3
+        # The parse tree is shared between all configs.
+        assert _parse_tree.cache_info().currsize == 1
+
+    def test_relative_dates_not_cached(self):
+        query = "time:-2w"
+        now = timezone.now()
+        with freeze_time(now):
+            parse_search_query(query)
+        assert len(_search_filter_cache) == 0
+
+        later = now + timedelta(hours=1)
+        with freeze_time(later):
+            assert parse_search_query(query) == [
+                SearchFilter(
+                    key=SearchKey(name="time"),
+                    operator=">=",
+                    value=SearchValue(raw_value=later - timedelta(days=14)),
+                )
+            ]
+
+    def test_params_not_cached(self):
+        parse_search_query("transaction.duration:>1s", params={"environment": "production"})
+        assert len(_search_filter_cache) == 0
+
+    def test_parse_error_not_cached(self):
+        for _ in range(2):
+            with pytest.raises(InvalidSearchQuery, match="Parse error"):
+                parse_search_query("(user.email:foo@example.com OR user.email:bar@example.com")
+        assert len(_search_filter_cache) == 0
+
+
 @pytest.mark.parametrize(
     "raw,result",
     [
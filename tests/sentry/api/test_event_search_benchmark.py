@@ -0,0 +1,53 @@
+import pytest
+
+from sentry.api.event_search import _parse_tree, _search_filter_cache, parse_search_query
+from sentry.api.issue_search import issue_search_config
+from sentry.testutils.skips import requires_pytest_benchmark
+
+ISSUE_QUERIES = [
+    "is:unresolved",
+    "is:unresolved is:for_review assigned_or_suggested:[me, none]",
+    "is:unresolved level:error !assigned:me times_seen:>100",
+    'is:unresolved browser.name:Chrome url:"https://example.com/*" release:1.2.3',
+    "is:unresolved error.handled:false error.type:[TypeError, ValueError] "
+    "sdk.name:sentry.javascript.browser",
+]
+
+DISCOVER_QUERIES = [
+    "event.type:transaction",
+    "event.type:transaction transaction.duration:>1s http.method:GET",
+    "event.type:error (user.email:foo@example.com OR user.email:bar@example.com) "
+    "!environment:staging",
+    "transaction:/api/0/organizations/* measurements.lcp:>2500 measurements.fcp:<1000 "
+    "transaction.op:pageload",
+    "count():>100 p95(transaction.duration):>500ms failure_rate():>0.05",
+]
+
+QUERY_SETS = {
+    "issue": (ISSUE_QUERIES, issue_search_config),
+    "discover": (DISCOVER_QUERIES, None),
+}
+
+
+def clear_caches():
+    _parse_tree.cache_clear()
+    _search_filter_cache.clear()
+
+
+def parse_all(queries, config):
+    for query in queries:
+        parse_search_query(query, config=config)
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("query_set", ["issue", "discover"])
+@pytest.mark.parametrize("warm", [False, True], ids=["cold", "warm"])
+def test_parse_search_query(benchmark, query_set, warm):
+    queries, config = QUERY_SETS[query_set]
+
+    def setup():
+        clear_caches()
+        if warm:
+            parse_all(queries, config)
+
+    benchmark.pedantic(parse_all, args=(queries, config), setup=setup, rounds=200)
@@ -69,3 +69,54 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch_coalesces_updates(self):
+        group = Group.objects.create(project=Project(id=1))
+        other_group = Group.objects.create(project=Project(id=1))
+        the_date = timezone.now() + timedelta(days=5)
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 2}, {"id": group.id}, {"last_seen": the_date}, None),
+                (Group, {"times_seen": 3}, {"pk": other_group.id}, {"last_seen": the_date}, None),
+            ]
+        )
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 2
+        assert group_.last_seen == the_date
+        other_group_ = Group.objects.get(id=other_group.id)
+        assert other_group_.times_seen == other_group.times_seen + 3
+        assert other_group_.last_seen == the_date
+
+    def test_process_batch_updates_group_cache(self):
+        group = Group.objects.create(project=Project(id=1))
+        orig_times_seen = Group.objects.get_from_cache(id=group.id).times_seen
+        self.buf.process_batch([(Group, {"times_seen": 1}, {"id": group.id}, {}, None)])
+        assert Group.objects.get_from_cache(id=group.id).times_seen == orig_times_seen + 1
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch_sends_signal(self, buffer_incr_complete):
+        group = Group.objects.create(project=Project(id=1))
+        self.buf.process_batch([(Group, {"times_seen": 1}, {"id": group.id}, {}, None)])
+        buffer_incr_complete.send_robust.assert_called_once_with(
+            model=Group,
+            columns={"times_seen": 1},
+            filters={"id": group.id},
+            extra={},
+            created=False,
+            sender=Group,
+        )
+
+    def test_process_batch_falls_back_without_pk_filter(self):
+        columns = {"new_groups": 1}
+        filters = {"project_id": self.project.id, "release_id": self.release.id}
+        self.buf.process_batch([(ReleaseProject, columns, filters, None, None)])
+        assert ReleaseProject.objects.filter(new_groups=1, **filters).exists()
+
+    @mock.patch("sentry.buffer.base._bulk_update_rows")
+    def test_process_batch_skips_signal_only(self, bulk_update_rows):
+        group = Group.objects.create(project=Project(id=1))
+        prev_times_seen = group.times_seen
+        self.buf.process_batch([(Group, {"times_seen": 1}, {"id": group.id}, {}, True)])
+        assert not bulk_update_rows.called
+        group.refresh_from_db()
+        assert group.times_seen == prev_times_seen
@@ -103,6 +103,47 @@ class RedisBufferTest(TestCase):
         group = Group.objects.get_from_cache(id=self.group.id)
         assert group.times_seen == orig_times_seen + times_seen_incr
 
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_flush(self, process_batch):
+        self.buf.batch_flush = True
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo",
+            {"f": '{"pk": ["i","1"]}', "i+times_seen": "2", "m": "sentry.models.Group"},
+        )
+        client.hmset(
+            "bar",
+            {"f": '{"pk": ["i","2"]}', "i+times_seen": "3", "m": "sentry.models.Group"},
+        )
+        client.zadd("b:p", {"foo": 1, "bar": 1})
+        self.buf.process(batch_keys=["foo", "bar", "baz"])
+        process_batch.assert_called_once_with(
+            [
+                (Group, {"times_seen": 2}, {"pk": 1}, {}, None),
+                (Group, {"times_seen": 3}, {"pk": 2}, {}, None),
+            ]
+        )
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists("foo")
+        assert not client.exists("bar")
+        assert not client.exists("l:foo")
+
+    @freeze_time()
+    def test_group_cache_updated_batch_flush(self):
+        self.buf.batch_flush = True
+        self.buf.incr_batch_size = 100
+        orig_times_seen = Group.objects.get_from_cache(id=self.group.id).times_seen
+        self.buf.incr(
+            Group,
+            {"times_seen": 5},
+            {"pk": self.group.id},
+            {"last_seen": timezone.now()},
+        )
+        with self.tasks(), mock.patch("sentry.buffer", self.buf):
+            self.buf.process_pending()
+        group = Group.objects.get_from_cache(id=self.group.id)
+        assert group.times_seen == orig_times_seen + 5
+
     def test_get(self):
         model = mock.Mock()
         model.__name__ = "Mock"
@@ -7,6 +7,7 @@ from arroyo.backends.kafka import KafkaPayload
 from arroyo.types import BrokerValue, Message, Partition, Topic
 
 from sentry.eventstream.kafka.consumer_strategy import PostProcessForwarderStrategyFactory
+from sentry.testutils.helpers import override_options
 from sentry.utils import json
 
 
@@ -68,3 +69,30 @@ def test_dispatch_task(mock_dispatch: Mock) -> None:
 
     strategy.join()
     strategy.close()
+
+
+@pytest.mark.django_db
+@patch("sentry.eventstream.kafka.consumer_strategy.dispatch_post_process_group_tasks_by_group")
+@patch("sentry.eventstream.kafka.consumer_strategy.dispatch_post_process_group_task")
+def test_dispatch_task_batched_by_group(mock_dispatch: Mock, mock_dispatch_by_group: Mock) -> None:
+    commit = Mock()
+    partition = Partition(Topic("test"), 0)
+    factory = PostProcessForwarderStrategyFactory(concurrency=2, max_pending_futures=10)
+    strategy = factory.create_with_partitions(commit, {partition: 0})
+
+    with override_options({"post-process-forwarder:group-batch-window-ms": 60000}):
+        strategy.submit(Message(BrokerValue(get_kafka_payload(), partition, 1, datetime.now())))
+        strategy.submit(Message(BrokerValue(get_kafka_payload(), partition, 2, datetime.now())))
+        strategy.poll()
+
+        # Messages are held back until the batch window ends
+        assert not mock_dispatch_by_group.called
+
+        strategy.join()
+        strategy.close()
+
+    assert not mock_dispatch.called
+    mock_dispatch_by_group.assert_called_once()
+    (task_kwargs_list,) = mock_dispatch_by_group.call_args[0]
+    assert [task_kwargs["group_id"] for task_kwargs in task_kwargs_list] == [43, 43]
+    commit.assert_called_with({partition: 3}, force=True)
@@ -4,10 +4,14 @@ import pytest
 
 import sentry.tasks.post_process
 from sentry import options
-from sentry.eventstream.kafka.postprocessworker import PostProcessForwarderWorker
+from sentry.eventstream.kafka.postprocessworker import (
+    PostProcessForwarderWorker,
+    dispatch_post_process_group_tasks_by_group,
+)
 from sentry.eventstream.kafka.protocol import InvalidVersion
-from sentry.testutils.helpers import TaskRunner
+from sentry.testutils.helpers import TaskRunner, override_options
 from sentry.utils import json
+from sentry.utils.cache import cache_key_for_event
 
 
 @pytest.fixture
@@ -221,3 +225,48 @@ def test_transactions_post_process_forwarder_calls_post_process_group(
         )
 
     forwarder.shutdown()
+
+
+@pytest.mark.django_db
+@patch("sentry.eventstream.kafka.postprocessworker.post_process_group_batch.apply_async")
+@patch("sentry.eventstream.kafka.postprocessworker.post_process_group.apply_async")
+def test_dispatch_post_process_group_tasks_by_group(post_process_group_spy, batch_spy):
+    def get_task_kwargs(event_id, group_id):
+        return dict(
+            event_id=event_id,
+            project_id=1,
+            group_id=group_id,
+            primary_hash="311ee66a5b8e697929804ceb1c456ffe",
+            is_new=False,
+            is_regression=None,
+            is_new_group_environment=False,
+            queue="post_process_errors",
+        )
+
+    with override_options({"post-process-forwarder:group-batch-max-size": 2}):
+        dispatch_post_process_group_tasks_by_group(
+            [
+                get_task_kwargs("a" * 32, 43),
+                get_task_kwargs("b" * 32, 44),
+                get_task_kwargs("c" * 32, 43),
+                get_task_kwargs("d" * 32, 43),
+            ]
+        )
+
+    assert batch_spy.call_count == 1
+    jobs = batch_spy.call_args.kwargs["kwargs"]["jobs"]
+    assert [job["cache_key"] for job in jobs] == [
+        cache_key_for_event({"project": 1, "event_id": "a" * 32}),
+        cache_key_for_event({"project": 1, "event_id": "c" * 32}),
+    ]
+    assert batch_spy.call_args.kwargs["queue"] == "post_process_errors"
+    assert batch_spy.call_args.kwargs["time_limit"] == 240
+    assert batch_spy.call_args.kwargs["soft_time_limit"] == 220
+
+    # Batches of a single event use the regular task
+    assert [
+        call.kwargs["kwargs"]["cache_key"] for call in post_process_group_spy.call_args_list
+    ] == [
+        cache_key_for_event({"project": 1, "event_id": "d" * 32}),
+        cache_key_for_event({"project": 1, "event_id": "b" * 32}),
+    ]
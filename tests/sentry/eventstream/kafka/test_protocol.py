@@ -105,3 +105,53 @@ def test_get_task_kwargs_for_message_version_1_kafka_headers():
     assert kwargs["is_regression"] is False
     assert kwargs["is_new_group_environment"] is True
     assert kwargs["queue"] == "post_process_errors"
+
+
+def test_get_task_kwargs_for_message_kafka_headers_group_states():
+    kafka_headers = [
+        ("event_id", b"00000000000010008080808080808080"),
+        ("project_id", b"1"),
+        ("group_id", b"2"),
+        ("primary_hash", b"49f68a5c8493ec2c0bf489821c21fc3b"),
+        ("is_new", b"0"),
+        ("is_new_group_environment", b"0"),
+        ("is_regression", b"1"),
+        ("version", b"2"),
+        ("operation", b"insert"),
+        ("skip_consume", b"0"),
+        ("group_states", b'[{"id": 2, "is_new": false}]'),
+    ]
+
+    kwargs = get_task_kwargs_for_message_from_headers(kafka_headers)
+    assert kwargs == {
+        "event_id": "00000000000010008080808080808080",
+        "project_id": 1,
+        "group_id": 2,
+        "primary_hash": "49f68a5c8493ec2c0bf489821c21fc3b",
+        "is_new": False,
+        "is_regression": True,
+        "is_new_group_environment": False,
+        "group_states": [{"id": 2, "is_new": False}],
+        "queue": "post_process_errors",
+    }
+
+
+def test_get_task_kwargs_for_message_kafka_headers_skip_consume():
+    kafka_headers = [
+        ("version", b"2"),
+        ("operation", b"insert"),
+        ("skip_consume", b"1"),
+        ("group_states", b"not json"),
+    ]
+
+    assert get_task_kwargs_for_message_from_headers(kafka_headers) is None
+
+
+def test_get_task_kwargs_for_message_kafka_headers_invalid():
+    with pytest.raises(InvalidPayload):
+        get_task_kwargs_for_message_from_headers([("version", b"2"), ("operation", b"insert")])
+
+    with pytest.raises(InvalidVersion):
+        get_task_kwargs_for_message_from_headers(
+            [("version", b"100"), ("operation", b"insert"), ("skip_consume", b"1")]
+        )
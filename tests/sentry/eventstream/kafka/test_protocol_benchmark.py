@@ -0,0 +1,98 @@
+import pytest
+
+from sentry.eventstream.kafka.protocol import (
+    get_task_kwargs_for_message,
+    get_task_kwargs_for_message_from_headers,
+)
+from sentry.testutils.skips import requires_pytest_benchmark
+from sentry.utils import json
+
+EVENT_ID = "00000000000010008080808080808080"
+PRIMARY_HASH = "49f68a5c8493ec2c0bf489821c21fc3b"
+
+
+def get_message_value():
+    frames = [
+        {
+            "function": f"handler_{i}",
+            "module": f"app.views.module_{i}",
+            "filename": f"app/views/module_{i}.py",
+            "abs_path": f"/srv/app/views/module_{i}.py",
+            "lineno": i,
+            "context_line": "    return self.dispatch(request, *args, **kwargs)",
+            "in_app": True,
+            "vars": {"request": "<WSGIRequest: GET '/api/0/'>", "args": "()", "kwargs": "{}"},
+        }
+        for i in range(50)
+    ]
+    event_data = {
+        "project_id": 1,
+        "group_id": 2,
+        "event_id": EVENT_ID,
+        "organization_id": 1,
+        "message": "ValueError: invalid literal for int()",
+        "platform": "python",
+        "datetime": "2018-07-20T21:04:27.600640Z",
+        "data": {
+            "platform": "python",
+            "timestamp": 1532120667.60064,
+            "exception": {"values": [{"type": "ValueError", "stacktrace": {"frames": frames}}]},
+            "tags": [["environment", "production"], ["level", "error"]],
+        },
+        "primary_hash": PRIMARY_HASH,
+        "retention_days": 90,
+    }
+    task_state = {
+        "is_new": False,
+        "is_regression": False,
+        "is_new_group_environment": False,
+        "queue": "post_process_errors",
+        "skip_consume": False,
+        "group_states": [
+            {"id": 2, "is_new": False, "is_regression": False, "is_new_group_environment": False}
+        ],
+    }
+    return json.dumps([2, "insert", event_data, task_state]).encode("utf-8")
+
+
+def get_message_headers():
+    # As written by `KafkaEventStream._get_headers_for_insert` and `_send`.
+    headers = {
+        "Received-Timestamp": "1532120667.60064",
+        "event_id": EVENT_ID,
+        "project_id": "1",
+        "group_id": "2",
+        "primary_hash": PRIMARY_HASH,
+        "is_new": "0",
+        "is_new_group_environment": "0",
+        "is_regression": "0",
+        "skip_consume": "0",
+        "group_states": json.dumps(
+            [{"id": 2, "is_new": False, "is_regression": False, "is_new_group_environment": False}]
+        ),
+        "queue": "post_process_errors",
+        "operation": "insert",
+        "version": "2",
+    }
+    return [(k, v.encode("utf-8")) for k, v in headers.items()]
+
+
+def test_headers_match_body():
+    assert get_task_kwargs_for_message_from_headers(
+        get_message_headers()
+    ) == get_task_kwargs_for_message(get_message_value())
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("source", ["headers", "body"])
+def test_get_task_kwargs(benchmark, source):
+    if source == "headers":
+        decode, message = get_task_kwargs_for_message_from_headers, get_message_headers()
+    else:
+        decode, message = get_task_kwargs_for_message, get_message_value()
+
+    def decode_all():
+        for _ in range(100):
+            decode(message)
+
+    benchmark.pedantic(decode_all, rounds=200)
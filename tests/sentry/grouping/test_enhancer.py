@@ -2,6 +2,7 @@ import pytest
 
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer.compiled import CompiledRules
 
 
 def dump_obj(obj):
@@ -442,3 +443,85 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+def test_compiled_rules_candidates():
+    enhancements = Enhancements.from_config_string(
+        """
+function:panic_*                   -app
+function:panic_handler             ^-group
+module:core::*                     -app
+package:/usr/lib/**                -app
+!function:foo module:std::*        -app
+function:*bar                      -app
+category:telemetry                 -group
+"""
+    )
+    compiled = CompiledRules(enhancements.rules)
+
+    def candidates(frame, platform="native"):
+        return sorted(compiled._get_candidate_rules(create_match_frame(frame, platform)))
+
+    # rules without a non-negated matcher with a literal prefix are tested
+    # against every frame
+    assert compiled._unindexed_rules == {5, 6}
+
+    assert candidates({"function": "panic_handler"}) == [0, 1]
+    assert candidates({"function": "panic_other"}) == [0]
+    assert candidates({"function": "main", "module": "core::fmt"}) == [2]
+    assert candidates({"function": "main", "module": "std::io"}) == [4]
+    assert candidates({"function": "main", "package": "usr/lib/libc.so"}) == [3]
+    assert candidates({"function": "main", "package": "C:\\Windows\\a.dll"}) == []
+
+
+def test_compiled_rules_match_all_rules():
+    enhancements = Enhancements.from_config_string(
+        """
+function:panic_*                   -app
+function:panic_handler             ^-group
+module:core::*                     -app
+package:/usr/lib/**                -app
+[ function:main ] | function:run*  +app
+function:*bar                      -app
+family:native                      max-frames=3
+""",
+        bases=["common:v1"],
+    )
+    frames = [
+        {"function": "main", "package": "/usr/lib/libc.so"},
+        {"function": "run_foo", "module": "core::fmt"},
+        {"function": "foobar", "in_app": True},
+        {"function": "panic_handler"},
+        {"function": "panic_other", "module": "app::module"},
+    ]
+    match_frames = [create_match_frame(frame, "native") for frame in frames]
+
+    for kind, rules in [
+        ("modifier", enhancements._modifier_rules),
+        ("updater", enhancements._updater_rules),
+    ]:
+        expected = [
+            (rule.matcher_description, idx, str(action))
+            for rule in rules
+            for idx, action in rule.get_matching_frame_actions(match_frames, "native", None, {})
+        ]
+        assert expected
+        compiled = enhancements._get_compiled_rules(kind)
+        assert [
+            (rule.matcher_description, idx, str(action))
+            for rule, idx, action in compiled.iter_matching_frame_actions(
+                match_frames, "native", None, {}
+            )
+        ] == expected
+
+
+def test_compiled_rules_cached_per_config():
+    config = Enhancements.from_config_string("function:foo -app").dumps()
+
+    first = Enhancements.loads(config)
+    second = Enhancements.loads(config)
+    assert first.config_hash == second.config_hash
+    assert first._get_compiled_rules("modifier") is second._get_compiled_rules("modifier")
+
+    other = Enhancements.loads(Enhancements.from_config_string("function:bar -app").dumps())
+    assert other._get_compiled_rules("modifier") is not first._get_compiled_rules("modifier")
@@ -9,16 +9,18 @@ from sentry.ingest.transaction_clusterer.datasource.redis import (
     get_transaction_names,
     record_transaction_name,
 )
+from sentry.ingest.transaction_clusterer.matcher import RuleMatcher, get_rule_matcher, match_rule
 from sentry.ingest.transaction_clusterer.rules import (
     ProjectOptionRuleStore,
+    RedisRuleStore,
     _get_rules,
     update_rules,
 )
 from sentry.ingest.transaction_clusterer.tasks import cluster_projects, spawn_clusterers
-from sentry.ingest.transaction_clusterer.tree import TreeClusterer
+from sentry.ingest.transaction_clusterer.tree import MERGED, TreeClusterer
 from sentry.models.project import Project
 from sentry.relay.config import get_project_config
-from sentry.testutils.helpers import Feature
+from sentry.testutils.helpers import Feature, override_options
 
 
 def test_multi_fanout():
@@ -49,6 +51,30 @@ def test_single_leaf():
     assert clusterer.get_rules() == ["/a/*/**"]
 
 
+def test_incremental_input():
+    transaction_names = [f"/users/user{i}/posts/{j}" for i in range(5) for j in range(i + 1)]
+    transaction_names.append("/users/user0/settings")
+
+    clusterer = TreeClusterer(merge_threshold=3)
+    clusterer.add_input(transaction_names)
+    expected = clusterer.get_rules()
+    assert expected == ["/users/*/posts/*/**", "/users/*/**"]
+
+    clusterer = TreeClusterer(merge_threshold=3)
+    for i in range(0, len(transaction_names), 4):
+        clusterer.add_input(iter(transaction_names[i : i + 4]))
+    assert clusterer.get_rules() == expected
+
+
+def test_merged_nodes_are_bounded():
+    clusterer = TreeClusterer(merge_threshold=3)
+    clusterer.add_input(f"/a/b{i}" for i in range(1000))
+    (merged,) = clusterer._tree.children[""].children["a"].children.items()
+    assert merged[0] is MERGED
+    assert merged[1].children is None
+    assert clusterer.get_rules() == ["/a/*/**"]
+
+
 @mock.patch("sentry.ingest.transaction_clusterer.datasource.redis.MAX_SET_SIZE", 5)
 def test_collection():
     project1 = Project(id=101, name="p1", organization_id=1)
@@ -140,6 +166,87 @@ def test_save_rules(default_project):
     assert {"bar": 1326542402, "foo": 1326542401, "zap": 1326542402}
 
 
+@pytest.mark.parametrize(
+    "rule, transaction_name, expected",
+    [
+        ("/a/*/**", "/a/b", True),
+        ("/a/*/**", "/a/b/c/d", True),
+        ("/a/*/**", "/a", False),
+        ("/a/*/**", "/ab/c", False),
+        ("/a/*/c/**", "/a/b/d", False),
+        ("/a/*", "/a/b", True),
+        ("/a/*", "/a/b/c", False),
+        ("/a/b*/**", "/a/bc/d", True),
+    ],
+)
+def test_match_rule(rule, transaction_name, expected):
+    assert match_rule(rule, transaction_name) is expected
+
+
+def test_rule_matcher():
+    rules = ["/a/*/c/*/**", "/a/*/d*/**", "/a/b/**", "/a/*/**", "/*/b"]
+    matcher = RuleMatcher(rules)
+    for transaction_name in [
+        "/a/b0/c/d0/e",
+        "/a/b/c",
+        "/a/b/d1/e",
+        "/a/b1/c",
+        "/a/b",
+        "/x/b",
+        "/x/b/c",
+        "/a",
+        "",
+    ]:
+        expected = next((rule for rule in rules if match_rule(rule, transaction_name)), None)
+        assert matcher.find(transaction_name) == expected, transaction_name
+
+
+@pytest.mark.django_db
+def test_get_rule_matcher(default_project):
+    ProjectOptionRuleStore().write(default_project, {"/a/*/b/**": 1, "/a/*/**": 1})
+    matcher = get_rule_matcher(default_project)
+    assert matcher.find("/a/1/b/2") == "/a/*/b/**"
+
+    # Cached matchers are looked up by the version of the rules, without
+    # reading the rules.
+    with mock.patch(
+        "sentry.ingest.transaction_clusterer.matcher.get_sorted_rules"
+    ) as get_sorted_rules:
+        assert get_rule_matcher(default_project) is matcher
+        assert not get_sorted_rules.called
+
+    # Only the rules, not their timestamps, make up the version.
+    ProjectOptionRuleStore().write(default_project, {"/a/*/b/**": 2, "/a/*/**": 2})
+    assert get_rule_matcher(default_project) is matcher
+
+    ProjectOptionRuleStore().write(default_project, {"/a/*/**": 1})
+    matcher = get_rule_matcher(default_project)
+    assert matcher.find("/a/1/b/2") == "/a/*/**"
+
+
+@mock.patch("sentry.ingest.transaction_clusterer.datasource.redis._store_transaction_name")
+@pytest.mark.django_db
+def test_record_sanitized_transaction(mocked_record, default_project):
+    with freeze_time("2012-01-14 12:00:01"):
+        update_rules(default_project, [ReplacementRule("/a/*/**")])
+
+    event_data = {
+        "transaction": "/a/*/b",
+        "transaction_info": {"source": "sanitized"},
+    }
+    with Feature({"organizations:transaction-name-clusterer": True}), freeze_time(
+        "2012-01-14 12:00:02"
+    ):
+        record_transaction_name(default_project, event_data)
+        assert RedisRuleStore().read(default_project) == {"/a/*/**": 1326542401}
+
+        with override_options({"txnames.bump-lifetime-sample-rate": 1.0}):
+            record_transaction_name(default_project, event_data)
+        assert RedisRuleStore().read(default_project) == {"/a/*/**": 1326542402}
+
+    assert not mocked_record.called
+
+
 @mock.patch("django.conf.settings.SENTRY_TRANSACTION_CLUSTERER_RUN", True)
 @mock.patch("sentry.ingest.transaction_clusterer.tasks.MERGE_THRESHOLD", 5)
 @mock.patch(
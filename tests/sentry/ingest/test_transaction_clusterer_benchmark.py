@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from sentry.ingest.transaction_clusterer.matcher import RuleMatcher, _compile_rule
+from sentry.testutils.skips import requires_pytest_benchmark
+
+RULE_COUNTS = [10, 100, 500]
+
+
+def make_rules(count):
+    # Rules as generated by the clusterer, most specific first.
+    rules = [f"/api/{i}/*/items/*/**" for i in range(count // 2)]
+    rules += [f"/api/{i}/*/**" for i in range(count - len(rules))]
+    return rules
+
+
+def make_transaction_names(count, rule_count):
+    rng = random.Random(0)
+    return [
+        f"/api/{rng.randrange(rule_count)}/{rng.randrange(10**6)}/items/{rng.randrange(100)}"
+        for _ in range(count)
+    ]
+
+
+def find_linear(patterns, transaction_names):
+    for transaction_name in transaction_names:
+        next((pattern for pattern in patterns if pattern.fullmatch(transaction_name)), None)
+
+
+def find_compiled(matcher, transaction_names):
+    for transaction_name in transaction_names:
+        matcher.find(transaction_name)
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("rule_count", RULE_COUNTS)
+def test_match_linear(benchmark, rule_count):
+    patterns = [_compile_rule(rule) for rule in make_rules(rule_count)]
+    transaction_names = make_transaction_names(100, rule_count)
+    benchmark.pedantic(find_linear, args=(patterns, transaction_names), rounds=20)
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("rule_count", RULE_COUNTS)
+def test_match_compiled(benchmark, rule_count):
+    matcher = RuleMatcher(make_rules(rule_count))
+    transaction_names = make_transaction_names(100, rule_count)
+    benchmark.pedantic(find_compiled, args=(matcher, transaction_names), rounds=20)
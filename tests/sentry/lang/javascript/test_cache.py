@@ -1,6 +1,6 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
-from sentry.lang.javascript.cache import SourceCache
+from sentry.lang.javascript.cache import LocalArtifactCache, SourceCache
 
 
 class BasicCacheTest(TestCase):
@@ -34,3 +34,38 @@ class BasicCacheTest(TestCase):
         # fall back to utf-8
         cache.add(url, "foobar".encode("utf-32"), encoding="utf-32")
         assert cache.get(url)[0] == "foobar"
+
+
+class LocalArtifactCacheTest(TestCase):
+    def test_evicts_by_size(self):
+        cache = LocalArtifactCache(max_bytes=100, ttl=60)
+        cache.set(("sourcemap", 1), "a", 20)
+        cache.set(("sourcemap", 2), "b", 20)
+        assert cache.get(("sourcemap", 1)) == "a"
+
+        cache.set(("sourcemap", 3), "c", 25)
+        cache.set(("sourcemap", 4), "d", 25)
+        assert cache.size == 90
+
+        cache.set(("sourcemap", 5), "e", 25)
+        assert cache.size == 95
+        # The least recently used entry is evicted first
+        assert cache.get(("sourcemap", 2)) is None
+        assert cache.get(("sourcemap", 1)) == "a"
+
+    def test_skips_large_values(self):
+        cache = LocalArtifactCache(max_bytes=100, ttl=60)
+        cache.set(("sourcemap", 1), "a", 26)
+        assert cache.get(("sourcemap", 1)) is None
+        assert cache.size == 0
+
+    @mock.patch("sentry.utils.lru.monotonic")
+    def test_expires(self, monotonic):
+        monotonic.return_value = 100
+        cache = LocalArtifactCache(max_bytes=100, ttl=60)
+        cache.set(("artifact-index", 1), {"files": {}}, 10)
+        assert cache.get(("artifact-index", 1)) == {"files": {}}
+
+        monotonic.return_value = 161
+        assert cache.get(("artifact-index", 1)) is None
+        assert cache.size == 0
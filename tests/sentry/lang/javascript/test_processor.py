@@ -1,5 +1,7 @@
 import errno
+import os
 import re
+import tempfile
 import unittest
 import zipfile
 from copy import deepcopy
@@ -8,10 +10,13 @@ from unittest.mock import ANY, MagicMock, call, patch
 
 import pytest
 import responses
+from django.test import override_settings
 from requests.exceptions import RequestException
+from symbolic import SourceMapCache as SmCache
 
 from sentry import http, options
 from sentry.event_manager import get_tag
+from sentry.lang.javascript import cache as js_cache
 from sentry.lang.javascript.errormapping import REACT_MAPPING_URL, rewrite_exception
 from sentry.lang.javascript.processor import (
     CACHE_CONTROL_MAX,
@@ -33,13 +38,19 @@ from sentry.lang.javascript.processor import (
     should_retry_fetch,
     trim_line,
 )
+from sentry.lang.javascript.spool import MappedFile
 from sentry.models import EventError, File, Release, ReleaseFile
 from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, update_artifact_index
-from sentry.stacktraces.processing import ProcessableFrame, find_stacktraces_in_data
+from sentry.stacktraces.processing import (
+    ProcessableFrame,
+    find_stacktraces_in_data,
+    lookup_frame_cache,
+)
 from sentry.testutils import TestCase
 from sentry.testutils.helpers.features import with_feature
 from sentry.testutils.helpers.options import override_options
 from sentry.utils import json
+from sentry.utils.cache import default_cache
 from sentry.utils.strings import truncatechars
 
 base64_sourcemap = "data:application/json;base64,eyJ2ZXJzaW9uIjozLCJmaWxlIjoiZ2VuZXJhdGVkLmpzIiwic291cmNlcyI6WyIvdGVzdC5qcyJdLCJuYW1lcyI6W10sIm1hcHBpbmdzIjoiO0FBQUEiLCJzb3VyY2VzQ29udGVudCI6WyJjb25zb2xlLmxvZyhcImhlbGxvLCBXb3JsZCFcIikiXX0="
@@ -778,6 +789,30 @@ class FetchFileTest(TestCase):
         cache_get.reset_mock()
         cache_set.reset_mock()
 
+    @patch("sentry.lang.javascript.processor.cache.get", side_effect=cache.get)
+    def test_archive_spool(self, cache_get):
+        release = Release.objects.create(version="1", organization_id=self.project.organization_id)
+        self._create_archive(release, "foo")
+
+        with tempfile.TemporaryDirectory() as spool_dir, override_settings(
+            SENTRY_RELEASE_ARCHIVE_SPOOL_DIR=spool_dir
+        ):
+            result = fetch_release_archive_for_url(release, dist=None, url="foo")
+            assert isinstance(result, MappedFile)
+            assert result.read() == b"0123456789"
+            result.close()
+            assert len(os.listdir(spool_dir)) == 1
+            cache_get.reset_mock()
+
+            # Second time, read it from the spool
+            result = fetch_release_archive_for_url(release, dist=None, url="foo")
+            assert isinstance(result, MappedFile)
+            assert result.read() == b"0123456789"
+            result.close()
+            assert not [
+                call for call in cache_get.mock_calls if call.args[0].startswith("releasefile")
+            ]
+
     @patch("sentry.lang.javascript.processor.CACHE_MAX_VALUE_SIZE", 9)
     @patch("sentry.lang.javascript.processor.cache.set", side_effect=cache.set)
     def test_archive_too_large_for_mem_cache(self, cache_set):
@@ -1157,6 +1192,22 @@ class FoldFunctionNameTest(unittest.TestCase):
 
 
 class FetchSourcemapTest(TestCase):
+    def tearDown(self):
+        js_cache._local_artifact_cache = None
+
+    @override_settings(SENTRY_JS_LOCAL_ARTIFACT_CACHE_MAX_BYTES=1024 * 1024)
+    def test_local_cache(self):
+        with patch(
+            "sentry.lang.javascript.processor.SmCache.from_bytes", side_effect=SmCache.from_bytes
+        ) as from_bytes:
+            smap_view = fetch_sourcemap(base64_sourcemap)
+            assert fetch_sourcemap(base64_sourcemap) is smap_view
+            assert from_bytes.call_count == 1
+
+            # The minified source is part of the key
+            assert fetch_sourcemap(base64_sourcemap, source=b"foo") is not smap_view
+            assert from_bytes.call_count == 2
+
     def test_simple_base64(self):
         smap_view = fetch_sourcemap(base64_sourcemap)
         token = smap_view.lookup(1, 1, 0)
@@ -1537,3 +1588,138 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+
+class FrameCacheTest(TestCase):
+    def setUp(self):
+        default_cache.clear()
+
+    def get_processor(self, **data):
+        return JavaScriptStacktraceProcessor(
+            data={"platform": "javascript", **data}, stacktrace_infos=None, project=self.project
+        )
+
+    def get_processable_frame(self, processor, frames):
+        processable_frames = []
+        for idx, frame in enumerate(frames):
+            processable_frames.append(
+                ProcessableFrame(frame, len(frames) - idx - 1, processor, None, processable_frames)
+            )
+        for processable_frame in processable_frames:
+            processor.preprocess_frame(processable_frame)
+        return processable_frames[-1]
+
+    def test_cache_key(self):
+        frame = {"abs_path": "http://example.com/app.js", "lineno": 1, "colno": 10}
+
+        with override_options({"processing.javascript-frame-cache": True}):
+            processable_frame = self.get_processable_frame(self.get_processor(), [frame])
+            assert processable_frame.cache_key is None
+
+            processable_frame = self.get_processable_frame(
+                self.get_processor(release="abc"), [frame]
+            )
+            cache_key = processable_frame.cache_key
+            assert cache_key is not None
+
+            other_release = self.get_processable_frame(self.get_processor(release="def"), [frame])
+            assert other_release.cache_key != cache_key
+
+            # The calling frame is part of the key
+            caller = {"abs_path": "http://example.com/app.js", "lineno": 2, "colno": 5}
+            with_caller = self.get_processable_frame(
+                self.get_processor(release="abc"), [caller, frame]
+            )
+            assert with_caller.cache_key != cache_key
+
+        processable_frame = self.get_processable_frame(self.get_processor(release="abc"), [frame])
+        assert processable_frame.cache_key is None
+
+    @override_options({"processing.javascript-frame-cache": True})
+    def test_cache_key_changes_with_artifacts(self):
+        frame = {"abs_path": "http://example.com/app.js", "lineno": 1, "colno": 10}
+        release = self.create_release(project=self.project, version="abc")
+
+        cache_key = self.get_processable_frame(self.get_processor(release="abc"), [frame]).cache_key
+        assert (
+            self.get_processable_frame(self.get_processor(release="abc"), [frame]).cache_key
+            == cache_key
+        )
+
+        with self.capture_on_commit_callbacks(execute=True):
+            self.create_release_file(release_id=release.id, name="http://example.com/app.js")
+
+        assert (
+            self.get_processable_frame(self.get_processor(release="abc"), [frame]).cache_key
+            != cache_key
+        )
+
+    @override_options({"processing.javascript-frame-cache": True})
+    def test_restore_cached_frame(self):
+        frame = {"abs_path": "http://example.com/app.js", "lineno": 1, "colno": 10}
+        new_frame = dict(frame, function="original", lineno=5, colno=3)
+        result = ([new_frame], None, [])
+
+        processor = self.get_processor(release="abc")
+        processable_frame = self.get_processable_frame(processor, [frame])
+
+        def demangle_frame(processable_frame):
+            processable_frame.data["token"] = GetFunctionForTokenTest().get_token(
+                "original", "minified"
+            )
+            processable_frame.data["sourcemap_url"] = "http://example.com/app.js.map"
+            return result
+
+        with patch.object(processor, "demangle_frame", side_effect=demangle_frame):
+            assert processor.process_frame(processable_frame, None) == result
+
+        processor = self.get_processor(release="abc")
+        processable_frame = self.get_processable_frame(processor, [frame])
+        cache_key = processable_frame.cache_key
+        processable_frame.cache_value = lookup_frame_cache([cache_key])[cache_key]
+        assert processable_frame.cache_value is not None
+
+        with patch.object(processor, "demangle_frame") as demangle_frame:
+            assert processor.process_frame(processable_frame, None) == result
+            assert not demangle_frame.called
+
+        assert processable_frame.data["token"].name == "minified"
+        assert processor.sourcemaps_touched == {"http://example.com/app.js.map"}
+
+    @override_options({"processing.javascript-frame-cache": True})
+    def test_errors_not_cached(self):
+        frame = {"abs_path": "http://example.com/app.js", "lineno": 1, "colno": 10}
+        result = ([frame], None, [{"type": EventError.JS_MISSING_SOURCE}])
+
+        processor = self.get_processor(release="abc")
+        processable_frame = self.get_processable_frame(processor, [frame])
+        with patch.object(processor, "demangle_frame", return_value=result):
+            assert processor.process_frame(processable_frame, None) == result
+
+        cache_key = processable_frame.cache_key
+        assert lookup_frame_cache([cache_key])[cache_key] is None
+
+    @override_options({"processing.javascript-frame-cache": True})
+    def test_unchanged_frames(self):
+        # Frames that can't be demangled are cached...
+        frame = {"abs_path": "http://example.com/app.js", "colno": 10}
+        processor = self.get_processor(release="abc")
+        processable_frame = self.get_processable_frame(processor, [frame])
+        assert processor.process_frame(processable_frame, None) is None
+
+        cache_key = processable_frame.cache_key
+        assert lookup_frame_cache([cache_key])[cache_key] == {
+            "result": None,
+            "token_name": None,
+            "sourcemap_url": None,
+        }
+
+        # ...but frames that were left unchanged for other reasons are not.
+        frame = {"abs_path": "http://example.com/app.js", "lineno": 1, "colno": 10}
+        processor = self.get_processor(release="abc")
+        processable_frame = self.get_processable_frame(processor, [frame])
+        with patch.object(processor, "demangle_frame", return_value=None):
+            assert processor.process_frame(processable_frame, None) is None
+
+        cache_key = processable_frame.cache_key
+        assert lookup_frame_cache([cache_key])[cache_key] is None
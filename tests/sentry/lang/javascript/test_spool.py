@@ -0,0 +1,118 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+from unittest import TestCase, mock
+
+from sentry.lang.javascript.spool import MappedFile, ReleaseArchiveSpool
+
+
+def make_archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, contents in files.items():
+            zf.writestr(name, contents)
+    buffer.seek(0)
+    return buffer
+
+
+class MappedFileTest(TestCase):
+    def test_read_zip(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(make_archive({"a.js": b"foo", "b.js": b"bar" * 1000}).read())
+            f.flush()
+
+            with MappedFile(f.name) as mapped, zipfile.ZipFile(mapped) as zf:
+                assert zf.read("a.js") == b"foo"
+                assert zf.read("b.js") == b"bar" * 1000
+
+    def test_seek(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b"0123456789")
+            f.flush()
+
+            with MappedFile(f.name) as mapped:
+                assert mapped.size == 10
+                mapped.seek(-3, io.SEEK_END)
+                assert mapped.read() == b"789"
+                mapped.seek(2)
+                mapped.seek(2, io.SEEK_CUR)
+                assert mapped.read(2) == b"45"
+                assert mapped.tell() == 6
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile() as f:
+            with MappedFile(f.name) as mapped:
+                assert mapped.size == 0
+                assert mapped.read() == b""
+
+
+class ReleaseArchiveSpoolTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spool = ReleaseArchiveSpool(self.tmpdir.name, max_bytes=25)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_add_and_open(self):
+        assert self.spool.open("1:None:abc") is None
+
+        with self.spool.add("1:None:abc", io.BytesIO(b"0123456789")) as mapped:
+            assert mapped.read() == b"0123456789"
+
+        with self.spool.open("1:None:abc") as mapped:
+            assert mapped.read() == b"0123456789"
+
+    def test_evicts_least_recently_opened(self):
+        self.spool.add("a", io.BytesIO(b"0" * 10)).close()
+        self.spool.add("b", io.BytesIO(b"1" * 10)).close()
+        os.utime(self.spool._get_path("a"), (0, 0))
+        os.utime(self.spool._get_path("b"), (1, 1))
+
+        self.spool.open("a").close()
+        self.spool.add("c", io.BytesIO(b"2" * 10)).close()
+
+        assert self.spool.open("b") is None
+        for key in ("a", "c"):
+            with self.spool.open(key) as mapped:
+                assert mapped.size == 10
+
+    def test_empty_archive(self):
+        with self.spool.add("a", io.BytesIO(b"")) as mapped:
+            assert mapped.read() == b""
+
+        with self.spool.open("a") as mapped:
+            assert mapped.size == 0
+
+    def test_failed_write_removes_temporary_file(self):
+        with mock.patch("shutil.copyfileobj", side_effect=OSError("No space left on device")):
+            assert self.spool.add("a", io.BytesIO(b"0123456789")) is None
+
+        assert os.listdir(self.tmpdir.name) == []
+
+    def test_evicts_abandoned_temporary_files(self):
+        for name in ("new.tmp", "old.tmp"):
+            with open(os.path.join(self.tmpdir.name, name), "wb") as f:
+                f.write(b"0" * 10)
+        os.utime(os.path.join(self.tmpdir.name, "old.tmp"), (0, 0))
+
+        self.spool.add("a", io.BytesIO(b"1" * 10)).close()
+
+        assert sorted(os.listdir(self.tmpdir.name)) == sorted(
+            ["new.tmp", os.path.basename(self.spool._get_path("a"))]
+        )
+
+    def test_scans_only_when_full(self):
+        with mock.patch("os.scandir", wraps=os.scandir) as scandir:
+            self.spool.add("a", io.BytesIO(b"0" * 10)).close()
+            self.spool.add("b", io.BytesIO(b"1" * 10)).close()
+            assert scandir.call_count == 1
+
+            self.spool.add("c", io.BytesIO(b"2" * 10)).close()
+            assert scandir.call_count == 2
+
+            with mock.patch("time.time", return_value=time.time() + 3600):
+                self.spool.add("d", io.BytesIO(b"")).close()
+            assert scandir.call_count == 3
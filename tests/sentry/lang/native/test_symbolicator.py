@@ -1,9 +1,18 @@
 import copy
+import threading
+from unittest import mock
 
 import pytest
 
+from sentry.cache import default_cache
 from sentry.lang.native import symbolicator
-from sentry.lang.native.symbolicator import get_sources_for_project, redact_internal_sources
+from sentry.lang.native.symbolicator import (
+    ServiceUnavailable,
+    Symbolicator,
+    SymbolicatorBatch,
+    get_sources_for_project,
+    redact_internal_sources,
+)
 from sentry.testutils.helpers import Feature
 
 CUSTOM_SOURCE_CONFIG = """
@@ -264,3 +273,114 @@ class TestAliasReversion:
         reverse_aliases = symbolicator.reverse_aliases_map(builtin_sources)
         expected = {"sentry:ios-source": "sentry:ios", "sentry:tvos-source": "sentry:ios"}
         assert reverse_aliases == expected
+
+
+@pytest.mark.django_db
+class TestSymbolicatorBatch:
+    @pytest.fixture(autouse=True)
+    def no_sleep(self):
+        with mock.patch("sentry.lang.native.symbolicator.time.sleep"):
+            yield
+
+    def make_symbolicator(self, project, event_id, create_task, query_task=None):
+        sym = Symbolicator(project=project, event_id=event_id, timeout=0)
+        sym.sess.symbolicate_stacktraces = mock.Mock(side_effect=create_task)
+        sym.sess.query_task = mock.Mock(side_effect=query_task)
+        return sym
+
+    def test_callbacks(self, default_project):
+        pending = {"status": "pending", "request_id": "a", "retry_after": 0}
+        completed = {"status": "completed", "stacktraces": []}
+        results = {}
+
+        fast = self.make_symbolicator(default_project, "e1", [completed])
+        slow = self.make_symbolicator(default_project, "e2", [pending], query_task=[completed])
+
+        batch = SymbolicatorBatch(concurrency=2)
+        for event_id, sym in (("e1", fast), ("e2", slow)):
+            batch.process_payload(
+                sym, [], [], callback=lambda rv, event_id=event_id: results.update({event_id: rv})
+            )
+        assert len(batch) == 2
+        batch.run()
+
+        assert results == {"e1": completed, "e2": completed}
+        slow.sess.query_task.assert_called_once_with("a")
+        assert len(batch) == 0
+        assert fast.sess.session is None
+        assert slow.sess.session is None
+
+    def test_resubmit_unknown_task(self, default_project):
+        pending = {"status": "pending", "request_id": "a", "retry_after": 0}
+        completed = {"status": "completed", "stacktraces": []}
+        results = []
+
+        sym = self.make_symbolicator(default_project, "e1", [pending, completed], query_task=[None])
+        batch = SymbolicatorBatch()
+        batch.process_payload(sym, [], [], callback=results.append)
+        batch.run()
+
+        assert results == [completed]
+        assert sym.sess.symbolicate_stacktraces.call_count == 2
+
+    def test_errors(self, default_project):
+        completed = {"status": "completed", "stacktraces": []}
+        results = {}
+
+        unavailable = self.make_symbolicator(
+            default_project, "e1", [ServiceUnavailable(), completed]
+        )
+        failing = self.make_symbolicator(default_project, "e2", ValueError)
+
+        batch = SymbolicatorBatch()
+        for event_id, sym in (("e1", unavailable), ("e2", failing)):
+            batch.process_payload(
+                sym, [], [], callback=lambda rv, event_id=event_id: results.update({event_id: rv})
+            )
+        batch.run()
+
+        assert results == {"e1": completed, "e2": None}
+
+    def test_timeout(self, default_project):
+        pending = {"status": "pending", "request_id": "a", "retry_after": 0}
+        results = []
+
+        sym = self.make_symbolicator(default_project, "e1", [pending])
+        batch = SymbolicatorBatch()
+        batch.process_payload(sym, [], [], callback=results.append)
+
+        with mock.patch("sentry.lang.native.symbolicator.time.monotonic", side_effect=[0, 0, 10]):
+            batch.run(timeout=5)
+
+        assert results == [None]
+        # The task is resumed by later attempts
+        assert default_cache.get(sym.task_id_cache_key) == "a"
+
+        batch.process_payload(sym, [], [], callback=results.append)
+        assert batch._jobs[0].task_id == "a"
+
+    def test_session_per_thread(self, default_project):
+        completed = {"status": "completed", "stacktraces": []}
+        sessions = {}
+        barrier = threading.Barrier(2)
+
+        def create_task(sym):
+            def inner(**kwargs):
+                # Both events are submitted concurrently
+                barrier.wait(timeout=5)
+                sessions[threading.get_ident()] = sym.sess.session
+                return completed
+
+            return inner
+
+        batch = SymbolicatorBatch(concurrency=2)
+        for event_id in ("e1", "e2"):
+            sym = Symbolicator(project=default_project, event_id=event_id)
+            sym.sess.symbolicate_stacktraces = mock.Mock(side_effect=create_task(sym))
+            batch.process_payload(sym, [], [], callback=lambda rv: None)
+            # Tasks are created without waiting on symbolicator
+            assert sym.sess.timeout == 0
+        batch.run()
+
+        assert len(sessions) == 2
+        assert len({id(session) for session in sessions.values()}) == 2
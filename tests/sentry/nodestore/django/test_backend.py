@@ -1,3 +1,4 @@
+import base64
 import pickle
 from datetime import timedelta
 from unittest import mock
@@ -5,9 +6,10 @@ from unittest import mock
 import pytest
 from django.utils import timezone
 
-from sentry.nodestore.base import json_dumps
+from sentry.nodestore.base import INDEXED_MAGIC, encode_indexed, json_dumps
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.nodestore.django.models import Node
+from sentry.testutils.helpers.options import override_options
 from sentry.utils.strings import compress
 
 
@@ -51,6 +53,23 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    def test_set_indexed_format(self):
+        with override_options({"nodestore.write-indexed-format": True}):
+            self.ns.set_subkeys("d2502ebbd7df41ceba8d3275595cac33", {None: {"foo": "bar"}})
+
+        # The indexed payload is compressed already, and is not compressed again.
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert base64.b64decode(data).startswith(INDEXED_MAGIC)
+        assert self.ns.get("d2502ebbd7df41ceba8d3275595cac33") == {"foo": "bar"}
+
+    def test_get_compressed_indexed_format(self):
+        node = Node.objects.create(
+            id="d2502ebbd7df41ceba8d3275595cac33",
+            data=compress(encode_indexed({None: {"foo": "bar"}})),
+        )
+
+        assert self.ns.get(node.id) == {"foo": "bar"}
+
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
 
@@ -6,7 +6,9 @@ from contextlib import nullcontext
 
 import pytest
 
+from sentry.nodestore.base import INDEXED_MAGIC
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.helpers.options import override_options
 from tests.sentry.nodestore.bigtable.test_backend import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -91,3 +93,20 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+def test_set_subkeys_indexed_format(ns):
+    with override_options({"nodestore.write-indexed-format": True}):
+        ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+
+    assert ns._get_bytes("node_1").startswith(INDEXED_MAGIC)
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_1", subkey="missing") is None
+    assert ns.get_multi(["node_1"], subkey="other") == {"node_1": {"foo": "b"}}
+
+    # Legacy payloads stay readable after the format is switched on.
+    ns.set_subkeys("node_2", {None: {"foo": "c"}, "other": {"foo": "d"}})
+    with override_options({"nodestore.write-indexed-format": True}):
+        assert ns.get("node_2") == {"foo": "c"}
+        assert ns.get("node_2", subkey="other") == {"foo": "d"}
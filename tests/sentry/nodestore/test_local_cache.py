@@ -0,0 +1,107 @@
+from unittest import mock
+
+import pytest
+
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.local_cache import LocalNodeCache
+
+
+def test_get_set():
+    cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+    assert cache.get("node_1", None) is None
+
+    cache.set("node_1", None, {"foo": "a"})
+    cache.set("node_1", "other", {"foo": "b"})
+    assert cache.get("node_1", None) == {"foo": "a"}
+    assert cache.get("node_1", "other") == {"foo": "b"}
+    assert cache.get("node_2", None) is None
+
+
+def test_returns_copies():
+    cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+    cache.set("node_1", None, {"foo": "a"})
+    cache.get("node_1", None)["foo"] = "b"
+    assert cache.get("node_1", None) == {"foo": "a"}
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = LocalNodeCache(max_bytes=300, ttl=60, max_item_bytes=300)
+    cache.set("node_1", None, {"foo": "a" * 100})
+    cache.set("node_2", None, {"foo": "b" * 100})
+    # touch node_1 so that node_2 is evicted next
+    assert cache.get("node_1", None)
+    cache.set("node_3", None, {"foo": "c" * 100})
+
+    assert cache.get("node_1", None) == {"foo": "a" * 100}
+    assert cache.get("node_2", None) is None
+    assert cache.get("node_3", None) == {"foo": "c" * 100}
+    assert cache.size <= 300
+
+
+def test_skips_large_items():
+    cache = LocalNodeCache(max_bytes=1024, ttl=60, max_item_bytes=100)
+    cache.set("node_1", None, {"foo": "a" * 200})
+    assert cache.get("node_1", None) is None
+    assert cache.size == 0
+
+
+def test_ttl():
+    cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+    with mock.patch("sentry.utils.lru.monotonic", return_value=0):
+        cache.set("node_1", None, {"foo": "a"})
+    with mock.patch("sentry.utils.lru.monotonic", return_value=59):
+        assert cache.get("node_1", None) == {"foo": "a"}
+    with mock.patch("sentry.utils.lru.monotonic", return_value=61):
+        assert cache.get("node_1", None) is None
+    assert cache.size == 0
+
+
+def test_delete_drops_all_subkeys():
+    cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+    cache.set("node_1", None, {"foo": "a"})
+    cache.set("node_1", "other", {"foo": "b"})
+    cache.set("node_2", None, {"foo": "c"})
+
+    cache.delete_many(["node_1"])
+    assert cache.get("node_1", None) is None
+    assert cache.get("node_1", "other") is None
+    assert cache.get("node_2", None) == {"foo": "c"}
+
+
+@pytest.fixture
+def ns():
+    ns = DjangoNodeStorage()
+    ns.local_cache = LocalNodeCache(max_bytes=1024 * 1024, ttl=60)
+    return ns
+
+
+@pytest.mark.django_db
+def test_nodestore_reads_through_local_cache(ns):
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+
+    with mock.patch.object(ns, "_get_bytes") as get_bytes, mock.patch.object(
+        ns, "_get_bytes_multi"
+    ) as get_bytes_multi:
+        assert ns.get("node_1") == {"foo": "a"}
+        assert ns.get("node_1", subkey="other") == {"foo": "b"}
+        assert ns.get_multi(["node_1"]) == {"node_1": {"foo": "a"}}
+        assert ns.get_multi(["node_1"], subkey="other") == {"node_1": {"foo": "b"}}
+        assert not get_bytes.called
+        assert not get_bytes_multi.called
+
+
+@pytest.mark.django_db
+def test_nodestore_invalidates_local_cache(ns):
+    ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+
+    ns.set("node_1", {"foo": "c"})
+    assert ns.get("node_1") == {"foo": "c"}
+    assert ns.get("node_1", subkey="other") is None
+
+    ns.set_subkeys("node_2", {None: {"foo": "a"}, "other": {"foo": "b"}})
+    assert ns.get("node_2", subkey="other") == {"foo": "b"}
+    ns.delete_multi(["node_1", "node_2"])
+    assert ns.get("node_1") is None
+    assert ns.get("node_2", subkey="other") is None
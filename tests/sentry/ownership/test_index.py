@@ -0,0 +1,114 @@
+import pytest
+
+from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema, parse_rules
+from sentry.ownership.index import OwnershipIndex, get_ownership_index
+
+CODEOWNERS_PATTERNS = [
+    "**",
+    "*",
+    "*.py",
+    "test.py",
+    "/usr/local/src/foo/test.py",
+    "/usr/local/src/foo/*.py",
+    "/usr/local/src/foo/",
+    "/usr/local/src/foo/**",
+    "/usr/local/src/foo/*",
+    "foo/*/test.py",
+    "foo/**/test.py",
+    "/usr/local/src/foo/*/test.py",
+    "test.?y",
+    "foo/",
+    "test.*",
+    "\\filename",
+    "/",
+    "src/components/",
+]
+
+rules = (
+    parse_rules(
+        """
+*.js                    #frontend
+path:src/sentry/*       david@sentry.io
+path:SRC/Sentry/Models/*.py  models@sentry.io
+path:\\\\win\\*         windows@sentry.io
+path:/usr/local/src/foo/*  foo@sentry.io
+url:http://google.com/* #backend
+tags.foo:bar            tagperson@sentry.io
+module:foo.bar          #workflow
+module:foo.*            #workflow
+module:*.bar            #workflow
+"""
+    )
+    + [
+        Rule(Matcher("codeowners", pattern), [Owner("team", "codeowners")])
+        for pattern in CODEOWNERS_PATTERNS
+    ]
+)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"stacktrace": {"frames": [{"filename": "foo/test.py"}]}},
+        {"stacktrace": {"frames": [{"abs_path": "/usr/local/src/foo/test.py"}]}},
+        {"stacktrace": {"frames": [{"abs_path": "/usr/local/src/foo/bar/baz/test.py"}]}},
+        {"stacktrace": {"frames": [{"filename": "foo/\\"}, {"filename": "test.jy"}]}},
+        {"stacktrace": {"frames": [{"filename": "src/sentry/models/group.py"}]}},
+        {"stacktrace": {"frames": [{"filename": "src\\sentry\\models\\group.py"}]}},
+        {"stacktrace": {"frames": [{"filename": "/src/Sentry/app.js"}]}},
+        {"stacktrace": {"frames": [{"filename": "\\win\\app.exe"}]}},
+        {"stacktrace": {"frames": [{"filename": "src/components/button.tsx"}]}},
+        {"stacktrace": {"frames": [{"filename": "app/src/components/button.tsx"}]}},
+        {"stacktrace": {"frames": [{"module": "foo.bar"}, {"module": "baz.bar"}]}},
+        {"stacktrace": {"frames": [{"module": "FOO.baz"}, None, {"module": ""}]}},
+        {
+            "exception": {
+                "values": [
+                    {"stacktrace": {"frames": [{"filename": "foo/test.py", "module": "foo.bar"}]}}
+                ]
+            }
+        },
+        {"request": {"url": "http://google.com/search"}, "tags": [["foo", "bar"]]},
+    ],
+)
+def test_matching_rules_same_as_testing_every_rule(data):
+    index = OwnershipIndex(rules)
+    assert index.get_matching_rules(data) == [rule for rule in rules if rule.test(data)]
+
+
+def test_unindexed_rules():
+    index = OwnershipIndex(rules)
+    assert {str(rules[position].matcher) for position in index._unindexed} == {
+        "path:*.js",
+        "path:\\\\win\\*",
+        "url:http://google.com/*",
+        "tags.foo:bar",
+        "module:*.bar",
+        "codeowners:**",
+        "codeowners:*",
+        "codeowners:*.py",
+        "codeowners:\\filename",
+        "codeowners:/",
+    }
+
+
+def test_last_match_wins():
+    rules = parse_rules(
+        """
+path:src/*          #first
+path:src/sentry/*   #second
+path:src/*.py       #third
+"""
+    )
+    data = {"stacktrace": {"frames": [{"filename": "src/sentry/api.py"}]}}
+    matching_rules = OwnershipIndex(rules).get_matching_rules(data)
+    assert [rule.owners[0].identifier for rule in matching_rules] == ["first", "second", "third"]
+
+
+def test_get_ownership_index_cached():
+    schema = dump_schema(rules)
+    index = get_ownership_index(schema)
+    assert index is get_ownership_index(dump_schema(rules))
+    assert index is not get_ownership_index(dump_schema(rules[:-1]))
+    assert get_ownership_index(None) is None
@@ -8,6 +8,7 @@ from sentry.ratelimits.cardinality import (
     RedisBlasterBackend,
     RedisCardinalityLimiter,
     RedisClusterBackend,
+    RedisHyperLogLogCardinalityLimiter,
     RequestedQuota,
 )
 from sentry.utils import redis
@@ -25,6 +26,18 @@ def limiter(request, settings):
         yield instance
 
 
+@pytest.fixture(params=["cluster", "rb"])
+def hll_limiter(request, settings):
+    instance = RedisHyperLogLogCardinalityLimiter()
+    if request.param == "rb":
+        instance.is_redis_cluster = False
+        instance.client = redis.clusters.get("default")
+    else:
+        instance.is_redis_cluster = True
+        instance.client = redis.redis_clusters.get("default")
+    yield instance
+
+
 class LimiterHelper:
     """
     Wrapper interface around the rate limiter, with specialized, stateful and
@@ -235,3 +248,84 @@ def test_regression_mixed_order(limiter: RedisCardinalityLimiter):
     # there used to be a bug where anything after 10 (i.e. 5) was dropped as
     # well (due to a wrong `break` somewhere in a loop)
     assert helper.add_values([0, 1, 2, 3, 4, 6, 7, 8, 9, 10, 5]) == [0, 1, 2, 3, 4, 6, 7, 8, 9, 5]
+
+
+def test_hll_basic(hll_limiter: RedisHyperLogLogCardinalityLimiter):
+    helper = LimiterHelper(hll_limiter)
+
+    for _ in range(20):
+        assert helper.add_value(1) == 1
+
+    for _ in range(20):
+        assert helper.add_value(2) == 2
+
+    # HyperLogLogs are exact for cardinalities this small
+    assert [helper.add_value(10 + i) for i in range(100)] == list(range(10, 18)) + [None] * 92
+
+    # hashes admitted before are still free
+    assert helper.add_values([1, 2, 10, 11]) == [1, 2, 10, 11]
+
+    helper.timestamp += 3600
+
+    # an hour has passed, all granules we have written to are out of the
+    # window, and we should be able to admit 10 new keys
+    assert [helper.add_value(100 + i) for i in range(100)] == list(range(100, 110)) + [None] * 90
+
+
+def test_hll_multiple_prefixes(hll_limiter: RedisHyperLogLogCardinalityLimiter):
+    quota = Quota(window_seconds=3600, granularity_seconds=60, limit=10)
+    requests = [
+        RequestedQuota(prefix="a", unit_hashes=[1, 2, 3, 4, 5], quota=quota),
+        RequestedQuota(prefix="b", unit_hashes=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], quota=quota),
+        RequestedQuota(prefix="c", unit_hashes=[], quota=quota),
+    ]
+    new_timestamp, grants = hll_limiter.check_within_quotas(requests, timestamp=3600)
+
+    assert grants == [
+        GrantedQuota(request=requests[0], granted_unit_hashes=[1, 2, 3, 4, 5], reached_quota=None),
+        GrantedQuota(
+            request=requests[1],
+            granted_unit_hashes=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            reached_quota=quota,
+        ),
+        GrantedQuota(request=requests[2], granted_unit_hashes=[], reached_quota=None),
+    ]
+    hll_limiter.use_quotas(grants, new_timestamp)
+
+    requests = [
+        RequestedQuota(prefix="a", unit_hashes=[6, 7, 8, 9, 10, 11], quota=quota),
+        RequestedQuota(prefix="b", unit_hashes=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], quota=quota),
+    ]
+    new_timestamp, grants = hll_limiter.check_within_quotas(requests, timestamp=3600)
+
+    assert grants == [
+        GrantedQuota(
+            request=requests[0], granted_unit_hashes=[6, 7, 8, 9, 10], reached_quota=quota
+        ),
+        GrantedQuota(
+            request=requests[1],
+            granted_unit_hashes=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+            reached_quota=quota,
+        ),
+    ]
+
+
+def test_hll_sliding(hll_limiter: RedisHyperLogLogCardinalityLimiter):
+    """
+    Hashes are only written to the newest granule, and are forgotten once
+    that granule slides out of the window.
+    """
+    helper = LimiterHelper(hll_limiter)
+
+    assert [helper.add_value(i) for i in range(10)] == list(range(10))
+    assert helper.add_value(10) is None
+
+    # the granule the first ten hashes were written to is still within the
+    # window
+    helper.timestamp += 3600 - 60
+    assert helper.add_value(11) is None
+    assert helper.add_value(5) == 5
+
+    # now it isn't anymore
+    helper.timestamp += 60
+    assert helper.add_value(11) == 11
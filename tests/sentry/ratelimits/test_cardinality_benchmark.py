@@ -0,0 +1,80 @@
+import itertools
+
+import pytest
+
+from sentry.ratelimits.cardinality import (
+    Quota,
+    RedisCardinalityLimiter,
+    RedisClusterBackend,
+    RedisHyperLogLogCardinalityLimiter,
+    RequestedQuota,
+)
+from sentry.testutils.skips import requires_pytest_benchmark
+from sentry.utils import redis
+
+QUOTA_WINDOW_SECONDS = 3600
+QUOTA_GRANULARITY_SECONDS = 600
+BATCH_SIZE = 1000
+
+
+def make_limiter(kind, client):
+    if kind == "sets":
+        limiter = RedisCardinalityLimiter()
+        limiter.backend = RedisClusterBackend(client)
+    else:
+        limiter = RedisHyperLogLogCardinalityLimiter()
+        limiter.is_redis_cluster = True
+        limiter.client = client
+
+    return limiter
+
+
+def add_hashes(limiter, quota, hashes, timestamp):
+    request = RequestedQuota(prefix="benchmark", unit_hashes=hashes, quota=quota)
+    new_timestamp, grants = limiter.check_within_quotas([request], timestamp=timestamp)
+    limiter.use_quotas(grants, new_timestamp)
+    return grants
+
+
+def get_memory_usage(client):
+    return sum(
+        client.memory_usage(key) or 0 for key in client.scan_iter(match="cardinality:*", count=1000)
+    )
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("cardinality", [10_000, 100_000, 1_000_000])
+@pytest.mark.parametrize("kind", ["sets", "hll"])
+def test_benchmark_cardinality_limiter(kind, cardinality, benchmark):
+    """
+    Compare the Redis memory usage and the latency of checking and using a
+    batch of hashes between the set-based and the HyperLogLog-based
+    cardinality limiters, for a window that has already observed
+    `cardinality` unique hashes.
+
+    Run with `pytest --benchmark-only`. Memory usage is reported in the
+    benchmark's `extra_info`.
+    """
+    client = redis.redis_clusters.get("default")
+    limiter = make_limiter(kind, client)
+    quota = Quota(
+        window_seconds=QUOTA_WINDOW_SECONDS,
+        granularity_seconds=QUOTA_GRANULARITY_SECONDS,
+        limit=cardinality * 2,
+    )
+    timestamp = QUOTA_WINDOW_SECONDS
+
+    for start in range(0, cardinality, 10_000):
+        add_hashes(limiter, quota, range(start, min(start + 10_000, cardinality)), timestamp)
+
+    benchmark.extra_info["redis_memory_bytes"] = get_memory_usage(client)
+
+    # Half of every batch has been seen already, the other half is new.
+    new_hashes = itertools.count(cardinality)
+
+    def setup():
+        hashes = list(range(0, BATCH_SIZE // 2))
+        hashes.extend(itertools.islice(new_hashes, BATCH_SIZE // 2))
+        return (limiter, quota, hashes, timestamp), {}
+
+    benchmark.pedantic(add_hashes, setup=setup, rounds=50)
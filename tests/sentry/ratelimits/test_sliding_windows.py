@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 from sentry.ratelimits.sliding_windows import (
@@ -121,3 +123,113 @@ def test_conflicting_quotas(limiter):
         GrantedQuota(prefix="foo", granted=6, reached_quotas=[]),
         GrantedQuota(prefix="bar", granted=4, reached_quotas=quotas),
     ]
+
+
+@pytest.fixture
+def leasing_limiter():
+    return RedisSlidingWindowRateLimiter(lease_size=5, lease_ttl_seconds=2)
+
+
+def test_leases_are_served_locally(leasing_limiter):
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    with mock.patch.object(
+        leasing_limiter.client, "mget", wraps=leasing_limiter.client.mget
+    ) as mget:
+        for _ in range(5):
+            resp = leasing_limiter.check_and_use_quotas(
+                [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+                timestamp=TIMESTAMP_OFFSET,
+            )
+            assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+
+        assert mget.call_count == 1
+
+        # the first lease is used up, so a second one is taken out
+        resp = leasing_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+            timestamp=TIMESTAMP_OFFSET,
+        )
+        assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+        assert mget.call_count == 2
+
+
+def test_leases_respect_limits(leasing_limiter):
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=7)]
+
+    granted = 0
+    for _ in range(10):
+        (resp,) = leasing_limiter.check_and_use_quotas(
+            [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+            timestamp=TIMESTAMP_OFFSET,
+        )
+        granted += resp.granted
+
+    assert granted == 7
+    assert resp == GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)
+
+    # Another process can't get any quota either, as all of it has been
+    # reserved or used.
+    other_limiter = RedisSlidingWindowRateLimiter()
+    assert other_limiter.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET,
+    ) == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
+
+
+def test_leases_with_duplicate_prefixes(leasing_limiter):
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+
+    leasing_limiter.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=1, quotas=quotas)], timestamp=TIMESTAMP_OFFSET
+    )
+
+    # Both requests are served from the same lease, of which 4 units are
+    # left, so they can't both be granted those.
+    request = RequestedQuota(prefix="foo", requested=3, quotas=quotas)
+    resp = leasing_limiter.check_and_use_quotas(
+        [request, request, RequestedQuota(prefix="foo", requested=5, quotas=quotas)],
+        timestamp=TIMESTAMP_OFFSET,
+    )
+    assert resp == [
+        GrantedQuota(prefix="foo", granted=3, reached_quotas=[]),
+        GrantedQuota(prefix="foo", granted=3, reached_quotas=[]),
+        GrantedQuota(prefix="foo", granted=3, reached_quotas=quotas),
+    ]
+    assert leasing_limiter._get_lease(request, TIMESTAMP_OFFSET).remaining == 0
+
+
+def test_leases_are_reserved_on_check(leasing_limiter):
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=5)]
+    request = RequestedQuota(prefix="foo", requested=3, quotas=quotas)
+
+    # Two checks without a use in between (e.g. from two threads) must not
+    # both be granted the same units of the lease.
+    _, first = leasing_limiter.check_within_quotas([request], timestamp=TIMESTAMP_OFFSET)
+    _, second = leasing_limiter.check_within_quotas([request], timestamp=TIMESTAMP_OFFSET)
+    assert first == [GrantedQuota(prefix="foo", granted=3, reached_quotas=[])]
+    assert second == [GrantedQuota(prefix="foo", granted=2, reached_quotas=quotas)]
+
+    leasing_limiter.use_quotas([request], first, TIMESTAMP_OFFSET)
+    leasing_limiter.use_quotas([request], second, TIMESTAMP_OFFSET)
+    assert leasing_limiter._get_lease(request, TIMESTAMP_OFFSET).remaining == 0
+
+
+def test_leases_expire(leasing_limiter):
+    quotas = [Quota(window_seconds=10, granularity_seconds=1, limit=10)]
+    request = RequestedQuota(prefix="foo", requested=1, quotas=quotas)
+
+    leasing_limiter.check_and_use_quotas([request], timestamp=TIMESTAMP_OFFSET)
+    assert leasing_limiter._get_lease(request, TIMESTAMP_OFFSET + 1).remaining == 4
+
+    # The unused remainder of the first lease is dropped, the second lease
+    # can only reserve what is left in Redis.
+    resp = leasing_limiter.check_and_use_quotas([request], timestamp=TIMESTAMP_OFFSET + 2)
+    assert resp == [GrantedQuota(prefix="foo", granted=1, reached_quotas=[])]
+    assert leasing_limiter._get_lease(request, TIMESTAMP_OFFSET + 2).remaining == 4
+
+    leasing_limiter._leases.clear()
+    resp = leasing_limiter.check_and_use_quotas(
+        [RequestedQuota(prefix="foo", requested=5, quotas=quotas)], timestamp=TIMESTAMP_OFFSET + 2
+    )
+    assert resp == [GrantedQuota(prefix="foo", granted=0, reached_quotas=quotas)]
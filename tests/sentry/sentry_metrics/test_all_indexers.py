@@ -7,14 +7,20 @@ the mock indexer actually behaves the same as the postgres indexer.
 """
 
 from typing import Mapping, Set
+from unittest import mock
 
 import pytest
 
 from sentry.sentry_metrics.configuration import UseCaseKey
 from sentry.sentry_metrics.indexer.base import FetchType, FetchTypeExt, Metadata
-from sentry.sentry_metrics.indexer.cache import CachingIndexer, StringIndexerCache
+from sentry.sentry_metrics.indexer.cache import (
+    CachingIndexer,
+    StringIndexerCache,
+    StringIndexerLocalCache,
+)
 from sentry.sentry_metrics.indexer.mock import RawSimpleIndexer
 from sentry.sentry_metrics.indexer.postgres.postgres_v2 import PGStringIndexerV2
+from sentry.sentry_metrics.indexer.shared_table import SharedStringTable
 from sentry.sentry_metrics.indexer.strings import SHARED_STRINGS, StaticStringIndexer
 from sentry.testutils.helpers.options import override_options
 
@@ -206,6 +212,96 @@ def test_already_created_plus_written_results(indexer, indexer_cache) -> None:
     assert_fetch_type_for_tag_string_set(fetch_meta[org_id], FetchType.FIRST_SEEN, {"v1.2.3"})
 
 
+def test_local_cache(indexer, indexer_cache) -> None:
+    """
+    Test that the in-process cache is consulted before the shared cache, and
+    that it is populated from both the shared cache and the backend.
+    """
+    org_id = 1234
+    indexer_cache.set_many({f"{org_id}:beep": 10}, use_case_id.value)
+
+    raw_indexer = indexer
+    indexer = CachingIndexer(indexer_cache, indexer, local_cache_size=10)
+
+    v0 = raw_indexer.record(use_case_id, org_id, "v1.2.0")
+
+    results = indexer.bulk_record(use_case_id=use_case_id, org_strings={org_id: {"beep", "v1.2.0"}})
+    fetch_meta = results.get_fetch_metadata()
+    assert_fetch_type_for_tag_string_set(fetch_meta[org_id], FetchType.CACHE_HIT, {"beep"})
+    assert_fetch_type_for_tag_string_set(fetch_meta[org_id], FetchType.DB_READ, {"v1.2.0"})
+
+    # the shared cache is not consulted anymore for known strings
+    indexer_cache.cache.clear()
+
+    results = indexer.bulk_record(
+        use_case_id=use_case_id, org_strings={org_id: {"beep", "v1.2.0", "v1.2.1"}}
+    )
+    assert results[org_id]["beep"] == 10
+    assert results[org_id]["v1.2.0"] == v0
+    v1 = results[org_id]["v1.2.1"]
+    assert v1 is not None
+
+    fetch_meta = results.get_fetch_metadata()
+    assert_fetch_type_for_tag_string_set(
+        fetch_meta[org_id], FetchType.LOCAL_CACHE_HIT, {"beep", "v1.2.0"}
+    )
+    assert_fetch_type_for_tag_string_set(fetch_meta[org_id], FetchType.FIRST_SEEN, {"v1.2.1"})
+
+    assert indexer.resolve(use_case_id, org_id, "beep") == 10
+    assert indexer.reverse_resolve(use_case_id, org_id, v1) == "v1.2.1"
+    # org ids are part of the key
+    assert indexer.resolve(use_case_id, org_id + 1, "beep") is None
+
+
+def test_local_cache_eviction() -> None:
+    local_cache = StringIndexerLocalCache(max_size=2)
+    local_cache.set("release-health", 1, "a", 10)
+    local_cache.set("release-health", 1, "b", 11)
+    assert local_cache.get("release-health", 1, "a") == 10
+
+    local_cache.set("release-health", 1, "c", 12)
+    assert len(local_cache) == 2
+    assert local_cache.get("release-health", 1, "b") is None
+    assert local_cache.get_string("release-health", 1, 11) is None
+    assert local_cache.get_string("release-health", 1, 10) == "a"
+    assert local_cache.get("release-health", 2, "a") is None
+    assert local_cache.get("performance", 1, "a") is None
+
+
+def test_shared_string_table(indexer, indexer_cache) -> None:
+    """
+    Test that strings resolved by one indexer process are found by the others
+    through the shared string table.
+    """
+    org_id = 1234
+    shared_table = SharedStringTable.create(100)
+    try:
+        with mock.patch(
+            "sentry.sentry_metrics.indexer.cache.get_shared_string_table",
+            return_value=shared_table,
+        ):
+            first_indexer = CachingIndexer(indexer_cache, indexer, local_cache_size=0)
+            results = first_indexer.bulk_record(
+                use_case_id=use_case_id, org_strings={org_id: {"v1.2.0"}}
+            )
+            v0 = results[org_id]["v1.2.0"]
+            assert shared_table.get(use_case_id.value, org_id, "v1.2.0") == v0
+
+            indexer_cache.cache.clear()
+
+            second_indexer = CachingIndexer(indexer_cache, indexer, local_cache_size=10)
+            results = second_indexer.bulk_record(
+                use_case_id=use_case_id, org_strings={org_id: {"v1.2.0"}}
+            )
+            assert results[org_id]["v1.2.0"] == v0
+            assert_fetch_type_for_tag_string_set(
+                results.get_fetch_metadata()[org_id], FetchType.LOCAL_CACHE_HIT, {"v1.2.0"}
+            )
+            assert second_indexer.resolve(use_case_id, org_id, "v1.2.0") == v0
+    finally:
+        shared_table.close()
+
+
 def test_already_cached_plus_read_results(indexer, indexer_cache) -> None:
     """
     Test that we correctly combine cached results with read results
@@ -7,7 +7,11 @@ from arroyo.backends.kafka import KafkaPayload
 from arroyo.types import BrokerValue, Message, Partition, Topic, Value
 
 from sentry.sentry_metrics.configuration import UseCaseKey
-from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch, PartitionIdxOffset
+from sentry.sentry_metrics.consumers.indexer.batch import (
+    IndexerBatch,
+    MessageColumns,
+    PartitionIdxOffset,
+)
 from sentry.sentry_metrics.indexer.base import FetchType, FetchTypeExt, Metadata
 from sentry.snuba.metrics.naming_layer.mri import SessionMRI
 from sentry.utils import json
@@ -1086,3 +1090,124 @@ def test_cardinality_limiter(caplog, settings):
             ],
         )
     ]
+
+
+def test_message_columns():
+    columns = MessageColumns()
+    assert columns.append(1, "c:foo", "c", {"environment": "production", "release": "1.0"}) == 0
+    assert columns.append(2, "c:bar", "c", {}) == 1
+    assert columns.append(1, "c:foo", "c", {"release": "production"}) == 2
+
+    assert len(columns) == 3
+    assert list(columns.org_ids) == [1, 2, 1]
+    # Every distinct string is stored once
+    assert columns.table.strings == [
+        "c:foo",
+        "environment",
+        "release",
+        "production",
+        "1.0",
+        "c:bar",
+    ]
+    assert [columns.table.strings[name_id] for name_id in columns.name_ids] == [
+        "c:foo",
+        "c:bar",
+        "c:foo",
+    ]
+
+    key_ids, value_ids = columns.tag_ids(0)
+    assert list(key_ids) == [1, 2]
+    assert list(value_ids) == [3, 4]
+    assert [list(ids) for ids in columns.tag_ids(1)] == [[], []]
+    assert [list(ids) for ids in columns.tag_ids(2)] == [[2], [3]]
+
+    assert columns.inbound_message(0) == {
+        "org_id": 1,
+        "name": "c:foo",
+        "type": "c",
+        "tags": {"environment": "production", "release": "1.0"},
+    }
+
+
+def test_invalid_strings_are_skipped(caplog):
+    outer_message = _construct_outer_message(
+        [
+            (counter_payload, []),
+            ({**counter_payload, "name": "c:" + "a" * 200}, []),
+            ({**counter_payload, "tags": {"environment": "a" * 201}}, []),
+            ({**counter_payload, "type": "g"}, []),
+        ]
+    )
+    batch = IndexerBatch(UseCaseKey.PERFORMANCE, outer_message, True, False)
+
+    assert batch.extract_strings() == {
+        1: {"c:sessions/session@none", "environment", "init", "production", "session.status"}
+    }
+    assert batch.skipped_offsets == {
+        PartitionIdxOffset(0, 1),
+        PartitionIdxOffset(0, 2),
+        PartitionIdxOffset(0, 3),
+    }
+    assert [record.message for record in caplog.records] == [
+        "process_messages.invalid_metric_name",
+        "process_messages.invalid_tags",
+        "process_messages.invalid_metric_type",
+    ]
+
+
+def test_parsed_payloads_are_not_kept():
+    outer_message = _construct_outer_message(
+        [
+            (counter_payload, []),
+            # Fields which are replaced in the output are not passed through
+            ({**set_payload, "retention_days": 30, "metric_id": 1, "version": 1}, []),
+        ]
+    )
+    batch = IndexerBatch(UseCaseKey.PERFORMANCE, outer_message, False, False)
+
+    # The messages seen by the cardinality limiter are built from the columns
+    assert dict(batch.parsed_payloads_by_offset) == {
+        PartitionIdxOffset(0, 0): {
+            "org_id": 1,
+            "name": "c:sessions/session@none",
+            "type": "c",
+            "tags": {"environment": "production", "session.status": "init"},
+        },
+        PartitionIdxOffset(0, 1): {
+            "org_id": 1,
+            "name": "s:sessions/error@none",
+            "type": "s",
+            "tags": {"environment": "production", "session.status": "errored"},
+        },
+    }
+
+    org_strings = batch.extract_strings()
+    mapping = {1: {string: i for i, string in enumerate(sorted(org_strings[1]), 1)}}
+    bulk_record_meta = {
+        1: {
+            string: Metadata(id=i, fetch_type=FetchType.CACHE_HIT)
+            for string, i in mapping[1].items()
+        }
+    }
+    (_, (set_message, _)) = _deconstruct_messages(
+        batch.reconstruct_messages(mapping, bulk_record_meta)
+    )
+    assert set_message == {
+        "mapping_meta": {
+            "c": {
+                "2": "environment",
+                "3": "s:sessions/error@none",
+                "4": "session.status",
+            },
+        },
+        "metric_id": 3,
+        "org_id": 1,
+        "project_id": 3,
+        "retention_days": 90,
+        "tags": {"2": "production", "4": "errored"},
+        "timestamp": ts,
+        "type": "s",
+        "use_case_id": "performance",
+        "value": [3],
+        "version": 2,
+    }
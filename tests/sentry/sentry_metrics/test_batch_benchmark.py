@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+from arroyo.backends.kafka import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition, Topic, Value
+
+from sentry.sentry_metrics.configuration import UseCaseKey
+from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch
+from sentry.sentry_metrics.indexer.base import FetchType, Metadata
+from sentry.testutils.skips import requires_pytest_benchmark
+from sentry.utils import json
+
+pytestmark = pytest.mark.sentry_metrics
+
+BATCH_SIZE = 10000
+
+
+def get_payload(i):
+    return {
+        "org_id": i % 50,
+        "project_id": i % 200,
+        "name": f"d:transactions/measurements.m{i % 20}@millisecond",
+        "type": "d",
+        "value": [1.0, 2.0],
+        "timestamp": 1672531200,
+        "tags": {
+            "environment": "production",
+            "release": f"backend@1.{i % 30}",
+            "transaction": f"/api/0/projects/{i % 100}/",
+            "transaction.method": "GET",
+            "transaction.status": "ok",
+        },
+    }
+
+
+def get_outer_message():
+    partition = Partition(Topic("topic"), 0)
+    messages = [
+        Message(
+            BrokerValue(
+                KafkaPayload(None, json.dumps(get_payload(i)).encode("utf-8"), []),
+                partition,
+                i,
+                datetime.now(),
+            )
+        )
+        for i in range(BATCH_SIZE)
+    ]
+    return Message(Value(messages, messages[-1].committable))
+
+
+def index_strings(org_strings):
+    mapping = {}
+    bulk_record_meta = {}
+    for org_id, strings in org_strings.items():
+        mapping[org_id] = {string: i for i, string in enumerate(sorted(strings), 1)}
+        bulk_record_meta[org_id] = {
+            string: Metadata(id=i, fetch_type=FetchType.CACHE_HIT)
+            for string, i in mapping[org_id].items()
+        }
+    return mapping, bulk_record_meta
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("should_index_tag_values", [True, False])
+def test_indexer_batch(benchmark, should_index_tag_values):
+    """
+    Runs a batch through every stage of `IndexerBatch` except for the indexer
+    itself. Messages per second per core are `BATCH_SIZE` over the mean time.
+    """
+    outer_message = get_outer_message()
+    mapping, bulk_record_meta = index_strings(
+        IndexerBatch(
+            UseCaseKey.PERFORMANCE, outer_message, should_index_tag_values, False
+        ).extract_strings()
+    )
+
+    def process_batch():
+        batch = IndexerBatch(UseCaseKey.PERFORMANCE, outer_message, should_index_tag_values, False)
+        batch.extract_strings()
+        return batch.reconstruct_messages(mapping, bulk_record_meta)
+
+    benchmark.extra_info["batch_size"] = BATCH_SIZE
+    new_messages = benchmark.pedantic(process_batch, rounds=10)
+    assert len(new_messages) == BATCH_SIZE
@@ -6,6 +6,7 @@ from sentry.sentry_metrics.indexer.cache import CachingIndexer
 from sentry.sentry_metrics.indexer.postgres.models import StringIndexer
 from sentry.sentry_metrics.indexer.postgres.postgres_v2 import PGStringIndexerV2, indexer_cache
 from sentry.testutils.cases import TestCase
+from sentry.testutils.helpers.options import override_options
 from sentry.utils.cache import cache
 
 
@@ -41,3 +42,36 @@ class PostgresIndexerV2Test(TestCase):
 
         assert indexer_cache.get(string.id, self.cache_namespace) is None
         assert indexer_cache.get(key, self.cache_namespace) is None
+
+    def test_copy_writes(self):
+        existing = StringIndexer.objects.create(organization_id=self.org2.id, string="hello")
+
+        with override_options({"sentry-metrics.indexer.copy-writes": True}):
+            results = self.indexer.indexer.bulk_record(
+                use_case_id=self.use_case_id, org_strings={self.org2.id: self.strings}
+            )
+
+        records = StringIndexer.objects.filter(organization_id=self.org2.id)
+        assert {record.string: record.id for record in records} == results[self.org2.id]
+        assert results[self.org2.id]["hello"] == existing.id
+
+        meta = results.get_fetch_metadata()[self.org2.id]
+        assert meta["hello"].fetch_type == FetchType.DB_READ
+        assert_fetch_type_for_tag_string_set(meta, FetchType.FIRST_SEEN, {"hey", "hi"})
+
+    def test_copy_create_skips_existing_records(self):
+        """
+        Records created concurrently are not returned by the insert, and are
+        not created again.
+        """
+        existing = StringIndexer.objects.create(organization_id=self.org2.id, string="hello")
+
+        key_results = self.indexer.indexer._copy_create_with_retry(
+            StringIndexer, KeyCollection({self.org2.id: self.strings})
+        )
+
+        assert {result.string for result in key_results} == {"hey", "hi"}
+        for result in key_results:
+            assert result.org_id == self.org2.id
+            assert StringIndexer.objects.get(id=result.id).string == result.string
+        assert StringIndexer.objects.get(organization_id=self.org2.id, string="hello") == existing
@@ -0,0 +1,40 @@
+import itertools
+
+import pytest
+
+from sentry.sentry_metrics.configuration import UseCaseKey
+from sentry.sentry_metrics.indexer.postgres.postgres_v2 import PGStringIndexerV2
+from sentry.testutils.helpers.options import override_options
+from sentry.testutils.skips import requires_pytest_benchmark
+
+pytestmark = [pytest.mark.sentry_metrics, pytest.mark.django_db]
+
+ROUNDS = 5
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("copy_writes", [True, False])
+@pytest.mark.parametrize("batch_size", [1000, 10000])
+def test_bulk_record_new_strings(benchmark, copy_writes, batch_size):
+    """
+    Records a batch of strings that are all new, as happens when a new
+    organization or release shows up.
+    """
+    indexer = PGStringIndexerV2()
+    rounds = itertools.count()
+
+    def setup():
+        # Every round writes new strings, so that none are read from the DB.
+        round = next(rounds)
+        org_strings = {
+            org_id: {f"release@{round}.{org_id}.{i}" for i in range(batch_size // 10)}
+            for org_id in range(1, 11)
+        }
+        return (UseCaseKey.PERFORMANCE, org_strings), {}
+
+    benchmark.extra_info["batch_size"] = batch_size
+    with override_options({"sentry-metrics.indexer.copy-writes": copy_writes}):
+        results = benchmark.pedantic(indexer.bulk_record, setup=setup, rounds=ROUNDS)
+
+    assert sum(len(results[org_id]) for org_id in range(1, 11)) == batch_size
+    assert all(results[1].values())
@@ -0,0 +1,96 @@
+import multiprocessing
+
+import pytest
+
+from sentry.sentry_metrics.indexer.shared_table import MAX_PROBES, SharedStringTable
+
+pytestmark = pytest.mark.sentry_metrics
+
+
+@pytest.fixture
+def shared_table():
+    shared_table = SharedStringTable.create(64)
+    yield shared_table
+    shared_table.close()
+
+
+def _record_strings(name, start):
+    shared_table = SharedStringTable.attach(name)
+    try:
+        for i in range(start, start + 10):
+            shared_table.set("performance", 1, f"string-{i}", i)
+    finally:
+        shared_table.close()
+
+
+def test_get_and_set(shared_table):
+    assert shared_table.get("performance", 1, "a") is None
+    assert shared_table.set("performance", 1, "a", 10)
+    assert shared_table.get("performance", 1, "a") == 10
+
+    # use case ids and org ids are part of the key
+    assert shared_table.get("release-health", 1, "a") is None
+    assert shared_table.get("performance", 2, "a") is None
+
+    # ids of strings never change
+    assert shared_table.set("performance", 1, "a", 11)
+    assert shared_table.get("performance", 1, "a") == 10
+
+
+def test_attach(shared_table):
+    shared_table.set("performance", 1, "a", 10)
+    attached_table = SharedStringTable.attach(shared_table.name)
+    try:
+        assert attached_table.capacity == shared_table.capacity
+        assert attached_table.get("performance", 1, "a") == 10
+    finally:
+        attached_table.close()
+
+    # Closing an attached table does not remove it
+    attached_table = SharedStringTable.attach(shared_table.name)
+    try:
+        assert attached_table.get("performance", 1, "a") == 10
+    finally:
+        attached_table.close()
+
+
+def test_set_from_other_processes(shared_table):
+    processes = [
+        multiprocessing.Process(target=_record_strings, args=(shared_table.name, start))
+        for start in (0, 10)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    for i in range(20):
+        assert shared_table.get("performance", 1, f"string-{i}") == i
+
+
+def test_full_table():
+    shared_table = SharedStringTable.create(MAX_PROBES)
+    try:
+        for i in range(MAX_PROBES):
+            assert shared_table.set("performance", 1, f"string-{i}", i)
+
+        assert not shared_table.set("performance", 1, "string-full", 100)
+        assert shared_table.get("performance", 1, "string-full") is None
+        assert shared_table.get("performance", 1, "string-0") == 0
+    finally:
+        shared_table.close()
+
+
+def test_torn_slot_is_a_miss(shared_table):
+    shared_table.set("performance", 1, "a", 10)
+
+    # Corrupt the id of the only entry, as a torn concurrent write would.
+    buf = shared_table._shm.buf
+    for offset in range(16, len(buf), 32):
+        if any(buf[offset : offset + 16]):
+            buf[offset + 16] ^= 0xFF
+
+    assert shared_table.get("performance", 1, "a") is None
+    # The entry is written again on the next set
+    assert shared_table.set("performance", 1, "a", 10)
+    assert shared_table.get("performance", 1, "a") == 10
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from sentry.stacktraces import processing
+from sentry.stacktraces.processing import (
+    LocalFrameCache,
+    ProcessableFrame,
+    get_local_frame_cache,
+    lookup_frame_cache,
+)
+from sentry.testutils import TestCase
+from sentry.utils.cache import default_cache
+
+
+class LocalFrameCacheTest(TestCase):
+    def test_lru(self):
+        cache = LocalFrameCache(max_size=2)
+        cache.set("a", {"value": 1})
+        cache.set("b", {"value": 2})
+        assert cache.get("a") == {"value": 1}
+
+        cache.set("c", {"value": 3})
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == {"value": 1}
+        assert cache.get("c") == {"value": 3}
+
+    def test_values_are_copied(self):
+        cache = LocalFrameCache(max_size=2)
+        value = {"frames": [{"lineno": 1}]}
+        cache.set("a", value)
+        value["frames"][0]["lineno"] = 2
+
+        cached_value = cache.get("a")
+        assert cached_value == {"frames": [{"lineno": 1}]}
+        cached_value["frames"].clear()
+        assert cache.get("a") == {"frames": [{"lineno": 1}]}
+
+
+class LookupFrameCacheTest(TestCase):
+    def setUp(self):
+        default_cache.clear()
+        processing._local_frame_cache = None
+
+    def tearDown(self):
+        processing._local_frame_cache = None
+
+    def make_frame(self, values):
+        processable_frame = ProcessableFrame({}, 0, mock.Mock(), None, None)
+        processable_frame.set_cache_key_from_values(values)
+        return processable_frame
+
+    def test_unhashable_values(self):
+        assert self.make_frame([1.5]).cache_key is None
+
+    def test_shared_cache(self):
+        processable_frame = self.make_frame(["a", 1])
+        assert processable_frame.set_cache_value({"value": 1})
+
+        assert get_local_frame_cache() is None
+        cache_key = processable_frame.cache_key
+        assert lookup_frame_cache([cache_key, "pf:missing"]) == {
+            cache_key: {"value": 1},
+            "pf:missing": None,
+        }
+
+    @override_settings(SENTRY_FRAME_CACHE_LOCAL_SIZE=10)
+    def test_local_cache(self):
+        processable_frame = self.make_frame(["a", 1])
+        processable_frame.set_cache_value({"value": 1})
+        cache_key = processable_frame.cache_key
+        assert get_local_frame_cache().get(cache_key) == {"value": 1}
+
+        default_cache.clear()
+        assert lookup_frame_cache([cache_key]) == {cache_key: {"value": 1}}
+
+        # Values found in the shared cache are stored locally
+        get_local_frame_cache().clear()
+        processable_frame.set_cache_value({"value": 2})
+        get_local_frame_cache().clear()
+        assert lookup_frame_cache([cache_key]) == {cache_key: {"value": 2}}
+        assert get_local_frame_cache().get(cache_key) == {"value": 2}
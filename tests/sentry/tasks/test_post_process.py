@@ -6,7 +6,9 @@ from typing import Dict
 from unittest import mock
 from unittest.mock import Mock, patch
 
+import pytest
 import pytz
+from celery.exceptions import SoftTimeLimitExceeded
 from django.test import override_settings
 from django.utils import timezone
 
@@ -23,6 +25,7 @@ from sentry.models import (
     GroupOwnerType,
     GroupSnooze,
     GroupStatus,
+    Project,
     ProjectOwnership,
     ProjectTeam,
 )
@@ -30,7 +33,12 @@ from sentry.models.activity import ActivityIntegration
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
 from sentry.rules import init_registry
 from sentry.tasks.merge import merge_groups
-from sentry.tasks.post_process import post_process_group, process_event
+from sentry.tasks.post_process import (
+    get_post_process_group_batch_time_limits,
+    post_process_group,
+    post_process_group_batch,
+    process_event,
+)
 from sentry.testutils import SnubaTestCase, TestCase
 from sentry.testutils.cases import BaseTestCase
 from sentry.testutils.helpers import apply_feature_flag_on_cls, with_feature
@@ -1288,3 +1296,66 @@ class TransactionClustererTestCase(TestCase, SnubaTestCase):
         )
 
         assert mock_store_transaction_name.mock_calls == [mock.call(self.project, "foo")]
+
+
+@region_silo_test
+class PostProcessGroupBatchTest(TestCase):
+    def get_job(self, cache_key):
+        return dict(
+            is_new=False,
+            is_regression=False,
+            is_new_group_environment=False,
+            cache_key=cache_key,
+            group_id=self.group.id,
+            group_states=None,
+        )
+
+    @patch("sentry.tasks.post_process.post_process_group")
+    def test_runs_jobs_in_order(self, mock_post_process_group):
+        post_process_group_batch([self.get_job("a"), self.get_job("b")])
+
+        assert mock_post_process_group.mock_calls == [
+            mock.call(**self.get_job("a")),
+            mock.call(**self.get_job("b")),
+        ]
+
+    @patch("sentry.tasks.post_process.post_process_group")
+    def test_failed_job_does_not_stop_batch(self, mock_post_process_group):
+        mock_post_process_group.side_effect = [Exception("boom"), None]
+        post_process_group_batch([self.get_job("a"), self.get_job("b")])
+
+        assert mock_post_process_group.call_count == 2
+
+    @patch("sentry.tasks.post_process.logger")
+    @patch("sentry.tasks.post_process.post_process_group")
+    def test_logs_jobs_left_on_soft_time_limit(self, mock_post_process_group, mock_logger):
+        mock_post_process_group.side_effect = [None, SoftTimeLimitExceeded()]
+        with pytest.raises(SoftTimeLimitExceeded):
+            post_process_group_batch([self.get_job("a"), self.get_job("b"), self.get_job("c")])
+
+        mock_logger.error.assert_called_once_with(
+            "post_process.batch.time_limit_exceeded", extra={"cache_keys": ["b", "c"]}
+        )
+
+    @patch("sentry.tasks.post_process.post_process_group")
+    def test_group_is_not_shared(self, mock_post_process_group):
+        fetched = []
+
+        def fetch(**kwargs):
+            fetched.append(
+                (
+                    Project.objects.get_from_cache(id=self.project.id),
+                    Group.objects.get_from_cache(id=kwargs["group_id"]),
+                )
+            )
+
+        mock_post_process_group.side_effect = fetch
+        post_process_group_batch([self.get_job("a"), self.get_job("b")])
+
+        (first_project, first_group), (second_project, second_group) = fetched
+        assert first_project is second_project
+        assert first_group is not second_group
+
+    def test_time_limits(self):
+        assert get_post_process_group_batch_time_limits(0) == (120, 110)
+        assert get_post_process_group_batch_time_limits(20) == (2400, 2200)
@@ -1,14 +1,19 @@
+import functools
 from unittest import mock
 from unittest.mock import patch
 
 import pytest
 
+from sentry.lang.native.processing import SymbolicationRequest
+from sentry.lang.native.symbolicator import Symbolicator, SymbolicatorBatch
 from sentry.plugins.base.v2 import Plugin2
 from sentry.tasks.store import preprocess_event
 from sentry.tasks.symbolication import (
+    batch_symbolicate_submissions,
     should_demote_symbolication,
     submit_symbolicate,
     symbolicate_event,
+    symbolicate_event_batch,
 )
 from sentry.testutils.helpers.options import override_options
 from sentry.testutils.helpers.task_runner import TaskRunner
@@ -252,3 +257,86 @@ def test_submit_symbolicate_queue_switch(
             start_time=0,
         )
     assert mock_submit_symbolicate.call_count == 4
+
+
+@pytest.mark.django_db
+def test_batch_symbolicate_submissions(mock_symbolicate_event, mock_symbolicate_event_low_priority):
+    with mock.patch(
+        "sentry.tasks.symbolication.symbolicate_event_batch"
+    ) as mock_symbolicate_event_batch, override_options({"symbolicate-event.batch-size": 2}):
+        with batch_symbolicate_submissions():
+            for i, is_low_priority in enumerate([False, True, False, False]):
+                submit_symbolicate(
+                    is_low_priority=is_low_priority,
+                    from_reprocessing=False,
+                    cache_key=f"e:{i}",
+                    event_id=None,
+                    start_time=None,
+                )
+
+            # Only events for the low priority queue are submitted right away
+            assert mock_symbolicate_event.delay.call_count == 0
+            assert mock_symbolicate_event_low_priority.delay.call_count == 1
+
+    ((_, _, batch_kwargs),) = mock_symbolicate_event_batch.apply_async.mock_calls
+    assert [job["cache_key"] for job in batch_kwargs["kwargs"]["jobs"]] == ["e:0", "e:2"]
+    mock_symbolicate_event.delay.assert_called_once_with(
+        cache_key="e:3", start_time=None, event_id=None, queue_switches=0, has_attachments=False
+    )
+
+
+@pytest.mark.django_db
+def test_symbolicate_event_batch(default_project, mock_event_processing_store, mock_process_event):
+    pending = {"status": "pending", "request_id": "a", "retry_after": 0}
+    completed = {"status": "completed", "stacktraces": []}
+    events = {
+        f"e:{i}": {"project": default_project.id, "platform": "native", "event_id": str(i) * 32}
+        for i in range(3)
+    }
+    mock_event_processing_store.get.side_effect = events.get
+    mock_event_processing_store.store.side_effect = lambda data: "e:%s" % data["event_id"][0]
+
+    responses = {
+        "0" * 32: ([pending], [completed]),
+        "1" * 32: ([completed], None),
+        "2" * 32: (ValueError, None),
+    }
+
+    def merge(data, response):
+        data["symbolicated"] = response["status"]
+        return data
+
+    def get_symbolication_request(data):
+        symbolicator = Symbolicator(project=default_project, event_id=data["event_id"])
+        create_task, query_task = responses[data["event_id"]]
+        symbolicator.sess.symbolicate_stacktraces = mock.Mock(side_effect=create_task)
+        symbolicator.sess.query_task = mock.Mock(side_effect=query_task)
+        return SymbolicationRequest(
+            symbolicator,
+            "process_payload",
+            {"stacktraces": [], "modules": [], "signal": None},
+            functools.partial(merge, data),
+        )
+
+    with mock.patch(
+        "sentry.lang.native.processing.get_symbolication_request",
+        side_effect=get_symbolication_request,
+    ), mock.patch.object(
+        SymbolicatorBatch, "run", autospec=True, side_effect=SymbolicatorBatch.run
+    ) as mock_run, mock.patch(
+        "sentry.tasks.store.do_process_event"
+    ) as mock_do_process_event:
+        symbolicate_event_batch(
+            [dict(cache_key=cache_key, start_time=1) for cache_key in sorted(events)]
+        )
+
+    # All events are symbolicated by a single batch
+    assert mock_run.call_count == 1
+
+    processed = {
+        call.kwargs["cache_key"]: call.kwargs["data"] for call in mock_do_process_event.mock_calls
+    }
+    assert processed["e:0"]["symbolicated"] == "completed"
+    assert processed["e:1"]["symbolicated"] == "completed"
+    assert "symbolicated" not in processed["e:2"]
+    assert processed["e:2"]["_metrics"]["flag.processing.fatal"]
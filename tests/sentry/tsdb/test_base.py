@@ -5,7 +5,7 @@ from unittest import TestCase
 import pytz
 from freezegun import freeze_time
 
-from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, BaseTSDB, SeriesTable
 from sentry.utils.dates import to_timestamp
 
 
@@ -40,6 +40,46 @@ class BaseTSDBTest(TestCase):
         assert len(post_results) == 1
         assert post_results[1] == [[1368889200, 15], [1368892800, 7]]
 
+    def test_rollup_series_table(self):
+        table = SeriesTable(
+            [1368889980, 1368890040, 1368893640],
+            {1: [5, 10, 7], 2: [0, 1, 2]},
+        )
+        assert self.tsdb.rollup(table, 3600) == SeriesTable(
+            [1368889200, 1368892800], {1: [15, 7], 2: [1, 2]}
+        )
+
+    def test_rollup_series_table_shape(self):
+        # Rolled up tables convert to the same shape as a legacy rollup.
+        range_set = {1: [(1368889980, 5), (1368890040, 10), (1368893640, 7)]}
+        table = SeriesTable.from_range(range_set)
+        assert table.rollup(3600).to_rollup() == self.tsdb.rollup(range_set, 3600)
+        assert self.tsdb.rollup(range_set, 3600) == {1: [[1368889200, 15], [1368892800, 7]]}
+
+    def test_empty_series_table(self):
+        # Like get_range, no keys are returned for an empty range.
+        table = SeriesTable([], {1: [], 2: []})
+        assert table.to_range() == {}
+        assert table.to_rollup() == {}
+
+    def test_series_table_conversions(self):
+        range_set = {
+            1: [(1368889980, 5), (1368890040, 10)],
+            2: [(1368889980, 0), (1368890040, 3)],
+        }
+        table = SeriesTable.from_range(range_set)
+        assert table.timestamps == [1368889980, 1368890040]
+        assert table.columns == {1: [5, 10], 2: [0, 3]}
+        assert table.to_range() == range_set
+        assert table.sums() == {1: 15, 2: 3}
+
+        # missing buckets are zero-filled
+        table = SeriesTable.from_buckets({1: {1368889980: 5}, 2: {1368890040: 3}})
+        assert table.to_range() == {
+            1: [(1368889980, 5), (1368890040, 0)],
+            2: [(1368889980, 0), (1368890040, 3)],
+        }
+
     def test_calculate_expiry(self):
         timestamp = datetime(2013, 5, 18, 15, 13, 58, 132928, tzinfo=pytz.UTC)
         result = self.tsdb.calculate_expiry(10, 30, timestamp)
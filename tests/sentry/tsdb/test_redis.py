@@ -109,6 +109,9 @@ class RedisTSDBTest(TestCase):
             ]
         }
 
+        # An empty range has no keys.
+        assert self.db.get_range(TSDBModel.project, [1], dts[-1], dts[0]) == {}
+
         results = self.db.get_range(TSDBModel.project, [2], dts[0], dts[-1])
         assert results == {
             2: [
@@ -188,6 +191,76 @@ class RedisTSDBTest(TestCase):
         results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
         assert results == {1: 0, 2: 0}
 
+    def test_get_range_multi(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.project, 1, dts[0])
+        self.db.incr(TSDBModel.project, 1, dts[1], count=2, environment_id=1)
+        self.db.incr(TSDBModel.group, 5, dts[2], count=3)
+        self.db.incr(TSDBModel.group, 5, dts[3], environment_id=1)
+
+        queries = [
+            (TSDBModel.project, 1, None),
+            (TSDBModel.project, 1, 1),
+            (TSDBModel.group, 5, None),
+            (TSDBModel.group, 5, 1),
+            (TSDBModel.group, 6, None),
+        ]
+        results = self.db.get_range_multi(queries, dts[0], dts[-1])
+        assert results == {
+            (TSDBModel.project, 1, None): [
+                (timestamp(dts[0]), 1),
+                (timestamp(dts[1]), 2),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 0),
+            ],
+            (TSDBModel.project, 1, 1): [
+                (timestamp(dts[0]), 0),
+                (timestamp(dts[1]), 2),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 0),
+            ],
+            (TSDBModel.group, 5, None): [
+                (timestamp(dts[0]), 0),
+                (timestamp(dts[1]), 0),
+                (timestamp(dts[2]), 3),
+                (timestamp(dts[3]), 1),
+            ],
+            (TSDBModel.group, 5, 1): [
+                (timestamp(dts[0]), 0),
+                (timestamp(dts[1]), 0),
+                (timestamp(dts[2]), 0),
+                (timestamp(dts[3]), 1),
+            ],
+            (TSDBModel.group, 6, None): [(timestamp(dts[i]), 0) for i in range(0, 4)],
+        }
+
+        # the bulk API must agree with the single-model API
+        for model, key, environment_id in queries:
+            assert (
+                results[(model, key, environment_id)]
+                == self.db.get_range(
+                    model,
+                    [key],
+                    dts[0],
+                    dts[-1],
+                    environment_ids=[environment_id] if environment_id is not None else None,
+                )[key]
+            )
+
+        assert self.db.get_sums_multi(queries, dts[0], dts[-1]) == {
+            (TSDBModel.project, 1, None): 3,
+            (TSDBModel.project, 1, 1): 2,
+            (TSDBModel.group, 5, None): 4,
+            (TSDBModel.group, 5, 1): 1,
+            (TSDBModel.group, 6, None): 0,
+        }
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(hours=4)
         dts = [now + timedelta(hours=i) for i in range(4)]
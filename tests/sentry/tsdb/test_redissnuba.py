@@ -12,6 +12,7 @@ def get_callargs(model):
         "models": [model],
         "items": [(model, "key", ["values"])],
         "requests": [(model, "data")],
+        "queries": [(model, "key", None)],
     }
 
 
@@ -7,19 +7,44 @@ from sentry import projectoptions
 from sentry.eventstore.models import Event
 from sentry.testutils import TestCase
 from sentry.testutils.helpers import override_options
-from sentry.testutils.performance_issues.event_generators import get_event
+from sentry.testutils.performance_issues.event_generators import (
+    create_span,
+    get_event,
+    modify_span_start,
+)
 from sentry.testutils.silo import region_silo_test
 from sentry.types.issues import GroupType
 from sentry.utils.performance_issues.performance_detection import (
     DETECTOR_TYPE_TO_GROUP_TYPE,
+    ConsecutiveDBSpanDetector,
     DetectorType,
     EventPerformanceProblem,
+    MNPlusOneDBSpanDetector,
+    NPlusOneAPICallsDetector,
     NPlusOneDBSpanDetector,
+    NPlusOneDBSpanDetectorExtended,
     PerformanceProblem,
+    RenderBlockingAssetSpanDetector,
+    SlowSpanDetector,
+    SpanTable,
     _detect_performance_problems,
+    fingerprint_span,
+    get_detection_settings,
+    get_span_duration,
+    run_detectors_on_data,
     total_span_time,
 )
 
+DETECTOR_CLASSES = [
+    ConsecutiveDBSpanDetector,
+    SlowSpanDetector,
+    RenderBlockingAssetSpanDetector,
+    NPlusOneDBSpanDetector,
+    NPlusOneDBSpanDetectorExtended,
+    NPlusOneAPICallsDetector,
+    MNPlusOneDBSpanDetector,
+]
+
 BASE_DETECTOR_OPTIONS = {
     "performance.issues.n_plus_one_db.problem-creation": 1.0,
     "performance.issues.n_plus_one_db_ext.problem-creation": 1.0,
@@ -282,6 +307,54 @@ class DetectorTypeToGroupTypeTest(unittest.TestCase):
             ), f"{detector_type} must have a corresponding entry in DETECTOR_TYPE_TO_GROUP_TYPE"
 
 
+class SpanTableTest(unittest.TestCase):
+    def test_columns(self):
+        parent = modify_span_start(create_span("http.server", 100.0), 1669031857711.0)
+        parent["span_id"] = "a" * 16
+        child = create_span("db", 10.0, hash="abc")
+        child["parent_span_id"] = parent["span_id"]
+        spans = SpanTable([parent, child])
+
+        assert len(spans) == 2
+        assert spans.ops == ["http.server", "db"]
+        assert spans.hashes == ["", "abc"]
+        assert list(spans.parent_indices) == [-1, 0]
+        assert list(spans.start_timestamps) == [1669031857711000, 0]
+        assert spans.durations[1] == 10000
+        # Durations match the timedelta arithmetic of `get_span_duration`
+        assert spans.duration(0) == get_span_duration(parent)
+        assert spans.fingerprint(1) == fingerprint_span(child)
+
+    def test_missing_fields(self):
+        spans = SpanTable([{}])
+        assert spans.ops == [None]
+        assert list(spans.durations) == [0]
+        assert spans.fingerprint(0) is None
+
+
+@pytest.mark.django_db
+class RunDetectorsOnDataTest(TestCase):
+    def test_matches_visiting_spans(self):
+        settings = get_detection_settings()
+        for event_name in (
+            "n-plus-one-in-django-index-view",
+            "solved-n-plus-one-in-django-index-view",
+        ):
+            event = get_event(event_name)
+            detectors = [cls(settings, event) for cls in DETECTOR_CLASSES]
+            run_detectors_on_data(detectors, event)
+
+            # Detectors reading the table find the same problems as when they
+            # visit the raw spans.
+            for detector in detectors:
+                expected = type(detector)(settings, event)
+                if expected.is_event_eligible(event):
+                    for span in event["spans"]:
+                        expected.visit_span(span)
+                    expected.on_complete()
+                assert detector.stored_problems == expected.stored_problems
+
+
 @region_silo_test
 class EventPerformanceProblemTest(TestCase):
     def test_save_and_fetch(self):
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from sentry.utils.lru import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    assert cache.set("a", 1) == []
+    assert cache.set("b", 2) == []
+    assert cache.get("a") == 1
+
+    assert cache.set("c", 3) == [("b", 2)]
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_evicts_by_size():
+    cache = LRUCache(max_size=100)
+    cache.set("a", "a", size=40)
+    cache.set("b", "b", size=40)
+    cache.set("a", "aa", size=50)
+    assert cache.size == 90
+
+    assert cache.set("c", "c", size=20) == [("b", "b")]
+    assert cache.size == 70
+    assert cache.get("a") == "aa"
+
+
+def test_ttl():
+    cache = LRUCache(max_size=2, ttl=60)
+    with mock.patch("sentry.utils.lru.monotonic", return_value=0):
+        cache.set("a", 1)
+    with mock.patch("sentry.utils.lru.monotonic", return_value=59):
+        assert cache.get("a") == 1
+    with mock.patch("sentry.utils.lru.monotonic", return_value=61):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_delete_and_clear():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    assert cache.size == 1
+
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.size == 0
@@ -1,18 +1,34 @@
+import io
 import unittest
 from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 import pytz
+import urllib3
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 
 from sentry.models import GroupRelease, Project, Release
 from sentry.testutils import TestCase
+from sentry.testutils.helpers.options import override_options
+from sentry.utils import json
 from sentry.utils.snuba import (
     Dataset,
+    DecodedResponse,
     SnubaQueryParams,
+    UnexpectedResponseError,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
+    _bulk_snuba_query,
+    _get_bulk_query_thread_pool,
+    _get_inflight_lock,
+    _get_referrer_semaphore,
     _prepare_query_params,
+    _read_response,
+    _revalidate_cached_queries,
+    get_cache_key,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
@@ -374,3 +390,186 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class QueryCacheTest(TestCase):
+    def setUp(self):
+        self.query = ({"selected_columns": ["event_id"], "project": [self.project.id]}, None, None)
+        self.cache_key = get_cache_key(self.query[0])
+        self.result = {"data": [{"event_id": "a" * 32}]}
+
+    def tearDown(self):
+        cache.clear()
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_cache(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [self.result]
+        for _ in range(2):
+            assert _apply_cache_and_build_results([self.query], use_cache=True) == [self.result]
+        assert bulk_snuba_query.call_count == 1
+
+    @override_settings(SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS=5)
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_waits_for_inflight_query(self, bulk_snuba_query):
+        _get_inflight_lock(self.cache_key).acquire()
+
+        def finish_inflight_query(delay):
+            cache.set(self.cache_key, json.dumps(self.result))
+
+        with mock.patch("sentry.utils.snuba.time.sleep", side_effect=finish_inflight_query):
+            assert _apply_cache_and_build_results([self.query], use_cache=True) == [self.result]
+        assert bulk_snuba_query.call_count == 0
+
+    @override_settings(SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS=5)
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_runs_query_after_inflight_query_failed(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [self.result]
+        lock = _get_inflight_lock(self.cache_key)
+        lock.acquire()
+
+        with mock.patch("sentry.utils.snuba.time.sleep", side_effect=lambda delay: lock.release()):
+            assert _apply_cache_and_build_results([self.query], use_cache=True) == [self.result]
+        assert bulk_snuba_query.call_count == 1
+        assert json.loads(cache.get(self.cache_key)) == self.result
+
+    @override_settings(SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS=60)
+    @mock.patch("sentry.utils.snuba._cache_refresh_thread_pool")
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_stale_while_revalidate(self, bulk_snuba_query, refresh_thread_pool):
+        stale_result = {"data": []}
+        cache.set(f"{self.cache_key}:stale", json.dumps(stale_result))
+        bulk_snuba_query.return_value = [self.result]
+
+        with mock.patch("sentry.utils.snuba.metrics.incr") as incr:
+            assert _apply_cache_and_build_results([self.query], use_cache=True) == [stale_result]
+        assert bulk_snuba_query.call_count == 0
+        assert [c[0][0] for c in incr.call_args_list] == ["snuba.query_cache.stale"]
+
+        refresh_thread_pool.submit.assert_called_once()
+        _revalidate_cached_queries(*refresh_thread_pool.submit.call_args[0][1:])
+        assert bulk_snuba_query.call_count == 1
+
+        assert _apply_cache_and_build_results([self.query], use_cache=True) == [self.result]
+        assert json.loads(cache.get(f"{self.cache_key}:stale")) == self.result
+
+    @override_settings(SENTRY_SNUBA_CACHE_STALE_TTL_SECONDS=60)
+    @mock.patch("sentry.utils.snuba._cache_refresh_thread_pool")
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_stale_refresh_is_queued_once(self, bulk_snuba_query, refresh_thread_pool):
+        cache.set(f"{self.cache_key}:stale", json.dumps({"data": []}))
+        bulk_snuba_query.return_value = [self.result]
+
+        for _ in range(3):
+            _apply_cache_and_build_results([self.query], use_cache=True)
+        refresh_thread_pool.submit.assert_called_once()
+
+        _revalidate_cached_queries(*refresh_thread_pool.submit.call_args[0][1:])
+        cache.delete(self.cache_key)
+        _apply_cache_and_build_results([self.query], use_cache=True)
+        assert refresh_thread_pool.submit.call_count == 2
+
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_revalidate_skips_fresh_results(self, bulk_snuba_query):
+        cache.set(self.cache_key, json.dumps(self.result))
+
+        _revalidate_cached_queries([(self.query, self.cache_key)], {})
+        assert bulk_snuba_query.call_count == 0
+        # The lock has been released again.
+        lock = _get_inflight_lock(self.cache_key)
+        lock.acquire()
+        lock.release()
+
+    @override_settings(SENTRY_SNUBA_CACHE_INFLIGHT_TTL_SECONDS=5)
+    @mock.patch("sentry.utils.snuba._bulk_snuba_query")
+    def test_leader_rechecks_cache(self, bulk_snuba_query):
+        original_get_inflight_lock = _get_inflight_lock
+
+        def finish_inflight_query(cache_key):
+            # Another worker caches the result before the lock is taken.
+            cache.set(self.cache_key, json.dumps(self.result))
+            return original_get_inflight_lock(cache_key)
+
+        with mock.patch("sentry.utils.snuba._get_inflight_lock", side_effect=finish_inflight_query):
+            assert _apply_cache_and_build_results([self.query], use_cache=True) == [self.result]
+        assert bulk_snuba_query.call_count == 0
+
+
+class BulkSnubaQueryTest(TestCase):
+    def run_query(self, params):
+        query_data, _, _, _ = params
+        response = mock.Mock(status=200, data=json.dumps({"data": [query_data[0]]}))
+        return response, None, lambda row: row
+
+    @mock.patch("sentry.utils.snuba._legacy_snql_query")
+    def test_bulk_query_thread_pool(self, legacy_snql_query):
+        legacy_snql_query.side_effect = self.run_query
+        queries = [({"id": i}, None, None) for i in range(5)]
+
+        with override_options({"snuba.bulk-query.max-concurrency": 2}):
+            results = _bulk_snuba_query(queries, {"referer": "test"})
+
+        assert [result["data"] for result in results] == [[{"id": i}] for i in range(5)]
+        assert legacy_snql_query.call_count == 5
+
+    def test_replaced_bulk_query_thread_pool(self):
+        with override_options({"snuba.bulk-query.max-concurrency": 2}):
+            executor = _get_bulk_query_thread_pool()
+        with override_options({"snuba.bulk-query.max-concurrency": 3}):
+            assert _get_bulk_query_thread_pool() is not executor
+
+        # Callers that still hold the old pool can keep submitting to it.
+        assert executor.submit(lambda: 1).result() == 1
+
+    @mock.patch("sentry.utils.snuba._legacy_snql_query")
+    def test_referrer_concurrency(self, legacy_snql_query):
+        legacy_snql_query.side_effect = self.run_query
+        queries = [({"id": i}, None, None) for i in range(3)]
+
+        with override_options({"snuba.bulk-query.referrer-concurrency": {"limited": 1}}):
+            semaphore = _get_referrer_semaphore("limited")
+            assert semaphore is _get_referrer_semaphore("limited")
+            assert _get_referrer_semaphore("unlimited") is None
+
+            results = _bulk_snuba_query(queries, {"referer": "limited"})
+
+        assert [result["data"] for result in results] == [[{"id": i}] for i in range(3)]
+        # All permits are released again.
+        assert semaphore.acquire(blocking=False)
+        semaphore.release()
+
+    @mock.patch("sentry.utils.snuba._legacy_snql_query")
+    def test_decoded_responses(self, legacy_snql_query):
+        legacy_snql_query.side_effect = lambda params: (
+            DecodedResponse({"data": [params[0][0]]}),
+            None,
+            lambda row: row,
+        )
+        queries = [({"id": i}, None, None) for i in range(3)]
+
+        results = _bulk_snuba_query(queries, {"referer": "test"})
+
+        assert [result["data"] for result in results] == [[{"id": i}] for i in range(3)]
+
+
+class ReadResponseTest(unittest.TestCase):
+    def get_response(self, status, data):
+        return urllib3.HTTPResponse(body=io.BytesIO(data), status=status, preload_content=False)
+
+    def test_decodes_response(self):
+        data = json.dumps({"data": [{"id": i} for i in range(1000)]}).encode("utf-8")
+        with mock.patch("sentry.utils.snuba.STREAM_DECODE_CHUNK_SIZE", 100):
+            response = _read_response(self.get_response(200, data))
+
+        assert isinstance(response, DecodedResponse)
+        assert response.body == json.loads(data)
+
+    def test_error_response(self):
+        data = json.dumps({"error": {"type": "schema", "message": "invalid"}}).encode("utf-8")
+        response = _read_response(self.get_response(400, data))
+
+        assert response.status == 400
+        assert response.data == data
+
+    def test_invalid_response(self):
+        with pytest.raises(UnexpectedResponseError):
+            _read_response(self.get_response(200, b'{"data": ['))